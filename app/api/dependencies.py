@@ -0,0 +1,12 @@
+"""
+Dependências injetadas nas rotas
+"""
+
+from fastapi import Request
+
+from app.services.container import ServiceContainer
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """Retorna o contêiner de serviços criado no lifespan da aplicação"""
+    return request.app.state.services
@@ -2,23 +2,30 @@
 Rotas da API
 """
 
-from fastapi import APIRouter, Request, UploadFile, Form, File
-from fastapi.responses import HTMLResponse, JSONResponse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from functools import partial
+from typing import IO, Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Request, UploadFile, Form, File
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
-from app.services import AIService, FileService, FeedbackService, TextProcessor
-from app.core.logging_config import logger
-from app.core.exceptions import FileValidationError, AIServiceError
+from app.core.config import settings
+from app.api.dependencies import get_services
+from app.services import ServiceContainer
+from app.core.logging_config import logger, logging_stats
+from app.core.telemetry import Telemetry, request_started, telemetry
+from app.core.exceptions import EmailProcessingError, FileValidationError, AIServiceError, JobQueueFullError
+from app.utils.concurrency import bounded_map_unordered
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
-# Instanciar serviços
-ai_service = AIService()
-file_service = FileService()
-feedback_service = FeedbackService()
-text_processor = TextProcessor()
-
 
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -29,7 +36,8 @@ async def home(request: Request):
 @router.post("/process")
 async def process_email(
     file: UploadFile = File(None),
-    text: str = Form(None)
+    text: str = Form(None),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     Processa email e retorna classificação + resposta
@@ -42,52 +50,23 @@ async def process_email(
         JSON com resultado
     """
     try:
-        content = ""
-        
-        # Extrair conteúdo
-        if file and file.filename:
-            logger.info(f"Processando arquivo: {file.filename}")
-            content = await file_service.extract_text(file)
-        
-        elif text:
-            logger.info("Processando texto direto")
-            content = text.strip()
-            
-            if len(content) > 10000:
-                return JSONResponse(
-                    status_code=400,
-                    content={"error": "Texto muito longo. Máximo: 10.000 caracteres"}
-                )
-        
-        else:
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Envie um arquivo ou texto"}
-            )
-        
-        if not content:
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Não foi possível extrair conteúdo"}
-            )
+        content = await _read_content(services, file, text)
         
-        # Classificar
+        # Classificar e gerar resposta
         logger.info("Iniciando classificação...")
-        category, confidence, method = ai_service.classify_email(content)
-        
-        # Gerar resposta
-        logger.info("Gerando resposta...")
-        response_text = ai_service.generate_response(category, content)
+        analysis = await services.processing_service.analyze(content)
+        category = analysis["category"]
+        confidence = analysis["confidence"]
         
         # Preview do conteúdo
-        content_preview = text_processor.truncate(content, 200)
+        content_preview = services.text_processor.truncate(content, 200)
         
         result = {
             "success": True,
             "category": category,
-            "response": response_text,
+            "response": analysis["response"],
             "confidence": confidence,
-            "method": method,
+            "method": analysis["method"],
             "content_preview": content_preview
         }
         
@@ -116,12 +95,382 @@ async def process_email(
         )
 
 
+@router.post("/process/stream")
+async def process_email_stream(
+    file: UploadFile = File(None),
+    text: str = Form(None),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Processa email e transmite o resultado via Server-Sent Events
+    
+    Eventos: "category" (assim que a classificação termina), "token"
+    (trechos da resposta), "replace" (stream interrompido; resposta padrão),
+    "done" (resultado completo) e "error".
+    
+    Args:
+        file: Arquivo .txt ou .pdf
+        text: Texto direto do email
+    
+    Returns:
+        Stream text/event-stream
+    """
+    try:
+        content = await _read_content(services, file, text)
+    
+    except FileValidationError as e:
+        logger.warning(f"Erro de validação: {e}")
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    content_preview = services.text_processor.truncate(content, 200)
+    
+    async def stream() -> AsyncIterator[str]:
+        try:
+            async for event, data in services.processing_service.analyze_stream(content):
+                if event == "category":
+                    data = dict(data, content_preview=content_preview)
+                elif event == "done":
+                    data = dict(data, success=True, content_preview=content_preview)
+                    logger.info(f"Processamento concluído: {data['category']} ({data['confidence']})")
+                yield _sse_event(event, data)
+        
+        except Exception as e:
+            logger.error(f"Erro inesperado no streaming: {e}", exc_info=True)
+            yield _sse_event("error", {"error": "Erro ao processar com IA. Tente novamente."})
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _read_content(
+    services: ServiceContainer,
+    file: Optional[UploadFile],
+    text: Optional[str]
+) -> str:
+    """
+    Obtém o conteúdo do email a partir do arquivo ou do texto enviado
+    
+    Raises:
+        FileValidationError: Se a entrada for inválida ou vazia
+    """
+    content = ""
+    
+    # Recebimento e parsing do formulário ocorrem antes da rota
+    started = request_started.get()
+    if started is not None:
+        telemetry.observe("upload", time.perf_counter() - started)
+    
+    # Extrair conteúdo
+    if file and file.filename:
+        logger.info(f"Processando arquivo: {file.filename}")
+        content = await services.file_service.extract_text(
+            file, budget=settings.EXTRACTION_BUDGET_CHARS or None
+        )
+    
+    elif text:
+        logger.info("Processando texto direto")
+        content = text.strip()
+        
+        if len(content) > 10000:
+            raise FileValidationError("Texto muito longo. Máximo: 10.000 caracteres")
+    
+    else:
+        raise FileValidationError("Envie um arquivo ou texto")
+    
+    if not content:
+        raise FileValidationError("Não foi possível extrair conteúdo")
+    
+    return content
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/process/batch")
+async def process_batch(
+    request: Request,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Processa vários emails e devolve os resultados em NDJSON à medida que ficam prontos
+    
+    Formatos aceitos:
+        - application/json: array de textos ou objetos {"id", "text"}
+        - application/x-ndjson (JSONL): um texto ou objeto por linha
+        - multipart/form-data: vários arquivos no campo "files" e/ou textos em "texts"
+    
+    Returns:
+        Stream NDJSON com uma linha por item ({"index", "id", "success", ...})
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    form = None
+    body: Optional[IO[bytes]] = None
+    
+    try:
+        if content_type == "multipart/form-data":
+            form = await request.form(
+                max_files=settings.BATCH_MAX_ITEMS,
+                max_fields=settings.BATCH_MAX_ITEMS
+            )
+            entries = list(form.getlist("files")) + list(form.getlist("texts"))
+            items = _iter_entries(entries)
+        
+        elif content_type == "application/json":
+            # O array é lido inteiro: limitado a BATCH_JSON_MAX_BYTES
+            with await _spool_body(request, settings.BATCH_JSON_MAX_BYTES) as json_body:
+                entries = json.load(json_body)
+            if not isinstance(entries, list):
+                return JSONResponse(
+                    status_code=400,
+                    content={"error": "Envie um array JSON de emails"}
+                )
+            items = _iter_entries(entries)
+        
+        elif content_type in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+            # Corpo em arquivo temporário, decodificado uma linha por vez
+            body = await _spool_body(request, settings.BATCH_MAX_BYTES)
+            items = _iter_entries(_iter_jsonl(body))
+        
+        else:
+            return JSONResponse(
+                status_code=415,
+                content={"error": "Use JSON, JSONL ou multipart/form-data"}
+            )
+    
+    except FileValidationError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    
+    except ValueError:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Corpo da requisição inválido"}
+        )
+    
+    logger.info("Processando lote de emails")
+    
+    async def stream() -> AsyncIterator[bytes]:
+        try:
+            async for result in bounded_map_unordered(
+                items, partial(_process_batch_item, services), settings.BATCH_CONCURRENCY
+            ):
+                yield (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+        
+        except Exception as e:
+            logger.error(f"Erro no processamento em lote: {e}", exc_info=True)
+            yield (json.dumps({"success": False, "error": str(e)}, ensure_ascii=False) + "\n").encode("utf-8")
+        
+        finally:
+            if form is not None:
+                await form.close()
+            if body is not None:
+                body.close()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def _spool_body(request: Request, max_bytes: int) -> IO[bytes]:
+    """
+    Copia o corpo da requisição para um arquivo temporário (em memória até
+    1MB, depois em disco), posicionado no início
+    
+    Raises:
+        FileValidationError: Se o corpo exceder max_bytes
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise FileValidationError(f"Corpo excede o máximo de {max_bytes} bytes")
+    
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise FileValidationError(f"Corpo excede o máximo de {max_bytes} bytes")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    
+    spool.seek(0)
+    return spool
+
+
+def _iter_jsonl(body: IO[bytes]) -> Iterator[Any]:
+    """Decodifica o corpo JSONL sob demanda, uma entrada por linha"""
+    for line in body:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield EmailProcessingError("Linha JSONL inválida")
+
+
+async def _iter_entries(entries: Iterable[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    """Numera as entradas do lote, respeitando BATCH_MAX_ITEMS"""
+    for index, entry in enumerate(entries):
+        if index >= settings.BATCH_MAX_ITEMS:
+            yield index, EmailProcessingError(
+                f"Lote excede o máximo de {settings.BATCH_MAX_ITEMS} itens"
+            )
+            return
+        yield index, entry
+
+
+async def _process_batch_item(services: ServiceContainer, item: Tuple[int, Any]) -> Dict:
+    """Processa um item do lote, convertendo erros em linhas de resultado"""
+    index, entry = item
+    item_id: Optional[Any] = None
+    
+    try:
+        if isinstance(entry, Exception):
+            raise entry
+        
+        if isinstance(entry, StarletteUploadFile):
+            item_id = entry.filename
+            content = await services.file_service.extract_text(
+                entry, budget=settings.EXTRACTION_BUDGET_CHARS or None
+            )
+        else:
+            if isinstance(entry, dict):
+                item_id = entry.get("id")
+                entry = entry.get("text")
+            if not isinstance(entry, str):
+                raise EmailProcessingError("Item sem texto")
+            
+            content = entry.strip()
+            if len(content) > settings.MAX_TEXT_LENGTH:
+                raise EmailProcessingError(
+                    f"Texto muito longo. Máximo: {settings.MAX_TEXT_LENGTH} caracteres"
+                )
+        
+        if not content:
+            raise EmailProcessingError("Não foi possível extrair conteúdo")
+        
+        analysis = await services.processing_service.analyze(content)
+        
+        return {
+            "index": index,
+            "id": item_id,
+            "success": True,
+            "category": analysis["category"],
+            "response": analysis["response"],
+            "confidence": analysis["confidence"],
+            "method": analysis["method"],
+            "content_preview": services.text_processor.truncate(content, 200)
+        }
+    
+    except EmailProcessingError as e:
+        return {"index": index, "id": item_id, "success": False, "error": str(e)}
+    
+    except Exception as e:
+        logger.error(f"Erro inesperado no item {index} do lote: {e}", exc_info=True)
+        return {"index": index, "id": item_id, "success": False, "error": "Erro interno"}
+
+
+@router.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(None),
+    text: str = Form(None),
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Enfileira um email para processamento assíncrono
+    
+    Args:
+        file: Arquivo .txt ou .pdf
+        text: Texto direto do email
+    
+    Returns:
+        202 com job_id e status_url; 429 (Retry-After) se a fila estiver cheia
+    """
+    if not services.job_service.running:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Processamento assíncrono indisponível"}
+        )
+    
+    try:
+        if file and file.filename:
+            logger.info(f"Job com arquivo: {file.filename}")
+            data = await services.file_service.read_upload(file)
+            job = await services.job_service.submit(filename=file.filename, data=data)
+        
+        elif text and text.strip():
+            content = text.strip()
+            if len(content) > settings.MAX_TEXT_LENGTH:
+                raise FileValidationError(
+                    f"Texto muito longo. Máximo: {settings.MAX_TEXT_LENGTH} caracteres"
+                )
+            job = await services.job_service.submit(text=content)
+        
+        else:
+            raise FileValidationError("Envie um arquivo ou texto")
+    
+    except FileValidationError as e:
+        logger.warning(f"Erro de validação: {e}")
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    except JobQueueFullError as e:
+        logger.warning(f"Job recusado: {e}")
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(settings.JOB_RETRY_AFTER)}
+        )
+    
+    status_url = f"/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": status_url},
+        headers={"Location": status_url}
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = 0.0,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Consulta situação e resultado de um job
+    
+    Args:
+        job_id: Identificador retornado por POST /jobs
+        wait: Segundos a aguardar pela conclusão (long-poll, máx. JOB_MAX_WAIT)
+    
+    Returns:
+        JSON com status (queued, running, done, failed), result e error
+    """
+    job = await services.job_service.get(job_id, wait)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job não encontrado ou expirado"}
+        )
+    return JSONResponse(content=job)
+
+
 @router.post("/feedback")
 async def submit_feedback(
     original_text: str = Form(...),
     predicted: str = Form(...),
     feedback_type: str = Form(...),
-    correction: str = Form(None)
+    correction: str = Form(None),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
     Recebe feedback do usuário
@@ -137,13 +486,13 @@ async def submit_feedback(
     """
     try:
         feedback_data = {
-            "original_text": original_text[:500],  # Limitar tamanho
+            "original_text": original_text[:settings.FEEDBACK_TEXT_MAX_CHARS],  # Limitar tamanho
             "predicted": predicted,
             "feedback_type": feedback_type,
             "correction": correction if feedback_type == "incorrect" else None
         }
         
-        feedback_service.save_feedback(feedback_data)
+        await services.feedback_service.save_feedback_async(feedback_data)
         
         logger.info(f"Feedback recebido: {feedback_type}")
         
@@ -160,8 +509,40 @@ async def submit_feedback(
         )
 
 
+@router.get("/feedback/recent")
+async def get_recent_feedbacks(
+    limit: int = 10,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    category: Optional[str] = None,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Lista os feedbacks mais recentes
+    
+    Args:
+        limit: Número máximo de feedbacks (1-500)
+        since: Timestamp ISO inicial (inclusivo)
+        until: Timestamp ISO final (exclusivo)
+        category: Categoria prevista (Produtivo/Improdutivo)
+    
+    Returns:
+        JSON com a lista de feedbacks
+    """
+    # Consulta SQLite síncrona fora do event loop (o lock do store fica com
+    # o writer durante o commit)
+    feedbacks = await asyncio.to_thread(
+        services.feedback_service.get_recent_feedbacks,
+        min(max(limit, 1), 500),
+        since=since,
+        until=until,
+        category=category
+    )
+    return JSONResponse(content={"feedbacks": feedbacks})
+
+
 @router.get("/metrics")
-async def get_metrics():
+async def get_metrics(services: ServiceContainer = Depends(get_services)):
     """
     Retorna métricas da aplicação
     
@@ -169,7 +550,22 @@ async def get_metrics():
         JSON com métricas
     """
     try:
-        metrics = feedback_service.get_metrics()
+        metrics = await asyncio.to_thread(services.feedback_service.get_metrics)
+        if services.result_cache is not None:
+            metrics["cache"] = services.result_cache.stats()
+        if services.similarity_index is not None:
+            metrics["similarity"] = services.similarity_index.stats()
+        metrics["jobs"] = services.job_service.stats()
+        coalescing = services.processing_service.coalescing_stats()
+        if coalescing is not None:
+            metrics["coalescing"] = coalescing
+        metrics["telemetry"] = (await _aggregated_telemetry(services)).snapshot()
+        metrics["worker"] = await _worker_info(services)
+        metrics["logging"] = logging_stats()
+        metrics["llm"] = services.ai_service.provider.stats()
+        batching = services.ai_service.batch_stats()
+        if batching is not None:
+            metrics["classification_batching"] = batching
         return JSONResponse(content=metrics)
     
     except Exception as e:
@@ -180,11 +576,62 @@ async def get_metrics():
         )
 
 
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics(services: ServiceContainer = Depends(get_services)):
+    """
+    Exporta latência por etapa, contadores e uso de tokens no formato Prometheus
+    
+    Returns:
+        Texto no formato de exposição do Prometheus
+    """
+    registry = await _aggregated_telemetry(services)
+    return PlainTextResponse(
+        registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+async def _aggregated_telemetry(services: ServiceContainer) -> Telemetry:
+    """
+    Telemetria somada de todos os workers (ou a do processo, sem SharedStore)
+    
+    O estado deste worker é publicado antes da leitura para que a resposta
+    inclua a própria requisição; os demais têm até SHARED_SYNC_INTERVAL de atraso.
+    """
+    store = services.shared_store
+    if store is None:
+        return telemetry
+    await asyncio.to_thread(store.publish_telemetry, telemetry.export_state())
+    return Telemetry.merged(await asyncio.to_thread(store.telemetry_states))
+
+
+async def _worker_info(services: ServiceContainer) -> Dict:
+    """Identificação do worker que respondeu e workers ativos da implantação"""
+    store = services.shared_store
+    if store is None:
+        return {"pid": os.getpid(), "live_workers": 1}
+    live = await asyncio.to_thread(store.live_workers, 3 * settings.SHARED_SYNC_INTERVAL)
+    return {"pid": os.getpid(), "id": store.worker_id, "live_workers": live}
+
+
 @router.get("/health")
-async def health_check():
-    """Health check para monitoramento"""
-    return JSONResponse(content={
-        "status": "ok",
-        "service": "email-classifier",
-        "version": "1.0.0"
-    })
\ No newline at end of file
+async def health_check(services: ServiceContainer = Depends(get_services)):
+    """
+    Health check para monitoramento
+    
+    Com o circuit breaker aberto em todos os endpoints de IA, o status passa a
+    "degraded" (respostas vêm das regras) e o código HTTP é
+    settings.HEALTH_DEGRADED_STATUS_CODE.
+    """
+    provider = services.ai_service.provider
+    degraded = provider.configured and not provider.available
+    
+    return JSONResponse(
+        status_code=settings.HEALTH_DEGRADED_STATUS_CODE if degraded else 200,
+        content={
+            "status": "degraded" if degraded else "ok",
+            "service": "email-classifier",
+            "version": "1.0.0",
+            "ai_circuit": provider.circuit_states()
+        }
+    )
\ No newline at end of file
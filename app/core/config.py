@@ -4,6 +4,7 @@ Configurações centralizadas da aplicação
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Any, Dict, List
 import os
 
 
@@ -11,14 +12,147 @@ class Settings(BaseSettings):
     """Configurações da aplicação"""
     
     # API Configuration
-    DEEPSEEK_API_KEY: str
+    DEEPSEEK_API_KEY: str = ""
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
     AI_MODEL: str = "deepseek-chat"
     AI_TIMEOUT: int = 30
+    AI_MAX_RETRIES: int = 2
+    
+    # Modo de chamada: "two_call" (classificação + resposta) ou "combined" (JSON único)
+    AI_MODE: str = "two_call"
+    # Fallback do modo combinado em saída malformada: "two_call" ou "rules"
+    AI_COMBINED_FALLBACK: str = "two_call"
+    
+    # Pool de conexões e concorrência do cliente assíncrono
+    AI_MAX_CONCURRENT_REQUESTS: int = 200
+    AI_MAX_CONNECTIONS: int = 200
+    AI_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    AI_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Classificação em lote: agrupa até N emails recebidos em até MAX_WAIT segundos (1 = desativada)
+    AI_BATCH_MAX_ITEMS: int = 16
+    AI_BATCH_MAX_WAIT: float = 0.005
+    
+    # Endpoints OpenAI-compatíveis (JSON): [{"name", "base_url", "api_key", "model", "weight"}]
+    # Campos omitidos usam DEEPSEEK_BASE_URL/DEEPSEEK_API_KEY/AI_MODEL; vazio = um endpoint DeepSeek
+    LLM_ENDPOINTS: List[Dict[str, Any]] = []
+    # Hedge: segunda requisição a outro endpoint quando o primário passa do quantil de latência
+    LLM_HEDGING_ENABLED: bool = True
+    LLM_HEDGE_QUANTILE: float = 0.95
+    LLM_HEDGE_DELAY: float = 2.0  # atraso usado enquanto não há amostras suficientes
+    LLM_HEDGE_MIN_DELAY: float = 0.1
+    LLM_HEDGE_MAX_RATIO: float = 0.1  # fração máxima de requisições com hedge
+    LLM_STATS_WINDOW: int = 200
+    
+    # Circuit breaker por endpoint: abre com muitas falhas/lentidão e recorre ao fallback
+    AI_BREAKER_ENABLED: bool = True
+    AI_BREAKER_WINDOW: int = 20
+    AI_BREAKER_MIN_CALLS: int = 10
+    AI_BREAKER_FAILURE_RATE: float = 0.5
+    AI_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    AI_BREAKER_SLOW_CALL_RATE: float = 0.5
+    AI_BREAKER_OPEN_SECONDS: float = 30.0
+    AI_BREAKER_HALF_OPEN_PROBES: int = 2
+    # Status HTTP de /health com todos os circuitos abertos (ex.: 503 para o balanceador)
+    HEALTH_DEGRADED_STATUS_CODE: int = 200
+    
+    # Compactação dos emails enviados à IA (histórico, assinaturas, avisos legais)
+    # Orçamentos em tokens estimados (~4 caracteres por token)
+    COMPACTION_ENABLED: bool = True
+    COMPACTION_CLASSIFY_MAX_TOKENS: int = 300
+    COMPACTION_RESPONSE_MAX_TOKENS: int = 200
+    
+    # Banco de respostas prontas (categorias atendidas sem geração pela IA).
+    # No AI_MODE "combined" a resposta pronta substitui a gerada, mas os tokens
+    # da resposta já foram gastos na chamada única; economia total só em "two_call"
+    REPLY_POOL_ENABLED: bool = True
+    REPLY_POOL_CATEGORIES: List[str] = ["Improdutivo"]
+    REPLY_POOL_FILE: str = "data/reply_pool.json"  # gerado por python -m app.services.reply_pool
+    
+    # Processos usados por TextProcessor.preprocess_many (0/1 = sem paralelismo)
+    TEXT_PROCESS_WORKERS: int = 0
+    
+    # Classificador local (primeira camada antes da IA remota)
+    LOCAL_MODEL_ENABLED: bool = True
+    LOCAL_MODEL_FILE: str = "data/local_model.json"
+    LOCAL_MODEL_THRESHOLD: float = 0.9
+    LOCAL_MODEL_MIN_SAMPLES: int = 20
+    LOCAL_MODEL_RELOAD_INTERVAL: float = 5.0
+    # Fração do feedback separada para calibrar a confiança (sem calibração o
+    # modelo não dispensa a IA)
+    LOCAL_MODEL_CALIBRATION_FRACTION: float = 0.2
+    LOCAL_MODEL_MIN_CALIBRATION: int = 10
+    
+    # Cache de resultados (memória LRU + SQLite opcional; "" desativa o disco)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_TTL: int = 7 * 24 * 3600  # 7 dias
+    CACHE_DB_FILE: str = "data/cache.db"
+    
+    # Agrupa requisições simultâneas com o mesmo conteúdo em uma única execução
+    COALESCE_ENABLED: bool = True
+    
+    # Índice de quase-duplicatas (MinHash/LSH) para emails gerados por modelo
+    SIMILARITY_ENABLED: bool = True
+    SIMILARITY_THRESHOLD: float = 0.8  # similaridade de Jaccard estimada
+    # True também reutiliza a resposta (pode conter nome/protocolo de outro cliente)
+    SIMILARITY_REUSE_RESPONSE: bool = False
+    SIMILARITY_NUM_PERM: int = 128
+    SIMILARITY_BANDS: int = 32
+    SIMILARITY_MAX_ENTRIES: int = 5000
+    SIMILARITY_TTL: int = 7 * 24 * 3600  # 7 dias
+    SIMILARITY_DB_FILE: str = "data/similarity.db"
+    
+    # Extração de PDF em pool de processos
+    PDF_WORKERS: int = 2
+    PDF_PAGES_PER_TASK: int = 8
+    PDF_WORKER_MAX_DOCS: int = 200
+    PDF_WORKER_MAX_RSS_MB: int = 512
+    PDF_EXTRACTION_TIMEOUT: float = 20.0
+    
+    # Processamento em lote (/process/batch)
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_CONCURRENCY: int = 16
+    BATCH_MAX_BYTES: int = 64 * 1024 * 1024  # corpo JSONL (em arquivo temporário)
+    BATCH_JSON_MAX_BYTES: int = 2 * 1024 * 1024  # array JSON (lido inteiro); lotes maiores em JSONL
+    
+    # Jobs assíncronos (/jobs): fila limitada, workers e retenção dos resultados
+    JOB_WORKERS: int = 8
+    JOB_QUEUE_SIZE: int = 1000
+    JOB_MAX_STORED: int = 10000
+    JOB_RESULT_TTL: int = 15 * 60  # 15 minutos
+    JOB_MAX_WAIT: float = 30.0  # long-poll máximo em GET /jobs/{id}?wait=
+    JOB_RETRY_AFTER: int = 5  # Retry-After (segundos) quando a fila está cheia
+    JOB_SHUTDOWN_TIMEOUT: float = 20.0  # espera pelos jobs pendentes ao encerrar
+    
+    # Workers do gunicorn (definido por gunicorn.conf.py, que lê WEB_WORKERS,
+    # WEB_MAX_REQUESTS, WEB_MAX_REQUESTS_JITTER, WEB_GRACEFUL_TIMEOUT e WEB_TIMEOUT)
+    WEB_CONCURRENCY: int = 1
+    
+    # Estado compartilhado entre workers (telemetria e jobs); "" desativa
+    # (processo único). gunicorn.conf.py usa data/shared.db com WEB_WORKERS > 1
+    SHARED_DB_FILE: str = ""
+    SHARED_SYNC_INTERVAL: float = 2.0
+    
+    # Logging: fila + thread de escrita (LOG_ASYNC), formato "text" ou "json",
+    # rotação "daily", "size" ou "none" e amostragem por nível ({"INFO": 0.1})
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    LOG_ASYNC: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    # "" desativa; {pid} = um arquivo por processo (padrão com WEB_CONCURRENCY > 1)
+    LOG_FILE: str = "logs/app.log"
+    LOG_ROTATION: str = "daily"
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 14
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
     
     # File Upload Limits
     MAX_FILE_SIZE: int = 2 * 1024 * 1024  # 2MB
     MAX_TEXT_LENGTH: int = 10000
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    # Caracteres extraídos de uploads para classificação (0 = arquivo inteiro)
+    EXTRACTION_BUDGET_CHARS: int = 8000
     ALLOWED_EXTENSIONS: set = {".txt", ".pdf"}
     ALLOWED_MIME_TYPES: set = {"text/plain", "application/pdf"}
     
@@ -26,6 +160,18 @@ class Settings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     UPLOAD_DIR: str = "uploads"
     FEEDBACK_FILE: str = "data/feedback.csv"
+    FEEDBACK_TEXT_MAX_CHARS: int = 500  # texto guardado (e usado pelo modelo local)
+    FEEDBACK_DB_FILE: str = "data/feedback.db"
+    FEEDBACK_BACKEND: str = "sqlite"  # "sqlite" ou "csv" (legado)
+    
+    # Gravação de feedback em segundo plano (commit em grupo)
+    FEEDBACK_WRITE_BEHIND: bool = True
+    FEEDBACK_FLUSH_INTERVAL: float = 0.05
+    FEEDBACK_BATCH_SIZE: int = 500
+    FEEDBACK_QUEUE_SIZE: int = 10000
+    RULES_FILE: str = os.path.join(BASE_DIR, "resources", "keyword_rules.json")
+    STOPWORDS_FILE: str = os.path.join(BASE_DIR, "resources", "stopwords_pt.txt")
+    REPLY_POOL_SEED_FILE: str = os.path.join(BASE_DIR, "resources", "reply_pool.json")
     
     # Application
     APP_NAME: str = "Email Assistant"
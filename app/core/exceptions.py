@@ -18,6 +18,16 @@ class AIServiceError(EmailProcessingError):
     pass
 
 
+class CircuitOpenError(AIServiceError):
+    """Chamada recusada: circuit breaker aberto"""
+    pass
+
+
+class JobQueueFullError(EmailProcessingError):
+    """Job recusado: fila de processamento cheia"""
+    pass
+
+
 class TextProcessingError(EmailProcessingError):
     """Erro no processamento de texto"""
     pass
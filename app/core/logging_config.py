@@ -1,54 +1,246 @@
 """
 Configuração de logging profissional
+
+Por padrão (settings.LOG_ASYNC) o logger só enfileira os registros: a
+formatação e a escrita em console/arquivo ficam com uma thread de fundo
+(QueueListener, iniciada no primeiro registro de cada processo), sem custo
+de I/O no loop de eventos. Registros incluem o
+identificador da requisição (request_id, definido pelo TelemetryMiddleware)
+e podem ser amostrados por nível (settings.LOG_SAMPLE_RATES).
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
-from datetime import datetime
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from app.core.config import settings
+
+# Identificador da requisição em andamento (anexado a cada registro)
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_stats = {"sampled_out": 0, "dropped": 0}
+
+# Saídas do processo atual (ver _process_outputs)
+_state: Optional[Dict] = None
+_state_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Anexa o request_id e aplica a amostragem por nível
+    
+    Roda na thread que emitiu o registro (onde o contexto da requisição está
+    visível), antes do enfileiramento. Registros com extra={"sample": False}
+    nunca são descartados.
+    """
+    
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.sample_rates = {
+            logging.getLevelName(level.upper()): rate
+            for level, rate in (sample_rates or {}).items()
+        }
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.sample_rates.get(record.levelno)
+        if rate is not None and rate < 1.0 and getattr(record, "sample", True) and random.random() >= rate:
+            _stats["sampled_out"] += 1
+            return False
+        record.request_id = request_id.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """TEXT_FORMAT; "-" no request_id de registros fora de uma requisição"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
 
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha (campos fixos + exceção, se houver)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "pid": record.process,
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
-def setup_logging(level: str = "INFO") -> logging.Logger:
+
+class _ProcessHandler(logging.Handler):
+    """
+    Encaminha os registros às saídas do processo atual
+    
+    As saídas (console, arquivo e, com LOG_ASYNC, a fila + thread do
+    listener) são criadas no primeiro registro de cada processo: um worker
+    criado por fork não herda um listener sem thread nem o arquivo (e o
+    {pid}) do processo pai. Com a fila cheia o registro é descartado e
+    contabilizado, em vez de bloquear quem está logando.
+    """
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        state = _process_outputs()
+        if state["queue"] is None:
+            for handler in state["handlers"]:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        
+        # Sem formatação aqui: o listener formata na sua thread
+        try:
+            state["queue"].put_nowait(record)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+
+def _log_file_path() -> str:
+    """LOG_FILE com {pid}; com vários workers e sem {pid}, um arquivo por processo"""
+    path = settings.LOG_FILE
+    if "{pid}" not in path and settings.WEB_CONCURRENCY > 1:
+        root, extension = os.path.splitext(path)
+        path = f"{root}_{{pid}}{extension}"
+    return path.format(pid=os.getpid())
+
+
+def _file_handler(path: str) -> Optional[logging.Handler]:
+    """Handler de arquivo com rotação diária ("daily"), por tamanho ("size") ou sem ("none")"""
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        rotation = settings.LOG_ROTATION.lower()
+        if rotation == "daily":
+            return logging.handlers.TimedRotatingFileHandler(
+                path, when="midnight", backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        if rotation == "size":
+            return logging.handlers.RotatingFileHandler(
+                path, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+        return logging.FileHandler(path, encoding="utf-8")
+    except Exception:
+        return None  # Se não conseguir criar arquivo, continua só com console
+
+
+def _process_outputs() -> Dict:
+    """Saídas do processo atual, criadas sob demanda (uma vez por processo)"""
+    global _state
+    state = _state
+    if state is not None and state["pid"] == os.getpid():
+        return state
+    
+    with _state_lock:
+        if _state is not None and _state["pid"] == os.getpid():
+            return _state
+        
+        # Formato do log
+        if settings.LOG_FORMAT.lower() == "json":
+            formatter: logging.Formatter = JsonFormatter()
+        else:
+            formatter = TextFormatter(fmt=TEXT_FORMAT, datefmt=DATE_FORMAT)
+        
+        # Handlers de saída: console e arquivo (opcional)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if settings.LOG_FILE:
+            file_handler = _file_handler(_log_file_path())
+            if file_handler is not None:
+                handlers.append(file_handler)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        state = {"pid": os.getpid(), "handlers": handlers, "queue": None, "listener": None}
+        if settings.LOG_ASYNC:
+            state["queue"] = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+            state["listener"] = logging.handlers.QueueListener(
+                state["queue"], *handlers, respect_handler_level=True
+            )
+            state["listener"].start()
+        
+        _state = state
+        return state
+
+
+def _after_fork_in_child() -> None:
+    """O filho não tem a thread do listener: as saídas são recriadas no primeiro registro"""
+    global _state, _state_lock
+    _state = None
+    _state_lock = threading.Lock()
+
+
+def setup_logging(level: Optional[str] = None) -> logging.Logger:
     """
     Configura sistema de logging
     
     Args:
-        level: Nível de log (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        level: Nível de log (DEBUG, INFO, WARNING, ERROR, CRITICAL);
+            padrão settings.LOG_LEVEL
     
     Returns:
         Logger configurado
     """
-    
     # Criar logger
     logger = logging.getLogger("email_assistant")
-    logger.setLevel(getattr(logging, level.upper()))
+    logger.setLevel(getattr(logging, (level or settings.LOG_LEVEL).upper()))
     
     # Evitar duplicação de handlers
     if logger.handlers:
         return logger
     
-    # Formato do log
-    formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Amostragem e request_id no logger: executados na thread de origem
+    logger.addFilter(RequestContextFilter(settings.LOG_SAMPLE_RATES))
+    logger.addHandler(_ProcessHandler())
     
-    # Handler para console
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # Handler para arquivo (opcional)
-    try:
-        file_handler = logging.FileHandler(
-            f'logs/app_{datetime.now().strftime("%Y%m%d")}.log'
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    except Exception:
-        pass  # Se não conseguir criar arquivo, continua só com console
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+    atexit.register(shutdown_logging)
     
     return logger
 
 
+def shutdown_logging() -> None:
+    """Escreve os registros pendentes e encerra a thread do listener"""
+    global _state
+    state = _state
+    if state is None or state["pid"] != os.getpid():
+        return
+    _state = None
+    if state["listener"] is not None:
+        state["listener"].stop()
+    for handler in state["handlers"]:
+        handler.close()
+
+
+def logging_stats() -> Dict:
+    """Registros descartados por amostragem/fila cheia e tamanho atual da fila"""
+    state = _state
+    return {
+        **_stats,
+        "queued": state["queue"].qsize() if state is not None and state["queue"] is not None else 0,
+        "async": settings.LOG_ASYNC
+    }
+
+
 # Instância global do logger
-logger = setup_logging()
\ No newline at end of file
+logger = setup_logging()
@@ -0,0 +1,314 @@
+"""
+Telemetria em memória: latência por etapa, contadores e uso de tokens
+
+Os valores ficam em estruturas simples protegidas por um lock (custo de
+poucos microssegundos por observação) e são exportados no formato texto do
+Prometheus por /metrics/prometheus. Com vários processos, cada worker publica
+seu estado (export_state) no SharedStore e as rotas exibem a soma
+(Telemetry.merged).
+"""
+
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.logging_config import request_id
+
+# Limites superiores (segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Métodos de classificação considerados fallback
+FALLBACK_METHODS = ("rule-based",)
+
+# Instante (perf_counter) em que a requisição atual chegou ao servidor
+request_started: ContextVar[Optional[float]] = ContextVar("request_started", default=None)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histograma cumulativo com buckets fixos"""
+    
+    __slots__ = ("bounds", "counts", "sum", "count")
+    
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # último bucket: +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """Estima o quantil por interpolação linear dentro do bucket"""
+        if not self.count:
+            return 0.0
+        
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index else 0.0
+                if index == len(self.bounds):
+                    return lower  # acima do maior bucket
+                upper = self.bounds[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class Telemetry:
+    """Registro de métricas da aplicação"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Labels, Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+    
+    def observe(self, stage: str, seconds: float) -> None:
+        """Registra a duração de uma etapa"""
+        key = (("stage", stage),)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+    
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Incrementa um contador"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Mede a etapa; exceções contam como erro da etapa e são propagadas"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+    
+    def record_usage(self, call: str, usage) -> None:
+        """Contabiliza tokens de entrada e saída de uma chamada à IA"""
+        if usage is None:
+            return
+        self.inc("llm_calls_total", call=call)
+        self.inc("llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, call=call, direction="in")
+        self.inc("llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0, call=call, direction="out")
+    
+    def record_classification(self, method: str) -> None:
+        """Contabiliza o método que produziu a classificação"""
+        self.inc("classifications_total", method=method)
+    
+    def snapshot(self) -> Dict:
+        """Resumo em JSON (quantis por etapa, taxas e tokens)"""
+        with self._lock:
+            histograms = {dict(k)["stage"]: h for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+        
+        latency = {
+            stage: {
+                "count": h.count,
+                "avg": round(h.sum / h.count, 6) if h.count else 0.0,
+                **{f"p{int(q * 100)}": round(h.quantile(q), 6) for q in QUANTILES}
+            }
+            for stage, h in sorted(histograms.items())
+        }
+        
+        tokens: Dict[str, Dict[str, int]] = {}
+        for (name, labels), value in counters.items():
+            if name == "llm_tokens_total":
+                labels_dict = dict(labels)
+                tokens.setdefault(labels_dict["call"], {})[labels_dict["direction"]] = int(value)
+        
+        return {
+            "latency_seconds": latency,
+            "fallback_rate": round(self._fallback_rate(counters), 4),
+            "error_rate": round(self._error_rate(counters), 4),
+            "tokens": tokens
+        }
+    
+    def render_prometheus(self, prefix: str = "email_assistant") -> str:
+        """Exporta as métricas no formato texto do Prometheus"""
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count, h) for k, h in sorted(self._histograms.items())]
+            counters = sorted(self._counters.items())
+        
+        lines: List[str] = []
+        
+        name = f"{prefix}_stage_latency_seconds"
+        lines += [f"# HELP {name} Latência por etapa", f"# TYPE {name} histogram"]
+        for labels, counts, total, count, _ in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        
+        name = f"{prefix}_stage_latency_quantile_seconds"
+        lines += [f"# HELP {name} Quantis estimados a partir dos buckets", f"# TYPE {name} gauge"]
+        for labels, _, _, _, histogram in histograms:
+            for q in QUANTILES:
+                lines.append(
+                    f"{name}{_format_labels(labels + (('quantile', str(q)),))} {histogram.quantile(q)}"
+                )
+        
+        declared = set()
+        for (counter, labels), value in counters:
+            name = f"{prefix}_{counter}"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        
+        counters_dict = dict(counters)
+        for gauge, value in (
+            ("fallback_ratio", self._fallback_rate(counters_dict)),
+            ("error_ratio", self._error_rate(counters_dict))
+        ):
+            name = f"{prefix}_{gauge}"
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        
+        return "\n".join(lines) + "\n"
+    
+    def export_state(self) -> Dict:
+        """Estado serializável em JSON (contadores e buckets dos histogramas)"""
+        with self._lock:
+            return {
+                "histograms": [
+                    [list(labels), list(h.counts), h.sum, h.count]
+                    for labels, h in self._histograms.items()
+                ],
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ]
+            }
+    
+    def merge_state(self, state: Dict) -> None:
+        """Soma um estado gerado por export_state (ex.: de outro processo)"""
+        with self._lock:
+            for labels, counts, total, count in state["histograms"]:
+                key = tuple(tuple(pair) for pair in labels)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+            
+            for name, labels, value in state["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+    
+    @classmethod
+    def merged(cls, states: Iterable[Dict]) -> "Telemetry":
+        """Registro com a soma dos estados (snapshot/render_prometheus agregados)"""
+        registry = cls()
+        for state in states:
+            registry.merge_state(state)
+        return registry
+    
+    def reset(self) -> None:
+        """Descarta todas as observações"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+    
+    @staticmethod
+    def _fallback_rate(counters: Dict) -> float:
+        total = fallback = 0.0
+        for (name, labels), value in counters.items():
+            if name == "classifications_total":
+                total += value
+                if dict(labels)["method"].endswith(FALLBACK_METHODS):
+                    fallback += value
+        return fallback / total if total else 0.0
+    
+    @staticmethod
+    def _error_rate(counters: Dict) -> float:
+        total = errors = 0.0
+        for (name, labels), value in counters.items():
+            if name == "http_requests_total":
+                total += value
+                if dict(labels)["status"].startswith("5"):
+                    errors += value
+        return errors / total if total else 0.0
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class TelemetryMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP
+    
+    Registra a etapa "request" e o contador http_requests_total por endpoint
+    e status, e marca o início da requisição (request_started) para que as
+    rotas meçam o tempo de recebimento/parsing do upload.
+    
+    Também define o request_id dos logs (cabeçalho X-Request-ID recebido ou
+    gerado), devolvido no cabeçalho X-Request-ID da resposta.
+    """
+    
+    def __init__(self, app, telemetry_registry: Optional[Telemetry] = None):
+        self.app = app
+        self.telemetry = telemetry_registry or telemetry
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        token = request_started.set(started)
+        status = "500"
+        
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"")[:64].decode("latin-1")
+        current_id = incoming or uuid.uuid4().hex[:16]
+        id_token = request_id.set(current_id)
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                message.setdefault("headers", []).append((b"x-request-id", current_id.encode("latin-1")))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_started.reset(token)
+            request_id.reset(id_token)
+            # Rótulo pelo endpoint (não pelo path) para manter a cardinalidade fixa
+            endpoint = getattr(scope.get("endpoint"), "__name__", "other")
+            self.telemetry.observe("request", time.perf_counter() - started)
+            self.telemetry.inc("http_requests_total", endpoint=endpoint, status=status)
+
+
+# Instância global
+telemetry = Telemetry()
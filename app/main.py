@@ -2,6 +2,13 @@
 Aplicação FastAPI principal
 """
 
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,12 +16,48 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import router
 from app.core.config import settings
 from app.core.logging_config import logger
+from app.core.telemetry import TelemetryMiddleware
+from app.services import ServiceContainer
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Constrói os serviços na inicialização e os libera no encerramento"""
+    started = time.perf_counter()
+    
+    services = ServiceContainer()
+    await services.start()
+    app.state.services = services
+    
+    # SDK da IA importado em background para não atrasar o startup
+    warm_up = asyncio.get_running_loop().run_in_executor(None, services.ai_service.warm_up)
+    
+    logger.info(f"{settings.APP_NAME} v{settings.APP_VERSION} iniciado")
+    logger.info(f"Ambiente: {'DEBUG' if settings.DEBUG else 'PRODUCTION'}")
+    logger.info(
+        f"Tempo de import: {IMPORT_SECONDS:.3f}s | "
+        f"startup: {time.perf_counter() - started:.3f}s"
+    )
+    
+    yield
+    
+    try:
+        await warm_up
+    except Exception as e:
+        logger.warning(f"Falha ao pré-carregar cliente da IA: {e}")
+    
+    await services.aclose()
+    logger.info("Aplicação encerrada")
+
 
 # Criar aplicação
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="Sistema inteligente de classificação de emails"
+    description="Sistema inteligente de classificação de emails",
+    lifespan=lifespan
 )
 
 # CORS (se necessário para frontend separado)
@@ -26,22 +69,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latência e contadores por requisição (/metrics/prometheus)
+app.add_middleware(TelemetryMiddleware)
+
 # Arquivos estáticos
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Rotas
 app.include_router(router)
 
-# Eventos de inicialização
-@app.on_event("startup")
-async def startup_event():
-    logger.info(f"{settings.APP_NAME} v{settings.APP_VERSION} iniciado")
-    logger.info(f"Ambiente: {'DEBUG' if settings.DEBUG else 'PRODUCTION'}")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Aplicação encerrada")
-
 
 if __name__ == "__main__":
     import uvicorn
@@ -6,10 +6,32 @@ from .ai_service import AIService
 from .file_service import FileService
 from .feedback_service import FeedbackService
 from .text_processor import TextProcessor
+from .email_compactor import EmailCompactor
+from .rule_engine import RuleEngine
+from .local_classifier import LocalClassifier
+from .llm_provider import LLMProvider
+from .reply_pool import ReplyPool
+from .cache_service import ResultCache
+from .similarity_index import SimilarityIndex
+from .processing_service import ProcessingService
+from .job_service import JobService
+from .shared_store import SharedStore
+from .container import ServiceContainer
 
 __all__ = [
     "AIService",
     "FileService",
     "FeedbackService",
-    "TextProcessor"
+    "TextProcessor",
+    "EmailCompactor",
+    "RuleEngine",
+    "LocalClassifier",
+    "LLMProvider",
+    "ReplyPool",
+    "ResultCache",
+    "SimilarityIndex",
+    "ProcessingService",
+    "JobService",
+    "SharedStore",
+    "ServiceContainer"
 ]
\ No newline at end of file
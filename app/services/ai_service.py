@@ -3,28 +3,109 @@ Serviço de IA para classificação e geração de respostas
 """
 
 import asyncio
-from typing import Tuple
-from openai import OpenAI
+import json
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.core.config import settings
-from app.core.exceptions import AIServiceError
+from app.core.exceptions import CircuitOpenError
 from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.email_compactor import EmailCompactor
+from app.services.llm_provider import LLMProvider
+from app.services.local_classifier import LocalClassifier
+from app.services.reply_pool import ReplyPool
+from app.services.rule_engine import RuleEngine
+from app.utils.concurrency import MicroBatcher
+
+
+CATEGORIES = ["Produtivo", "Improdutivo"]
+
+# Incrementar ao alterar prompts (invalida resultados em cache)
+PROMPT_VERSION = "2"
+
+CLASSIFICATION_CRITERIA = """
+**PRODUTIVO**: Emails que requerem ação ou resposta
+- Solicitações de suporte técnico
+- Dúvidas sobre processos ou sistemas
+- Atualizações sobre casos/requisições em andamento
+- Pedidos de documentos ou informações
+- Questões relacionadas a transações financeiras
+
+**IMPRODUTIVO**: Emails que não requerem ação imediata
+- Felicitações (aniversário, natal, etc)
+- Mensagens de agradecimento genéricas
+- Promoções comerciais
+- Spam ou correntes
+- Mensagens pessoais sem relação com trabalho
+"""
+
+PRODUTIVO_RESPONSE_GUIDELINES = """
+O email é PRODUTIVO (requer ação). Gere uma resposta formal que:
+- Agradeça o contato
+- Confirme o recebimento da solicitação
+- Informe que a equipe irá analisar e responder em breve
+- Seja educada e profissional
+"""
+
+IMPRODUTIVO_RESPONSE_GUIDELINES = """
+O email é IMPRODUTIVO (mensagem cordial). Gere uma resposta breve que:
+- Agradeça a mensagem
+- Seja cordial e amigável
+- Mantenha formalidade corporativa
+"""
+
+# Linha de resposta da classificação em lote ("3: Improdutivo")
+_BATCH_ANSWER_RE = re.compile(r"^\W*(?:email\s*)?(\d+)\W+(produtivo|improdutivo)\b", re.IGNORECASE | re.MULTILINE)
 
 
 class AIService:
     """Serviço para interação com API de IA (DeepSeek)"""
     
-    def __init__(self):
-        """Inicializa cliente da API"""
-        if not settings.DEEPSEEK_API_KEY:
-            raise AIServiceError("DEEPSEEK_API_KEY não configurada")
+    def __init__(
+        self,
+        local_classifier: Optional[LocalClassifier] = None,
+        rule_engine: Optional[RuleEngine] = None,
+        provider: Optional[LLMProvider] = None,
+        compactor: Optional[EmailCompactor] = None,
+        reply_pool: Optional[ReplyPool] = None
+    ):
+        """
+        Inicializa o serviço (os clientes da API são criados sob demanda)
+        
+        Args:
+            local_classifier: Classificador local consultado antes da IA (opcional)
+            rule_engine: Motor de regras do fallback (padrão: settings.RULES_FILE)
+            provider: Endpoints de LLM (padrão: settings.LLM_ENDPOINTS)
+            compactor: Compactação do email nos prompts (padrão: EmailCompactor)
+            reply_pool: Respostas prontas para as categorias que atende (opcional)
+        """
+        # Clientes criados sob demanda (o SDK openai é pesado para importar)
+        self.provider = provider or LLMProvider.from_settings()
+        
+        if not self.provider.configured:
+            logger.warning("DEEPSEEK_API_KEY não configurada: usando apenas classificação por regras")
         
-        self.client = OpenAI(
-            api_key=settings.DEEPSEEK_API_KEY,
-            base_url=settings.DEEPSEEK_BASE_URL
+        self.local_classifier = local_classifier
+        self.rule_engine = rule_engine or RuleEngine()
+        self.compactor = compactor or EmailCompactor()
+        self.reply_pool = reply_pool
+        
+        # Criado sob demanda para ficar associado ao event loop em execução
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Classificações simultâneas agrupadas em uma única chamada (ver _classify_batch)
+        self._batcher: Optional[MicroBatcher[str, Optional[Tuple[str, float, str]]]] = (
+            MicroBatcher("classify", self._classify_batch, settings.AI_BATCH_MAX_ITEMS, settings.AI_BATCH_MAX_WAIT)
+            if settings.AI_BATCH_MAX_ITEMS > 1 else None
         )
         
         logger.info("AIService inicializado com sucesso")
     
+    def warm_up(self) -> None:
+        """Importa o SDK e cria os clientes antecipadamente (ex.: em background)"""
+        self.provider.warm_up()
+    
     def classify_email(self, text: str) -> Tuple[str, float, str]:
         """
         Classifica email em Produtivo ou Improdutivo
@@ -35,38 +116,25 @@ class AIService:
         Returns:
             Tupla (categoria, confiança, método)
         """
-        prompt = self._build_classification_prompt(text)
+        local_result = self._classify_local(text)
+        if local_result:
+            return local_result
+        
+        # Sem chave de API: apenas regras (sem chamadas nem circuit breaker)
+        if not self.provider.configured:
+            return self._classify_fallback(text)
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um classificador especializado em emails corporativos do setor financeiro. Responda APENAS com 'Produtivo' ou 'Improdutivo'."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            response = self._create_completion(
+                "classify",
+                messages=self._classification_messages(text),
                 temperature=0.1,
                 max_tokens=10
             )
-            
-            category = response.choices[0].message.content.strip()
-            
-            # Validar resposta
-            if category not in ["Produtivo", "Improdutivo"]:
-                logger.warning(f"Resposta inesperada da IA: {category}")
-                # Fallback para classificação baseada em regras
-                return self._classify_fallback(text)
-            
-            logger.info(f"Email classificado como: {category}")
-            return category, 0.85, "deepseek"
+            return self._parse_classification(response.choices[0].message.content, text)
         
         except Exception as e:
-            logger.error(f"Erro na classificação via IA: {e}")
+            self._log_ai_error("Erro na classificação via IA", e)
             # Fallback
             return self._classify_fallback(text)
     
@@ -81,21 +149,17 @@ class AIService:
         Returns:
             Resposta sugerida
         """
-        prompt = self._build_response_prompt(category, text)
+        pooled = self._pooled_response(category, text)
+        if pooled is not None:
+            return pooled
+        
+        if not self.provider.configured:
+            return self._get_default_response(category)
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AI_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um assistente de uma grande empresa do setor financeiro. Gere respostas formais, educadas e profissionais."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+            response = self._create_completion(
+                "respond",
+                messages=self._response_messages(category, text),
                 temperature=0.7,
                 max_tokens=300
             )
@@ -105,61 +169,485 @@ class AIService:
             return generated_response
         
         except Exception as e:
-            logger.error(f"Erro ao gerar resposta via IA: {e}")
+            self._log_ai_error("Erro ao gerar resposta via IA", e)
             # Resposta padrão em caso de erro
             return self._get_default_response(category)
     
+    async def classify_email_async(self, text: str, use_local: bool = True) -> Tuple[str, float, str]:
+        """
+        Versão assíncrona de classify_email (não bloqueia o event loop)
+        
+        Args:
+            text: Conteúdo do email
+            use_local: Consultar o classificador local antes da IA
+        
+        Returns:
+            Tupla (categoria, confiança, método)
+        """
+        local_result = self._classify_local(text) if use_local else None
+        if local_result:
+            return local_result
+        
+        if not self.provider.configured:
+            return self._classify_fallback(text)
+        
+        try:
+            if self._batcher is not None:
+                result = await self._batcher.submit(text)
+                if result is not None:
+                    return result
+                # Item sem resposta válida no lote: nova tentativa individual
+                telemetry.inc("classification_batch_retries_total")
+            
+            return await self._classify_remote(text)
+        
+        except Exception as e:
+            self._log_ai_error("Erro na classificação via IA", e)
+            return self._classify_fallback(text)
+    
+    async def generate_response_async(self, category: str, text: str) -> str:
+        """
+        Versão assíncrona de generate_response (não bloqueia o event loop)
+        
+        Args:
+            category: Categoria do email (Produtivo/Improdutivo)
+            text: Conteúdo original do email
+        
+        Returns:
+            Resposta sugerida
+        """
+        response_text, _ = await self._respond_async(category, text)
+        return response_text
+    
+    async def analyze_email_async(self, text: str) -> Tuple[str, float, str, str, bool]:
+        """
+        Classifica o email e gera a resposta conforme settings.AI_MODE
+        
+        Args:
+            text: Conteúdo do email
+        
+        Returns:
+            Tupla (categoria, confiança, método, resposta, resposta_padrao), em
+            que resposta_padrao indica que a geração falhou e a resposta é a
+            de _get_default_response
+        """
+        # Com o modelo local confiante, só a resposta depende da IA
+        local_result = self._classify_local(text)
+        if local_result:
+            category, confidence, method = local_result
+        elif settings.AI_MODE == "combined":
+            return await self.classify_and_respond_async(text)
+        else:
+            category, confidence, method = await self.classify_email_async(text, use_local=False)
+        
+        response_text, default_response = await self._respond_async(category, text)
+        return category, confidence, method, response_text, default_response
+    
+    async def classify_and_respond_async(self, text: str) -> Tuple[str, float, str, str, bool]:
+        """
+        Classifica e gera resposta em uma única chamada estruturada (JSON)
+        
+        Se a saída vier malformada, recorre ao fluxo de duas chamadas ou às
+        regras, conforme settings.AI_COMBINED_FALLBACK.
+        
+        Args:
+            text: Conteúdo do email
+        
+        Returns:
+            Tupla (categoria, confiança, método, resposta, resposta_padrao)
+        """
+        if not self.provider.configured:
+            category, confidence, method = self._classify_fallback(text)
+            return category, confidence, method, self._get_default_response(category), True
+        
+        try:
+            response = await self._create_completion_async(
+                "combined",
+                messages=self._combined_messages(text),
+                temperature=0.3,
+                max_tokens=400,
+                response_format={"type": "json_object"}
+            )
+            
+            result = self._parse_combined(response.choices[0].message.content)
+            if result:
+                category, confidence, method, response_text = result
+                logger.info(f"Email classificado e respondido (combinado): {category}")
+                # Categorias do banco de respostas usam a resposta pronta
+                pooled = self._pooled_response(category, text)
+                return category, confidence, method, pooled if pooled is not None else response_text, False
+            
+            logger.warning("Saída combinada inválida, usando fallback")
+        
+        except Exception as e:
+            self._log_ai_error("Erro na chamada combinada via IA", e)
+        
+        if settings.AI_COMBINED_FALLBACK == "rules":
+            category, confidence, method = self._classify_fallback(text)
+            return category, confidence, method, self._get_default_response(category), True
+        
+        category, confidence, method = await self.classify_email_async(text)
+        response_text, default_response = await self._respond_async(category, text)
+        return category, confidence, method, response_text, default_response
+    
+    async def stream_response_async(self, category: str, text: str) -> AsyncIterator[str]:
+        """
+        Gera a resposta em streaming, entregando os trechos à medida que chegam
+        
+        Erros são propagados para que o chamador decida o fallback
+        (ex.: _get_default_response) conforme o ponto em que o stream falhou.
+        
+        Args:
+            category: Categoria do email (Produtivo/Improdutivo)
+            text: Conteúdo original do email
+        
+        Yields:
+            Trechos de texto da resposta
+        """
+        pooled = self._pooled_response(category, text)
+        if pooled is not None:
+            yield pooled
+            return
+        
+        if not self.provider.configured:
+            yield self._get_default_response(category)
+            return
+        
+        self._check_circuit()
+        
+        waited = time.perf_counter()
+        async with self._get_semaphore():
+            started = time.perf_counter()
+            telemetry.observe("llm_wait", started - waited)
+            
+            try:
+                stream = await self.provider.open_stream(
+                    "stream",
+                    messages=self._response_messages(category, text),
+                    temperature=0.7,
+                    max_tokens=300,
+                    stream_options={"include_usage": True}
+                )
+                
+                async for chunk in stream:
+                    # O último chunk traz apenas o uso de tokens
+                    if chunk.usage is not None:
+                        telemetry.record_usage("stream", chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            
+            except Exception:
+                telemetry.inc("stage_errors_total", stage="stream")
+                raise
+            
+            finally:
+                telemetry.observe("stream", time.perf_counter() - started)
+    
+    def batch_stats(self) -> Optional[Dict]:
+        """Contadores da classificação em lote (None se desativada)"""
+        return self._batcher.stats() if self._batcher is not None else None
+    
+    async def aclose(self) -> None:
+        """Fecha os pools de conexões dos endpoints"""
+        await self.provider.aclose()
+    
+    def _create_completion(self, call: str, **kwargs):
+        """Executa chamada síncrona de chat completion, registrando latência e tokens"""
+        with telemetry.timer(call):
+            response = self.provider.create_sync(call, **kwargs)
+        telemetry.record_usage(call, getattr(response, "usage", None))
+        return response
+    
+    async def _create_completion_async(self, call: str, **kwargs):
+        """
+        Executa chamada de chat completion respeitando o limite de concorrência
+        
+        Args:
+            call: Nome da etapa para a telemetria (classify, respond, combined)
+        
+        Raises:
+            CircuitOpenError: Se todos os circuitos estiverem abertos (sem aguardar o semáforo)
+        """
+        self._check_circuit()
+        
+        waited = time.perf_counter()
+        async with self._get_semaphore():
+            telemetry.observe("llm_wait", time.perf_counter() - waited)
+            with telemetry.timer(call):
+                response = await self.provider.create(call, **kwargs)
+        telemetry.record_usage(call, getattr(response, "usage", None))
+        return response
+    
+    async def _classify_remote(self, text: str) -> Tuple[str, float, str]:
+        """Classifica um único email pela IA (erros são propagados)"""
+        response = await self._create_completion_async(
+            "classify",
+            messages=self._classification_messages(text),
+            temperature=0.1,
+            max_tokens=10
+        )
+        return self._parse_classification(response.choices[0].message.content, text)
+    
+    async def _classify_batch(self, texts: List[str]) -> List[Optional[Tuple[str, float, str]]]:
+        """
+        Classifica vários emails em uma única chamada com prompt numerado
+        
+        Args:
+            texts: Emails agrupados pelo MicroBatcher
+        
+        Returns:
+            Classificação por email (None = resposta ausente ou inválida)
+        """
+        if len(texts) == 1:
+            return [await self._classify_remote(texts[0])]
+        
+        response = await self._create_completion_async(
+            "classify_batch",
+            messages=self._batch_classification_messages(texts),
+            temperature=0.1,
+            max_tokens=8 * len(texts) + 10
+        )
+        
+        answers: Dict[int, str] = {}
+        for match in _BATCH_ANSWER_RE.finditer(response.choices[0].message.content or ""):
+            answers.setdefault(int(match.group(1)), match.group(2).capitalize())
+        
+        results = [answers.get(index) for index in range(1, len(texts) + 1)]
+        logger.info(
+            f"Lote de {len(texts)} emails classificado "
+            f"({sum(1 for category in results if category)} respostas válidas)"
+        )
+        return [(category, 0.85, "deepseek") if category else None for category in results]
+    
+    @staticmethod
+    def _log_ai_error(message: str, error: Exception) -> None:
+        """Registra falha da IA (circuito aberto é esperado e não polui o log)"""
+        if isinstance(error, CircuitOpenError):
+            logger.debug(f"{message}: {error}")
+        else:
+            logger.error(f"{message}: {error}")
+    
+    def _check_circuit(self) -> None:
+        """Falha imediatamente quando nenhum endpoint aceita chamadas"""
+        if not self.provider.available:
+            telemetry.inc("circuit_rejections_total")
+            raise CircuitOpenError("Circuito aberto em todos os endpoints de IA")
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Retorna o semáforo que limita chamadas simultâneas à API"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENT_REQUESTS)
+        return self._semaphore
+    
+    async def _respond_async(self, category: str, text: str) -> Tuple[str, bool]:
+        """
+        Gera a resposta (banco de respostas ou IA)
+        
+        Returns:
+            Tupla (resposta, resposta_padrao): resposta_padrao indica que a
+            geração falhou e foi usada _get_default_response
+        """
+        pooled = self._pooled_response(category, text)
+        if pooled is not None:
+            return pooled, False
+        
+        if not self.provider.configured:
+            return self._get_default_response(category), True
+        
+        try:
+            response = await self._create_completion_async(
+                "respond",
+                messages=self._response_messages(category, text),
+                temperature=0.7,
+                max_tokens=300
+            )
+            
+            generated_response = response.choices[0].message.content.strip()
+            logger.info("Resposta gerada com sucesso")
+            return generated_response, False
+        
+        except Exception as e:
+            self._log_ai_error("Erro ao gerar resposta via IA", e)
+            return self._get_default_response(category), True
+    
+    def _pooled_response(self, category: str, text: str) -> Optional[str]:
+        """Resposta do banco de respostas prontas, se a categoria for atendida"""
+        if self.reply_pool is None:
+            return None
+        return self.reply_pool.get(category, text)
+    
+    def _classify_local(self, text: str) -> Optional[Tuple[str, float, str]]:
+        """Consulta o classificador local; retorna None abaixo do limiar de confiança"""
+        if self.local_classifier is None:
+            return None
+        
+        try:
+            with telemetry.timer("local_model"):
+                prediction = self.local_classifier.predict(text)
+        except Exception as e:
+            logger.error(f"Erro no classificador local: {e}")
+            return None
+        
+        if prediction is None or prediction[1] < settings.LOCAL_MODEL_THRESHOLD:
+            return None
+        
+        category, confidence = prediction
+        logger.info(f"Email classificado localmente como: {category} ({confidence:.2f})")
+        return category, round(confidence, 2), "local-model"
+    
+    def _classification_messages(self, text: str) -> List[Dict[str, str]]:
+        """Monta mensagens da chamada de classificação"""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um classificador especializado em emails corporativos do setor financeiro. Responda APENAS com 'Produtivo' ou 'Improdutivo'."
+            },
+            {
+                "role": "user",
+                "content": self._build_classification_prompt(text)
+            }
+        ]
+    
+    def _batch_classification_messages(self, texts: List[str]) -> List[Dict[str, str]]:
+        """Monta mensagens da chamada de classificação em lote"""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um classificador especializado em emails corporativos do setor financeiro. Responda APENAS com uma linha por email no formato '<número>: Produtivo' ou '<número>: Improdutivo'."
+            },
+            {
+                "role": "user",
+                "content": self._build_batch_classification_prompt(texts)
+            }
+        ]
+    
+    def _response_messages(self, category: str, text: str) -> List[Dict[str, str]]:
+        """Monta mensagens da chamada de geração de resposta"""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um assistente de uma grande empresa do setor financeiro. Gere respostas formais, educadas e profissionais."
+            },
+            {
+                "role": "user",
+                "content": self._build_response_prompt(category, text)
+            }
+        ]
+    
+    def _combined_messages(self, text: str) -> List[Dict[str, str]]:
+        """Monta mensagens da chamada combinada (classificação + resposta)"""
+        return [
+            {
+                "role": "system",
+                "content": "Você é um assistente de uma grande empresa do setor financeiro que classifica emails corporativos e redige respostas formais, educadas e profissionais. Responda APENAS com JSON válido."
+            },
+            {
+                "role": "user",
+                "content": self._build_combined_prompt(text)
+            }
+        ]
+    
+    def _parse_combined(self, content: Optional[str]) -> Optional[Tuple[str, float, str, str]]:
+        """Valida a saída JSON da chamada combinada; retorna None se inválida"""
+        try:
+            data = json.loads(content or "")
+        except ValueError:
+            return None
+        
+        if not isinstance(data, dict):
+            return None
+        
+        category = str(data.get("category", "")).strip()
+        reply = data.get("response")
+        
+        if category not in CATEGORIES or not isinstance(reply, str) or not reply.strip():
+            return None
+        
+        try:
+            confidence = float(data.get("confidence", 0.85))
+        except (TypeError, ValueError):
+            confidence = 0.85
+        confidence = min(max(confidence, 0.0), 1.0)
+        
+        return category, round(confidence, 2), "deepseek-combined", reply.strip()
+    
+    def _parse_classification(self, content: Optional[str], text: str) -> Tuple[str, float, str]:
+        """Valida resposta da IA, recorrendo às regras se for inesperada"""
+        category = (content or "").strip()
+        
+        # Validar resposta
+        if category not in CATEGORIES:
+            logger.warning(f"Resposta inesperada da IA: {category}")
+            # Fallback para classificação baseada em regras
+            return self._classify_fallback(text)
+        
+        logger.info(f"Email classificado como: {category}")
+        return category, 0.85, "deepseek"
+    
+    def _prompt_text(self, text: str, max_tokens: int, max_chars: int) -> str:
+        """Conteúdo do email para o prompt (compactado ou cortado em max_chars)"""
+        if not settings.COMPACTION_ENABLED:
+            return text[:max_chars]
+        return self.compactor.compact(text, max_tokens).text
+    
     def _build_classification_prompt(self, text: str) -> str:
         """Constrói prompt otimizado para classificação"""
         return f"""
 Classifique o seguinte email corporativo em uma das categorias:
-
-**PRODUTIVO**: Emails que requerem ação ou resposta
-- Solicitações de suporte técnico
-- Dúvidas sobre processos ou sistemas
-- Atualizações sobre casos/requisições em andamento
-- Pedidos de documentos ou informações
-- Questões relacionadas a transações financeiras
-
-**IMPRODUTIVO**: Emails que não requerem ação imediata
-- Felicitações (aniversário, natal, etc)
-- Mensagens de agradecimento genéricas
-- Promoções comerciais
-- Spam ou correntes
-- Mensagens pessoais sem relação com trabalho
-
+{CLASSIFICATION_CRITERIA}
 EMAIL:
-{text[:1000]}
+{self._prompt_text(text, settings.COMPACTION_CLASSIFY_MAX_TOKENS, 1000)}
 
 RESPONDA APENAS: "Produtivo" ou "Improdutivo"
+"""
+    
+    def _build_batch_classification_prompt(self, texts: List[str]) -> str:
+        """Constrói prompt numerado para classificar vários emails de uma vez"""
+        emails = "\n\n".join(
+            f"EMAIL {index}:\n{self._prompt_text(text, settings.COMPACTION_CLASSIFY_MAX_TOKENS, 1000)}"
+            for index, text in enumerate(texts, start=1)
+        )
+        return f"""
+Classifique cada um dos {len(texts)} emails corporativos abaixo em uma das categorias:
+{CLASSIFICATION_CRITERIA}
+{emails}
+
+RESPONDA APENAS uma linha por email, na ordem: "<número>: Produtivo" ou "<número>: Improdutivo"
 """
     
     def _build_response_prompt(self, category: str, text: str) -> str:
         """Constrói prompt para geração de resposta"""
         
         if category == "Produtivo":
-            context = """
-O email é PRODUTIVO (requer ação). Gere uma resposta formal que:
-- Agradeça o contato
-- Confirme o recebimento da solicitação
-- Informe que a equipe irá analisar e responder em breve
-- Seja educada e profissional
-"""
+            context = PRODUTIVO_RESPONSE_GUIDELINES
         else:
-            context = """
-O email é IMPRODUTIVO (mensagem cordial). Gere uma resposta breve que:
-- Agradeça a mensagem
-- Seja cordial e amigável
-- Mantenha formalidade corporativa
-"""
+            context = IMPRODUTIVO_RESPONSE_GUIDELINES
         
         return f"""
 {context}
 
 EMAIL ORIGINAL:
-{text[:500]}
+{self._prompt_text(text, settings.COMPACTION_RESPONSE_MAX_TOKENS, 500)}
 
 Gere APENAS o corpo da resposta, sem assunto ou assinatura completa.
+"""
+    
+    def _build_combined_prompt(self, text: str) -> str:
+        """Constrói prompt para classificação e resposta em uma única chamada"""
+        return f"""
+Classifique o seguinte email corporativo em uma das categorias e gere uma resposta adequada.
+{CLASSIFICATION_CRITERIA}
+Diretrizes para a resposta:
+{PRODUTIVO_RESPONSE_GUIDELINES}
+{IMPRODUTIVO_RESPONSE_GUIDELINES}
+EMAIL:
+{self._prompt_text(text, settings.COMPACTION_CLASSIFY_MAX_TOKENS, 1000)}
+
+Responda APENAS com um objeto JSON no formato:
+{{"category": "Produtivo" ou "Improdutivo", "confidence": número entre 0 e 1, "response": "corpo da resposta, sem assunto ou assinatura completa"}}
 """
     
     def _classify_fallback(self, text: str) -> Tuple[str, float, str]:
@@ -172,31 +660,10 @@ Gere APENAS o corpo da resposta, sem assunto ou assinatura completa.
         Returns:
             Tupla (categoria, confiança, método)
         """
-        text_lower = text.lower()
-        
-        # Palavras-chave para Improdutivo
-        improdutivo_keywords = [
-            'feliz', 'parabéns', 'aniversário', 'natal', 'ano novo',
-            'promoção', 'desconto', 'oferta', 'grátis', 'compre já'
-        ]
-        
-        # Palavras-chave para Produtivo
-        produtivo_keywords = [
-            'solicito', 'preciso', 'urgente', 'dúvida', 'problema',
-            'suporte', 'ajuda', 'requisição', 'caso', 'atualização',
-            'documento', 'relatório', 'transação', 'conta'
-        ]
-        
-        # Contar ocorrências
-        improdutivo_count = sum(1 for kw in improdutivo_keywords if kw in text_lower)
-        produtivo_count = sum(1 for kw in produtivo_keywords if kw in text_lower)
-        
-        if improdutivo_count > produtivo_count:
-            logger.info("Classificado como Improdutivo (fallback)")
-            return "Improdutivo", 0.6, "rule-based"
-        else:
-            logger.info("Classificado como Produtivo (fallback)")
-            return "Produtivo", 0.6, "rule-based"
+        with telemetry.timer("rules"):
+            category, confidence, method = self.rule_engine.classify(text)
+        logger.info(f"Classificado como {category} (fallback)")
+        return category, confidence, method
     
     def _get_default_response(self, category: str) -> str:
         """Retorna resposta padrão em caso de erro na geração"""
@@ -0,0 +1,178 @@
+"""
+Cache de resultados endereçado por conteúdo (memória LRU + SQLite opcional)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.ai_service import PROMPT_VERSION
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ResultCache:
+    """Cache de resultados de classificação com LRU/TTL e camada em disco"""
+    
+    def __init__(self):
+        """Inicializa camada em memória e, se configurada, a camada SQLite"""
+        self.max_entries = settings.CACHE_MAX_ENTRIES
+        self.ttl = settings.CACHE_TTL
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "stores": 0}
+        
+        if settings.CACHE_DB_FILE:
+            self._open_db(settings.CACHE_DB_FILE)
+        
+        logger.info("ResultCache inicializado")
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normaliza conteúdo (Unicode NFC e espaços) antes do hash"""
+        text = unicodedata.normalize("NFC", text)
+        return _WHITESPACE_RE.sub(" ", text).strip()
+    
+    def make_key(self, text: str) -> str:
+        """
+        Gera chave do cache a partir do conteúdo normalizado
+        
+        Args:
+            text: Conteúdo do email
+        
+        Returns:
+            Hash SHA-256 (conteúdo + modelo + versão do prompt + modo)
+        """
+        payload = "\x00".join([
+            settings.AI_MODEL,
+            PROMPT_VERSION,
+            settings.AI_MODE,
+            self.normalize(text)
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    async def get(self, key: str) -> Optional[Dict]:
+        """
+        Busca resultado na memória e, em seguida, no disco
+        
+        Args:
+            key: Chave gerada por make_key
+        
+        Returns:
+            Resultado armazenado ou None
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self._stats["hits_memory"] += 1
+                return dict(value, cache_tier="memory")
+            del self._memory[key]
+        
+        if self._db is not None:
+            value = await asyncio.to_thread(self._db_get, key)
+            if value is not None:
+                self._remember(key, value)
+                self._stats["hits_disk"] += 1
+                return dict(value, cache_tier="disk")
+        
+        self._stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, value: Dict) -> None:
+        """
+        Armazena resultado nas duas camadas
+        
+        Args:
+            key: Chave gerada por make_key
+            value: Resultado serializável em JSON
+        """
+        self._remember(key, value)
+        self._stats["stores"] += 1
+        
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_set, key, value)
+            except Exception as e:
+                logger.error(f"Erro ao persistir cache: {e}")
+    
+    def stats(self) -> Dict:
+        """Retorna contadores de acertos/erros do cache"""
+        hits = self._stats["hits_memory"] + self._stats["hits_disk"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "entries_memory": len(self._memory),
+            "persistent": self._db is not None
+        }
+    
+    def close(self) -> None:
+        """Fecha conexão com a camada em disco"""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+    
+    def _remember(self, key: str, value: Dict) -> None:
+        """Insere na camada em memória respeitando o limite LRU"""
+        self._memory[key] = (time.time() + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _open_db(self, path: str) -> None:
+        """Abre (ou cria) o banco SQLite do cache persistente"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.error(f"Cache persistente indisponível ({path}): {e}")
+            self._db = None
+    
+    def _db_get(self, key: str) -> Optional[Dict]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value FROM results WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def _db_set(self, key: str, value: Dict) -> None:
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl)
+            )
+            
+            # Limpeza periódica de entradas expiradas
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            
+            self._db.commit()
@@ -0,0 +1,97 @@
+"""
+Contêiner de serviços da aplicação (construído no lifespan do FastAPI)
+"""
+
+import asyncio
+import time
+from typing import Optional
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.ai_service import AIService
+from app.services.cache_service import ResultCache
+from app.services.email_compactor import EmailCompactor
+from app.services.feedback_service import FeedbackService
+from app.services.file_service import FileService
+from app.services.job_service import JobService
+from app.services.local_classifier import LocalClassifier
+from app.services.processing_service import ProcessingService
+from app.services.reply_pool import ReplyPool
+from app.services.shared_store import SharedStore
+from app.services.similarity_index import SimilarityIndex
+from app.services.text_processor import TextProcessor
+
+
+class ServiceContainer:
+    """Constrói e mantém as instâncias compartilhadas dos serviços"""
+    
+    def __init__(self):
+        started = time.perf_counter()
+        
+        self.shared_store = SharedStore() if settings.SHARED_DB_FILE else None
+        self.text_processor = TextProcessor()
+        self.local_classifier = (
+            LocalClassifier(self.text_processor) if settings.LOCAL_MODEL_ENABLED else None
+        )
+        self.ai_service = AIService(
+            self.local_classifier,
+            compactor=EmailCompactor(self.text_processor),
+            reply_pool=ReplyPool() if settings.REPLY_POOL_ENABLED else None
+        )
+        self.file_service = FileService()
+        self.feedback_service = FeedbackService()
+        self.result_cache = ResultCache() if settings.CACHE_ENABLED else None
+        self.similarity_index = (
+            SimilarityIndex(self.text_processor) if settings.SIMILARITY_ENABLED else None
+        )
+        self.processing_service = ProcessingService(
+            self.ai_service, self.result_cache, self.similarity_index
+        )
+        self.job_service = JobService(
+            self.file_service, self.processing_service, self.text_processor,
+            store=self.shared_store
+        )
+        self._sync_task: Optional[asyncio.Task] = None
+        
+        self.startup_seconds = time.perf_counter() - started
+        logger.info(f"Serviços inicializados em {self.startup_seconds:.3f}s")
+    
+    async def start(self) -> None:
+        """Inicia tarefas em segundo plano dos serviços"""
+        await self.feedback_service.start()
+        await self.job_service.start()
+        if self.shared_store is not None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+    
+    async def aclose(self) -> None:
+        """Libera conexões e arquivos mantidos pelos serviços"""
+        await self.job_service.aclose()
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+        await self.feedback_service.aclose()
+        await self.ai_service.aclose()
+        self.file_service.close()
+        if self.result_cache is not None:
+            self.result_cache.close()
+        if self.similarity_index is not None:
+            self.similarity_index.close()
+        if self.shared_store is not None:
+            await self.sync()  # último estado da telemetria antes de sair
+            self.shared_store.close()
+    
+    async def sync(self) -> None:
+        """Publica a telemetria deste worker e recebe o estado dos demais"""
+        await asyncio.to_thread(self.shared_store.publish_telemetry, telemetry.export_state())
+        await asyncio.to_thread(self.shared_store.purge_jobs)
+        if self.similarity_index is not None:
+            await self.similarity_index.refresh()
+    
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.SHARED_SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar estado compartilhado: {e}")
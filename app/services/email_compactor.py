@@ -0,0 +1,199 @@
+"""
+Compactação de emails para prompts: remove histórico citado, assinaturas,
+avisos legais e espaços redundantes e ajusta o texto a um orçamento de tokens
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.text_processor import TextProcessor
+
+# Estimativa de caracteres por token (português/inglês, tokenizers BPE)
+CHARS_PER_TOKEN = 4
+
+# Corpo mínimo (caracteres) acima do histórico para considerá-lo resposta;
+# abaixo disso o email é tratado como encaminhamento e o conteúdo citado é mantido
+MIN_BODY_CHARS = 20
+
+# Linhas finais onde despedidas e assinaturas são procuradas
+SIGNATURE_SCAN_LINES = 12
+
+_REPLY_HEADER_RE = re.compile(
+    r"^\s*(em|on)\b.{0,200}\b(escreveu|wrote)\s*:?\s*$",
+    re.IGNORECASE
+)
+
+_SEPARATOR_RE = re.compile(
+    r"^\s*(-{2,}\s*(original message|mensagem original|forwarded message|mensagem encaminhada)\s*-{2,}|_{10,})\s*$",
+    re.IGNORECASE
+)
+
+_HEADER_FIELD_RE = re.compile(
+    r"^\s*(de|from|para|to|cc|cco|bcc|assunto|subject|enviad[ao](\s+em)?|sent|data|date)\s*:",
+    re.IGNORECASE
+)
+
+_FROM_FIELD_RE = re.compile(r"^\s*(de|from)\s*:", re.IGNORECASE)
+
+_SIGNATURE_DELIMITER_RE = re.compile(
+    r"^\s*(--|enviado do meu .+|sent from my .+|enviado de .+ para (android|ios).*)\s*$",
+    re.IGNORECASE
+)
+
+_SIGN_OFF_RE = re.compile(
+    r"^\s*(atenciosamente|att\.?|atte\.?|abra[cç]os?|um abra[cç]o|cordialmente|sauda[cç][oõ]es|"
+    r"obrigad[oa]s?|grat[oa]|best regards|kind regards|regards|thanks|thank you|cheers)[\s,.!]*$",
+    re.IGNORECASE
+)
+
+_DISCLAIMER_TERM_RE = re.compile(
+    r"confidencia|confidential|privilegiad|privileged|destinat[aá]ri|intended recipient|"
+    r"aviso legal|disclaimer|por engano|in error|proibid|prohibited|sigilo|"
+    r"antes de imprimir|before printing|meio ambiente",
+    re.IGNORECASE
+)
+
+_INLINE_SPACE_RE = re.compile(r"[ \t\u00a0\u200b]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+class CompactedEmail(NamedTuple):
+    """Resultado da compactação com os tamanhos antes/depois"""
+    text: str
+    original_tokens: int
+    compacted_tokens: int
+    truncated: bool
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens a partir do número de caracteres"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class EmailCompactor:
+    """Reduz emails corporativos ao conteúdo útil antes de enviá-los à IA"""
+    
+    def __init__(self, text_processor: Optional[TextProcessor] = None, cache_size: int = 1024):
+        """
+        Args:
+            text_processor: Usado para truncar no orçamento mantendo palavras inteiras
+            cache_size: Resultados memorizados (o mesmo email é compactado para
+                classificação e para resposta)
+        """
+        self.text_processor = text_processor or TextProcessor()
+        self._cached_compact = lru_cache(maxsize=cache_size)(self._compact)
+        logger.info("EmailCompactor inicializado")
+    
+    def compact(self, text: str, max_tokens: Optional[int] = None) -> CompactedEmail:
+        """
+        Compacta o email e o ajusta ao orçamento de tokens
+        
+        Args:
+            text: Conteúdo do email
+            max_tokens: Orçamento de tokens (None = sem limite)
+        
+        Returns:
+            CompactedEmail com o texto e os tamanhos antes/depois
+        """
+        result = self._cached_compact(text, max_tokens)
+        telemetry.inc("compaction_tokens_total", result.original_tokens, stage="before")
+        telemetry.inc("compaction_tokens_total", result.compacted_tokens, stage="after")
+        return result
+    
+    def _compact(self, text: str, max_tokens: Optional[int]) -> CompactedEmail:
+        original_tokens = estimate_tokens(text)
+        
+        lines = self._normalize_lines(text)
+        lines = self._strip_history(lines)
+        lines = self._strip_signature(lines)
+        compacted = self._strip_disclaimers("\n".join(lines))
+        compacted = _BLANK_LINES_RE.sub("\n\n", compacted).strip()
+        
+        # Nada útil restou (ex.: só citação): usa o original sem espaços redundantes
+        if not compacted:
+            compacted = "\n".join(self._normalize_lines(text)).strip()
+        
+        truncated = False
+        if max_tokens and estimate_tokens(compacted) > max_tokens:
+            compacted = self.text_processor.truncate(compacted, max_tokens * CHARS_PER_TOKEN)
+            truncated = True
+        
+        result = CompactedEmail(compacted, original_tokens, estimate_tokens(compacted), truncated)
+        logger.debug(
+            f"Email compactado: ~{result.original_tokens} -> ~{result.compacted_tokens} tokens"
+            f"{' (truncado)' if truncated else ''}"
+        )
+        return result
+    
+    @staticmethod
+    def _normalize_lines(text: str) -> List[str]:
+        """Unifica quebras de linha e colapsa espaços dentro das linhas"""
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return [_INLINE_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+    
+    def _strip_history(self, lines: List[str]) -> List[str]:
+        """
+        Remove o histórico citado (linhas "> ", "Em ... escreveu:", cabeçalhos
+        De/Para/Assunto, separadores de mensagem original/encaminhada)
+        
+        Se não houver corpo acima do histórico (encaminhamento), descarta só
+        os cabeçalhos e processa a mensagem citada.
+        """
+        lines = [line for line in lines if not line.startswith(">")]
+        
+        for _ in range(5):  # limite de níveis de encaminhamento
+            marker = self._find_history_marker(lines)
+            if marker is None:
+                return lines
+            
+            body = lines[:marker]
+            if sum(len(line) for line in body) >= MIN_BODY_CHARS:
+                return body
+            
+            rest = lines[marker + 1:]
+            while rest and (not rest[0] or _HEADER_FIELD_RE.match(rest[0])):
+                rest = rest[1:]
+            lines = rest
+        
+        return lines
+    
+    @staticmethod
+    def _find_history_marker(lines: List[str]) -> Optional[int]:
+        """Índice da primeira linha que inicia o histórico citado"""
+        for index, line in enumerate(lines):
+            if _REPLY_HEADER_RE.match(line) or _SEPARATOR_RE.match(line):
+                return index
+            
+            # Bloco de cabeçalho estilo Outlook: "De:" seguido de outros campos
+            if _FROM_FIELD_RE.match(line) and any(
+                _HEADER_FIELD_RE.match(following) for following in lines[index + 1:index + 5]
+            ):
+                return index
+        return None
+    
+    @staticmethod
+    def _strip_signature(lines: List[str]) -> List[str]:
+        """Corta a partir do delimitador de assinatura ou da despedida final"""
+        start = max(0, len(lines) - SIGNATURE_SCAN_LINES)
+        
+        for index in range(start, len(lines)):
+            line = lines[index]
+            if _SIGNATURE_DELIMITER_RE.match(line) or _SIGN_OFF_RE.match(line):
+                body = lines[:index]
+                # Mantém emails que são só a despedida (ex.: "Obrigado!")
+                if sum(len(candidate) for candidate in body) >= MIN_BODY_CHARS:
+                    return body
+        return lines
+    
+    @staticmethod
+    def _strip_disclaimers(text: str) -> str:
+        """Remove parágrafos de aviso legal/confidencialidade"""
+        paragraphs = text.split("\n\n")
+        kept = [
+            paragraph for paragraph in paragraphs
+            if len({term.lower() for term in _DISCLAIMER_TERM_RE.findall(paragraph)}) < 2
+        ]
+        return "\n\n".join(kept)
@@ -2,24 +2,29 @@
 Serviço para gerenciamento de feedback
 """
 
-import csv
-import os
-import pandas as pd
+import asyncio
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 from app.core.config import settings
 from app.core.exceptions import FeedbackError
 from app.core.logging_config import logger
+from app.services.feedback_store import FeedbackStore, create_feedback_store
+from app.services.feedback_writer import FeedbackWriter
 
 
 class FeedbackService:
     """Serviço para gerenciar feedback dos usuários"""
     
-    def __init__(self):
-        """Inicializa serviço e garante que diretório existe"""
-        self.feedback_file = settings.FEEDBACK_FILE
-        os.makedirs(os.path.dirname(self.feedback_file), exist_ok=True)
-        logger.info("FeedbackService inicializado")
+    def __init__(self, store: Optional[FeedbackStore] = None):
+        """
+        Inicializa serviço com o backend de armazenamento
+        
+        Args:
+            store: Backend de feedback (padrão: settings.FEEDBACK_BACKEND)
+        """
+        self.store = store or create_feedback_store()
+        self.writer = FeedbackWriter(self.store) if settings.FEEDBACK_WRITE_BEHIND else None
+        logger.info(f"FeedbackService inicializado ({type(self.store).__name__})")
     
     def save_feedback(self, feedback_data: Dict) -> None:
         """
@@ -32,23 +37,7 @@ class FeedbackService:
             FeedbackError: Se não conseguir salvar
         """
         try:
-            # Adicionar metadados
-            feedback_data['timestamp'] = datetime.now().isoformat()
-            feedback_data['app_version'] = settings.APP_VERSION
-            
-            file_exists = os.path.isfile(self.feedback_file)
-            
-            with open(self.feedback_file, mode='a', newline='', encoding='utf-8') as f:
-                fieldnames = [
-                    'timestamp', 'original_text', 'predicted', 
-                    'feedback_type', 'correction', 'app_version'
-                ]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                
-                if not file_exists:
-                    writer.writeheader()
-                
-                writer.writerow(feedback_data)
+            self.store.add(self._with_metadata(feedback_data))
             
             logger.info(f"Feedback salvo: {feedback_data['feedback_type']}")
         
@@ -56,6 +45,43 @@ class FeedbackService:
             logger.error(f"Erro ao salvar feedback: {e}")
             raise FeedbackError(f"Não foi possível salvar feedback: {str(e)}")
     
+    async def save_feedback_async(self, feedback_data: Dict) -> None:
+        """
+        Salva feedback sem bloquear o event loop
+        
+        Com FEEDBACK_WRITE_BEHIND, o feedback entra na fila do writer e a
+        chamada retorna quando o lote que o contém foi gravado.
+        
+        Args:
+            feedback_data: Dicionário com dados do feedback
+        
+        Raises:
+            FeedbackError: Se não conseguir salvar
+        """
+        if self.writer is None:
+            await asyncio.to_thread(self.save_feedback, feedback_data)
+            return
+        
+        await self.writer.submit(self._with_metadata(feedback_data))
+        logger.info(f"Feedback salvo: {feedback_data['feedback_type']}")
+    
+    async def start(self) -> None:
+        """Inicia a gravação em segundo plano (se habilitada)"""
+        if self.writer is not None:
+            await self.writer.start()
+    
+    async def aclose(self) -> None:
+        """Grava feedbacks pendentes e fecha o backend de armazenamento"""
+        if self.writer is not None:
+            await self.writer.stop()
+        self.store.close()
+    
+    def _with_metadata(self, feedback_data: Dict) -> Dict:
+        """Adiciona timestamp e versão da aplicação ao feedback"""
+        feedback_data['timestamp'] = datetime.now().isoformat()
+        feedback_data['app_version'] = settings.APP_VERSION
+        return feedback_data
+    
     def get_metrics(self) -> Dict:
         """
         Calcula métricas baseadas no feedback
@@ -63,38 +89,9 @@ class FeedbackService:
         Returns:
             Dicionário com métricas
         """
-        if not os.path.exists(self.feedback_file):
-            return {
-                "total_feedbacks": 0,
-                "accuracy": None,
-                "correct_count": 0,
-                "incorrect_count": 0,
-                "distribution": {}
-            }
-        
         try:
-            df = pd.read_csv(self.feedback_file)
-            
-            total = len(df)
-            correct = len(df[df['feedback_type'] == 'correct'])
-            incorrect = len(df[df['feedback_type'] == 'incorrect'])
-            
-            accuracy = (correct / total * 100) if total > 0 else None
-            
-            # Distribuição de categorias
-            distribution = {}
-            if 'predicted' in df.columns:
-                distribution = df['predicted'].value_counts().to_dict()
-            
-            metrics = {
-                "total_feedbacks": total,
-                "accuracy": round(accuracy, 2) if accuracy else None,
-                "correct_count": correct,
-                "incorrect_count": incorrect,
-                "distribution": distribution
-            }
-            
-            logger.info(f"Métricas calculadas: {metrics}")
+            metrics = self.store.metrics()
+            logger.debug("Métricas calculadas: %s", metrics)  # formatado só se DEBUG
             return metrics
         
         except Exception as e:
@@ -104,24 +101,37 @@ class FeedbackService:
                 "total_feedbacks": 0
             }
     
-    def get_recent_feedbacks(self, limit: int = 10) -> list:
+    def get_recent_feedbacks(
+        self,
+        limit: int = 10,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> list:
         """
         Retorna feedbacks mais recentes
         
         Args:
             limit: Número máximo de feedbacks
+            since: Timestamp ISO inicial (inclusivo)
+            until: Timestamp ISO final (exclusivo)
+            category: Filtrar pela categoria prevista
         
         Returns:
-            Lista de feedbacks
+            Lista de feedbacks, do mais recente ao mais antigo
         """
-        if not os.path.exists(self.feedback_file):
-            return []
-        
         try:
-            df = pd.read_csv(self.feedback_file)
-            recent = df.tail(limit).to_dict('records')
-            return recent
+            return self.store.recent(limit, since=since, until=until, category=category)
         
         except Exception as e:
             logger.error(f"Erro ao buscar feedbacks recentes: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def iter_feedbacks(self) -> Iterator[Dict]:
+        """
+        Itera sobre todos os feedbacks salvos (sem carregar tudo em memória)
+        
+        Returns:
+            Iterador de dicionários, um por feedback
+        """
+        return self.store.iter_all()
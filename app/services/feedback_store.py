@@ -0,0 +1,326 @@
+"""
+Armazenamento de feedback (SQLite indexado ou CSV legado)
+"""
+
+import csv
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+from app.core.config import settings
+from app.core.logging_config import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+FEEDBACK_FIELDS = [
+    'timestamp', 'original_text', 'predicted',
+    'feedback_type', 'correction', 'app_version'
+]
+
+
+def _empty_metrics() -> Dict:
+    return {
+        "total_feedbacks": 0,
+        "accuracy": None,
+        "correct_count": 0,
+        "incorrect_count": 0,
+        "distribution": {}
+    }
+
+
+class FeedbackStore(ABC):
+    """Interface dos backends de armazenamento de feedback"""
+    
+    @abstractmethod
+    def add_many(self, rows: List[Dict]) -> None:
+        """Grava várias linhas de feedback em uma única operação"""
+    
+    def add(self, row: Dict) -> None:
+        """Grava uma linha de feedback"""
+        self.add_many([row])
+    
+    @abstractmethod
+    def metrics(self) -> Dict:
+        """Retorna totais, acurácia e distribuição por categoria prevista"""
+    
+    @abstractmethod
+    def recent(
+        self,
+        limit: int = 10,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[Dict]:
+        """Retorna os feedbacks mais recentes, opcionalmente filtrados"""
+    
+    @abstractmethod
+    def iter_all(self) -> Iterator[Dict]:
+        """Itera sobre todos os feedbacks, do mais antigo ao mais recente"""
+    
+    def close(self) -> None:
+        """Libera recursos do backend"""
+
+
+class CSVFeedbackStore(FeedbackStore):
+    """Backend legado: arquivo CSV com leitura completa via pandas"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.FEEDBACK_FILE
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def add_many(self, rows: List[Dict]) -> None:
+        with open(self.path, mode='a', newline='', encoding='utf-8') as f:
+            # Lock exclusivo entre processos/workers durante o append
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            
+            try:
+                writer = csv.DictWriter(f, fieldnames=FEEDBACK_FIELDS)
+                
+                # Cabeçalho decidido sob o lock (evita corrida de os.path.isfile)
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    writer.writeheader()
+                
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    def metrics(self) -> Dict:
+        if not os.path.exists(self.path):
+            return _empty_metrics()
+        
+        import pandas as pd
+        
+        df = pd.read_csv(self.path)
+        
+        total = len(df)
+        correct = len(df[df['feedback_type'] == 'correct'])
+        incorrect = len(df[df['feedback_type'] == 'incorrect'])
+        
+        accuracy = (correct / total * 100) if total > 0 else None
+        
+        # Distribuição de categorias
+        distribution = {}
+        if 'predicted' in df.columns:
+            distribution = df['predicted'].value_counts().to_dict()
+        
+        return {
+            "total_feedbacks": total,
+            "accuracy": round(accuracy, 2) if accuracy else None,
+            "correct_count": correct,
+            "incorrect_count": incorrect,
+            "distribution": distribution
+        }
+    
+    def recent(self, limit=10, since=None, until=None, category=None) -> List[Dict]:
+        rows = [
+            row for row in self.iter_all()
+            if (since is None or row['timestamp'] >= since)
+            and (until is None or row['timestamp'] < until)
+            and (category is None or row['predicted'] == category)
+        ]
+        return rows[-limit:][::-1] if limit > 0 else []
+    
+    def iter_all(self) -> Iterator[Dict]:
+        if not os.path.exists(self.path):
+            return
+        
+        with open(self.path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+
+class SQLiteFeedbackStore(FeedbackStore):
+    """
+    Backend SQLite em modo WAL
+    
+    Consultas de recentes usam índices (O(log n)) e as métricas vêm de uma
+    tabela de contadores mantida por trigger, sem varrer o histórico.
+    """
+    
+    def __init__(self, path: Optional[str] = None, legacy_csv: Optional[str] = None):
+        self.path = path or settings.FEEDBACK_DB_FILE
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._create_schema()
+        
+        legacy_csv = settings.FEEDBACK_FILE if legacy_csv is None else legacy_csv
+        if legacy_csv:
+            self._migrate_csv(legacy_csv)
+    
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # Feedback confirmado precisa ser durável: fsync a cada commit (lote)
+            self._db.execute("PRAGMA synchronous=FULL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS feedback (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    original_text TEXT,
+                    predicted TEXT,
+                    feedback_type TEXT,
+                    correction TEXT,
+                    app_version TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_feedback_timestamp
+                    ON feedback (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_feedback_predicted_timestamp
+                    ON feedback (predicted, timestamp);
+                
+                CREATE TABLE IF NOT EXISTS feedback_counts (
+                    predicted TEXT NOT NULL,
+                    feedback_type TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (predicted, feedback_type)
+                );
+                CREATE TRIGGER IF NOT EXISTS trg_feedback_counts
+                AFTER INSERT ON feedback
+                BEGIN
+                    INSERT INTO feedback_counts (predicted, feedback_type, count)
+                    VALUES (COALESCE(NEW.predicted, ''), COALESCE(NEW.feedback_type, ''), 1)
+                    ON CONFLICT (predicted, feedback_type) DO UPDATE SET count = count + 1;
+                END;
+                
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            self._db.commit()
+    
+    def _migrate_csv(self, csv_path: str) -> None:
+        """
+        Importa o CSV legado uma única vez (registrado na tabela meta)
+        
+        Com vários processos iniciando juntos (workers do gunicorn), a marca
+        é verificada de novo dentro de uma transação BEGIN IMMEDIATE: só o
+        primeiro a obter o lock de escrita importa as linhas.
+        """
+        if self._csv_migrated() or not os.path.exists(csv_path):
+            return
+        
+        rows = list(CSVFeedbackStore(csv_path).iter_all())
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._csv_migrated():
+                    self._db.rollback()
+                    return
+                self._insert(rows)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_migrated', ?)",
+                    (csv_path,)
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        
+        logger.info(f"Feedback migrado do CSV: {len(rows)} registros de {csv_path}")
+    
+    def _csv_migrated(self) -> bool:
+        return self._db.execute(
+            "SELECT value FROM meta WHERE key = 'csv_migrated'"
+        ).fetchone() is not None
+    
+    def _insert(self, rows: List[Dict]) -> None:
+        self._db.executemany(
+            "INSERT INTO feedback (timestamp, original_text, predicted, "
+            "feedback_type, correction, app_version) VALUES (?, ?, ?, ?, ?, ?)",
+            [tuple(row.get(field) or None for field in FEEDBACK_FIELDS) for row in rows]
+        )
+    
+    def add_many(self, rows: List[Dict]) -> None:
+        # Uma transação (e um fsync) para o lote inteiro
+        with self._lock, self._db:
+            self._insert(rows)
+    
+    def metrics(self) -> Dict:
+        with self._lock:
+            counts = self._db.execute(
+                "SELECT predicted, feedback_type, count FROM feedback_counts"
+            ).fetchall()
+        
+        if not counts:
+            return _empty_metrics()
+        
+        total = sum(row["count"] for row in counts)
+        correct = sum(row["count"] for row in counts if row["feedback_type"] == "correct")
+        incorrect = sum(row["count"] for row in counts if row["feedback_type"] == "incorrect")
+        
+        distribution = {}
+        for row in counts:
+            if row["predicted"]:
+                distribution[row["predicted"]] = distribution.get(row["predicted"], 0) + row["count"]
+        
+        accuracy = correct / total * 100
+        
+        return {
+            "total_feedbacks": total,
+            "accuracy": round(accuracy, 2) if accuracy else None,
+            "correct_count": correct,
+            "incorrect_count": incorrect,
+            "distribution": distribution
+        }
+    
+    def recent(self, limit=10, since=None, until=None, category=None) -> List[Dict]:
+        conditions = []
+        params: List = []
+        
+        if category is not None:
+            conditions.append("predicted = ?")
+            params.append(category)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(FEEDBACK_FIELDS)} FROM feedback {where} "
+                "ORDER BY timestamp DESC LIMIT ?",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def iter_all(self) -> Iterator[Dict]:
+        # Conexão própria: a iteração pode ser longa e não deve segurar o lock
+        db = sqlite3.connect(self.path)
+        db.row_factory = sqlite3.Row
+        try:
+            for row in db.execute(f"SELECT {', '.join(FEEDBACK_FIELDS)} FROM feedback ORDER BY id"):
+                yield dict(row)
+        finally:
+            db.close()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def create_feedback_store() -> FeedbackStore:
+    """Cria o backend configurado em settings.FEEDBACK_BACKEND ("sqlite" ou "csv")"""
+    if settings.FEEDBACK_BACKEND == "csv":
+        return CSVFeedbackStore()
+    return SQLiteFeedbackStore()
@@ -0,0 +1,113 @@
+"""
+Gravação de feedback em segundo plano com commit em grupo
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import FeedbackError
+from app.core.logging_config import logger
+from app.services.feedback_store import FeedbackStore
+
+_STOP = object()
+
+
+class FeedbackWriter:
+    """
+    Fila em memória drenada por uma tarefa que grava os feedbacks em lotes
+    
+    Cada lote é persistido em uma única operação (uma transação/um fsync) a
+    cada FEEDBACK_FLUSH_INTERVAL segundos ou FEEDBACK_BATCH_SIZE itens. O
+    envio só é confirmado depois que o lote correspondente foi gravado.
+    """
+    
+    def __init__(self, store: FeedbackStore):
+        self.store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+    
+    async def start(self) -> None:
+        """Inicia a tarefa de gravação no event loop atual"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=settings.FEEDBACK_QUEUE_SIZE)
+            self._task = asyncio.create_task(self._run())
+            logger.info("FeedbackWriter iniciado")
+    
+    async def submit(self, row: Dict) -> None:
+        """
+        Enfileira um feedback e aguarda sua gravação
+        
+        Args:
+            row: Linha de feedback completa
+        
+        Raises:
+            FeedbackError: Se o writer estiver parado ou a gravação falhar
+        """
+        if self._stopped:
+            raise FeedbackError("Gravação de feedback encerrada")
+        if self._task is None:
+            await self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        await future
+    
+    async def stop(self) -> None:
+        """Grava todos os feedbacks pendentes e encerra a tarefa"""
+        if self._task is None or self._stopped:
+            return
+        
+        self._stopped = True
+        await self._queue.put(_STOP)
+        await self._task
+        logger.info("FeedbackWriter encerrado")
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            batch: List[Tuple[Dict, asyncio.Future]] = []
+            
+            first = await self._queue.get()
+            if first is _STOP:
+                stopping = True
+            else:
+                batch.append(first)
+            
+            # Acumula itens até o fim do intervalo ou o tamanho máximo do lote
+            deadline = loop.time() + settings.FEEDBACK_FLUSH_INTERVAL
+            while not stopping and len(batch) < settings.FEEDBACK_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            
+            if batch:
+                await self._flush(batch)
+    
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        try:
+            await asyncio.to_thread(self.store.add_many, [row for row, _ in batch])
+        except Exception as e:
+            logger.error(f"Erro ao gravar lote de feedback ({len(batch)} itens): {e}")
+            error = FeedbackError(f"Não foi possível salvar feedback: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+        
+        logger.debug(f"Lote de feedback gravado: {len(batch)} itens")
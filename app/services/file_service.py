@@ -2,13 +2,15 @@
 Serviço para extração de texto de arquivos
 """
 
+import codecs
 import os
-from typing import BinaryIO
+from typing import Optional
 from fastapi import UploadFile
-import pdfplumber
 from app.core.config import settings
 from app.core.exceptions import FileValidationError
 from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.pdf_extractor import PdfExtractor
 
 
 class FileService:
@@ -17,6 +19,7 @@ class FileService:
     def __init__(self):
         # Criar diretório de uploads se não existir
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        self.pdf_extractor = PdfExtractor()
         logger.info("FileService inicializado")
     
     async def validate_file(self, file: UploadFile) -> None:
@@ -40,25 +43,21 @@ class FileService:
                 f"Extensão '{ext}' não permitida. Use: {', '.join(settings.ALLOWED_EXTENSIONS)}"
             )
         
-        # Verifica tamanho
-        file.file.seek(0, os.SEEK_END)
-        size = file.file.tell()
-        file.file.seek(0)
+        # Tamanho conhecido do multipart dispensa seek; sem ele, o limite
+        # é aplicado durante a leitura (ver _read_chunks)
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise self._too_large()
         
-        if size > settings.MAX_FILE_SIZE:
-            size_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
-            raise FileValidationError(
-                f"Arquivo muito grande. Tamanho máximo: {size_mb}MB"
-            )
-        
-        logger.info(f"Arquivo validado: {file.filename} ({size} bytes)")
+        logger.info(f"Arquivo validado: {file.filename}")
     
-    async def extract_text(self, file: UploadFile) -> str:
+    async def extract_text(self, file: UploadFile, budget: Optional[int] = None) -> str:
         """
         Extrai texto do arquivo
         
         Args:
             file: Arquivo enviado
+            budget: Máximo de caracteres úteis a extrair; a leitura para assim
+                que o orçamento é atingido (None extrai o arquivo inteiro)
         
         Returns:
             Texto extraído
@@ -72,13 +71,14 @@ class FileService:
         
         try:
             if filename.endswith('.txt'):
-                content = await file.read()
-                text = content.decode('utf-8')
+                with telemetry.timer("extract_txt"):
+                    text = await self._extract_from_txt(file, budget)
                 logger.info(f"Texto extraído de TXT: {len(text)} caracteres")
                 return text
             
             elif filename.endswith('.pdf'):
-                text = await self._extract_from_pdf(file)
+                with telemetry.timer("extract_pdf"):
+                    text = await self._extract_from_pdf(file, budget)
                 logger.info(f"Texto extraído de PDF: {len(text)} caracteres")
                 return text
             
@@ -88,45 +88,154 @@ class FileService:
         except UnicodeDecodeError:
             raise FileValidationError("Erro ao decodificar arquivo. Verifique a codificação.")
         
+        except FileValidationError:
+            raise
+        
         except Exception as e:
             logger.error(f"Erro ao extrair texto: {e}")
             raise FileValidationError(f"Erro ao processar arquivo: {str(e)}")
     
-    async def _extract_from_pdf(self, file: UploadFile) -> str:
+    async def read_upload(self, file: UploadFile) -> bytes:
         """
-        Extrai texto de PDF
+        Valida e lê o upload inteiro em memória (limitado por MAX_FILE_SIZE)
+        
+        Usado quando a extração ocorre depois da requisição (ex.: jobs).
+        
+        Raises:
+            FileValidationError: Se o arquivo for inválido ou grande demais
+        """
+        await self.validate_file(file)
+        return b"".join([chunk async for chunk in self._read_chunks(file)])
+    
+    async def extract_text_from_bytes(self, filename: str, data: bytes, budget: Optional[int] = None) -> str:
+        """
+        Extrai texto de um arquivo já lido (ver read_upload)
         
         Args:
-            file: Arquivo PDF
+            filename: Nome original do arquivo (define o formato)
+            data: Conteúdo do arquivo
+            budget: Máximo de caracteres úteis a extrair (None extrai tudo)
         
         Returns:
             Texto extraído
+        
+        Raises:
+            FileValidationError: Se não conseguir extrair texto
         """
-        content = ""
+        filename = filename.lower()
         
         try:
-            # Salvar temporariamente (pdfplumber precisa de arquivo)
-            temp_path = os.path.join(settings.UPLOAD_DIR, f"temp_{file.filename}")
+            if filename.endswith('.txt'):
+                with telemetry.timer("extract_txt"):
+                    # UTF-8 usa no máximo 4 bytes por caractere
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                    text = decoder.decode(data[:budget * 4] if budget else data, final=not budget)
+                    text = text[:budget] if budget else text
+                logger.info(f"Texto extraído de TXT: {len(text)} caracteres")
+                return text
+            
+            elif filename.endswith('.pdf'):
+                with telemetry.timer("extract_pdf"):
+                    text = await self._extract_pdf_bytes(data, budget)
+                logger.info(f"Texto extraído de PDF: {len(text)} caracteres")
+                return text
             
-            with open(temp_path, "wb") as f:
-                f.write(await file.read())
+            else:
+                raise FileValidationError("Formato de arquivo não suportado")
+        
+        except UnicodeDecodeError:
+            raise FileValidationError("Erro ao decodificar arquivo. Verifique a codificação.")
+        
+        except FileValidationError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Erro ao extrair texto: {e}")
+            raise FileValidationError(f"Erro ao processar arquivo: {str(e)}")
+    
+    async def _read_chunks(self, file: UploadFile):
+        """
+        Lê o upload em blocos, aplicando MAX_FILE_SIZE durante a leitura
+        
+        Raises:
+            FileValidationError: Se o arquivo exceder o tamanho máximo
+        """
+        size = 0
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
             
-            # Extrair texto
-            with pdfplumber.open(temp_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        content += page_text + "\n"
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                raise self._too_large()
+            yield chunk
+    
+    @staticmethod
+    def _too_large() -> FileValidationError:
+        size_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
+        return FileValidationError(f"Arquivo muito grande. Tamanho máximo: {size_mb}MB")
+    
+    async def _extract_from_txt(self, file: UploadFile, budget: Optional[int] = None) -> str:
+        """
+        Decodifica TXT (UTF-8) em streaming, parando ao atingir o orçamento
+        
+        Args:
+            file: Arquivo TXT
+            budget: Máximo de caracteres (None lê o arquivo inteiro)
+        
+        Returns:
+            Texto extraído
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        parts = []
+        length = 0
+        
+        chunks = self._read_chunks(file)
+        try:
+            async for chunk in chunks:
+                part = decoder.decode(chunk)
+                parts.append(part)
+                length += len(part)
+                
+                if budget and length >= budget:
+                    logger.info(f"Orçamento de extração atingido ({budget} caracteres)")
+                    return "".join(parts)[:budget]
             
-            # Remover arquivo temporário
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            parts.append(decoder.decode(b"", final=True))
+            return "".join(parts)
+        
+        finally:
+            await chunks.aclose()
+    
+    async def _extract_from_pdf(self, file: UploadFile, budget: Optional[int] = None) -> str:
+        """
+        Extrai texto de PDF
+        
+        Args:
+            file: Arquivo PDF
+            budget: Máximo de caracteres (None extrai todas as páginas)
+        
+        Returns:
+            Texto extraído
+        """
+        # O PDF precisa estar inteiro em memória (a tabela xref fica no fim)
+        data = b"".join([chunk async for chunk in self._read_chunks(file)])
+        return await self._extract_pdf_bytes(data, budget)
+    
+    async def _extract_pdf_bytes(self, data: bytes, budget: Optional[int] = None) -> str:
+        """Extrai texto de um PDF em memória, fora do event loop"""
+        try:
+            content = await self.pdf_extractor.extract(data, max_chars=budget)
             
             if not content.strip():
                 raise FileValidationError("PDF não contém texto extraível")
             
             return content
         
+        except FileValidationError:
+            raise
+        
         except Exception as e:
             logger.error(f"Erro ao extrair PDF: {e}")
             raise FileValidationError(f"Erro ao processar PDF: {str(e)}")
@@ -147,4 +256,8 @@ class FileService:
             f.write(file.file.read())
         
         logger.info(f"Arquivo salvo: {filepath}")
-        return filepath
\ No newline at end of file
+        return filepath
+    
+    def close(self) -> None:
+        """Encerra o pool de extração de PDF"""
+        self.pdf_extractor.close()
\ No newline at end of file
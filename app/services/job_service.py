@@ -0,0 +1,306 @@
+"""
+Processamento assíncrono de emails em jobs (fila limitada + workers)
+
+O envio retorna imediatamente um identificador; workers em segundo plano
+executam a extração (FileService) e a análise (ProcessingService) e o
+resultado fica disponível até JOB_RESULT_TTL segundos após a conclusão.
+
+Com um SharedStore (vários workers do gunicorn), a situação de cada job é
+gravada no banco compartilhado e pode ser consultada por qualquer processo.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional
+from app.core.config import settings
+from app.core.exceptions import FileValidationError, JobQueueFullError
+from app.core.logging_config import logger, request_id
+from app.core.telemetry import telemetry
+from app.services.file_service import FileService
+from app.services.processing_service import ProcessingService
+from app.services.text_processor import TextProcessor
+
+if TYPE_CHECKING:
+    from app.services.shared_store import SharedStore
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Intervalo de consulta ao SharedStore no long-poll de jobs de outro worker
+SHARED_POLL_INTERVAL = 0.25
+
+
+class Job:
+    """Estado de um job (entrada, situação e resultado)"""
+    
+    __slots__ = (
+        "id", "text", "filename", "data", "status", "result", "error",
+        "created_at", "started_at", "finished_at", "expires_at", "finished"
+    )
+    
+    def __init__(self, text: Optional[str] = None, filename: Optional[str] = None, data: Optional[bytes] = None):
+        self.id = uuid.uuid4().hex
+        self.text = text
+        self.filename = filename
+        self.data = data
+        self.status = QUEUED
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.expires_at: Optional[float] = None
+        self.finished = asyncio.Event()
+    
+    def to_dict(self) -> Dict:
+        """Representação retornada pela API"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "expires_at": self.expires_at
+        }
+
+
+class JobService:
+    """Fila limitada de jobs processada por um pool de workers"""
+    
+    def __init__(
+        self,
+        file_service: FileService,
+        processing_service: ProcessingService,
+        text_processor: TextProcessor,
+        store: Optional["SharedStore"] = None
+    ):
+        self.file_service = file_service
+        self.processing_service = processing_service
+        self.text_processor = text_processor
+        self.store = store
+        
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._next_purge = 0.0
+        self._reserved = 0
+        self._stats = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "expired": 0}
+        logger.info("JobService inicializado")
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+    
+    async def start(self) -> None:
+        """Cria a fila e inicia os workers"""
+        self._queue = asyncio.Queue(maxsize=settings.JOB_QUEUE_SIZE)
+        self._workers = [
+            asyncio.create_task(self._worker(index))
+            for index in range(settings.JOB_WORKERS)
+        ]
+        logger.info(f"JobService iniciado ({settings.JOB_WORKERS} workers, fila {settings.JOB_QUEUE_SIZE})")
+    
+    async def aclose(self) -> None:
+        """
+        Encerra os workers
+        
+        Novos envios são recusados; jobs já enfileirados têm até
+        JOB_SHUTDOWN_TIMEOUT segundos para terminar (reciclagem de workers do
+        gunicorn) e os restantes são marcados como interrompidos.
+        """
+        workers, self._workers = self._workers, []
+        if workers and self._queue is not None and settings.JOB_SHUTDOWN_TIMEOUT > 0:
+            try:
+                await asyncio.wait_for(self._queue.join(), settings.JOB_SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("JobService encerrado com jobs pendentes")
+        
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        for job in self._jobs.values():
+            if job.status == QUEUED:
+                self._finish(job, FAILED, error="Processamento interrompido")
+                self._save(job)
+        logger.info("JobService encerrado")
+    
+    async def submit(self, text: Optional[str] = None, filename: Optional[str] = None, data: Optional[bytes] = None) -> Job:
+        """
+        Enfileira um email (texto ou arquivo já lido)
+        
+        Raises:
+            JobQueueFullError: Se a fila (ou o limite de jobs guardados) estiver cheia
+        """
+        self._purge_expired()
+        
+        # Vagas reservadas por envios aguardando a gravação no SharedStore
+        if (
+            self._queue.qsize() + self._reserved >= settings.JOB_QUEUE_SIZE
+            or len(self._jobs) + self._reserved >= settings.JOB_MAX_STORED
+        ):
+            self._stats["rejected"] += 1
+            telemetry.inc("jobs_total", status="rejected")
+            raise JobQueueFullError("Fila de processamento cheia. Tente novamente em instantes.")
+        
+        job = Job(text=text, filename=filename, data=data)
+        
+        # Gravado antes de enfileirar: as gravações do worker (running/done)
+        # sempre chegam depois da situação inicial
+        self._reserved += 1
+        try:
+            await self._save_async(job)
+        finally:
+            self._reserved -= 1
+        
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._stats["submitted"] += 1
+        telemetry.inc("jobs_total", status="submitted")
+        return job
+    
+    async def get(self, job_id: str, wait: float = 0.0) -> Optional[Dict]:
+        """
+        Retorna o job, aguardando até `wait` segundos pela conclusão (long-poll)
+        
+        Jobs de outros workers são lidos do SharedStore, consultado a cada
+        SHARED_POLL_INTERVAL segundos durante a espera.
+        
+        Returns:
+            Job (Job.to_dict) ou None se inexistente/expirado
+        """
+        self._purge_expired()
+        wait = min(wait, settings.JOB_MAX_WAIT)
+        
+        job = self._jobs.get(job_id)
+        if job is not None:
+            if wait > 0 and not job.finished.is_set():
+                try:
+                    await asyncio.wait_for(job.finished.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            return job.to_dict()
+        
+        if self.store is None:
+            return None
+        
+        deadline = time.monotonic() + wait
+        while True:
+            shared = await asyncio.to_thread(self.store.get_job, job_id)
+            if shared is None or shared["status"] in (DONE, FAILED) or time.monotonic() >= deadline:
+                return shared
+            await asyncio.sleep(min(SHARED_POLL_INTERVAL, deadline - time.monotonic()))
+    
+    def stats(self) -> Dict:
+        """Retorna tamanho da fila e contadores de jobs"""
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            **self._stats,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": statuses.count(RUNNING),
+            "stored": len(self._jobs),
+            "queue_size": settings.JOB_QUEUE_SIZE,
+            "workers": len(self._workers)
+        }
+    
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro inesperado no worker de jobs {index}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: Job) -> None:
+        """Executa o pipeline de /process para o job"""
+        request_id.set(job.id)  # logs do job identificados pelo job_id
+        job.status = RUNNING
+        job.started_at = time.time()
+        telemetry.observe("job_queue", job.started_at - job.created_at)
+        await self._save_async(job)
+        
+        try:
+            with telemetry.timer("job"):
+                if job.filename:
+                    content = await self.file_service.extract_text_from_bytes(
+                        job.filename, job.data, budget=settings.EXTRACTION_BUDGET_CHARS or None
+                    )
+                else:
+                    content = job.text
+                
+                if not content or not content.strip():
+                    raise FileValidationError("Não foi possível extrair conteúdo")
+                
+                analysis = await self.processing_service.analyze(content)
+            
+            self._finish(job, DONE, result={
+                "category": analysis["category"],
+                "response": analysis["response"],
+                "confidence": analysis["confidence"],
+                "method": analysis["method"],
+                "content_preview": self.text_processor.truncate(content, 200)
+            })
+        
+        except FileValidationError as e:
+            self._finish(job, FAILED, error=str(e))
+        
+        except asyncio.CancelledError:
+            self._finish(job, FAILED, error="Processamento interrompido")
+            self._save(job)
+            raise
+        
+        except Exception as e:
+            logger.error(f"Erro ao processar job {job.id}: {e}")
+            self._finish(job, FAILED, error="Erro ao processar email")
+        
+        await self._save_async(job)
+    
+    def _finish(self, job: Job, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        """Registra a conclusão do job e libera a entrada"""
+        job.status = status
+        job.result = result
+        job.error = error
+        job.data = None  # libera o arquivo
+        job.text = None
+        job.finished_at = time.time()
+        job.expires_at = job.finished_at + settings.JOB_RESULT_TTL
+        job.finished.set()
+        self._stats[status] += 1
+        telemetry.inc("jobs_total", status=status)
+    
+    def _save(self, job: Job) -> None:
+        """Grava a situação do job no SharedStore (se houver)"""
+        if self.store is None:
+            return
+        try:
+            self.store.save_job(job.to_dict())
+        except Exception as e:
+            logger.error(f"Erro ao gravar job {job.id} no estado compartilhado: {e}")
+    
+    async def _save_async(self, job: Job) -> None:
+        if self.store is not None:
+            await asyncio.to_thread(self._save, job)
+    
+    def _purge_expired(self) -> None:
+        """Remove jobs concluídos há mais de JOB_RESULT_TTL (no máximo 1x por segundo)"""
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + 1.0
+        
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.expires_at is not None and job.expires_at <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._stats["expired"] += len(expired)
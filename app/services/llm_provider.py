@@ -0,0 +1,476 @@
+"""
+Camada de provedores de LLM: vários endpoints OpenAI-compatíveis com pesos,
+requisições hedged e failover
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+from app.core.config import settings
+from app.core.exceptions import AIServiceError, CircuitOpenError
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.utils.circuit_breaker import CircuitBreaker
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# Amostras mínimas de latência antes de usar o quantil como atraso do hedge
+MIN_HEDGE_SAMPLES = 20
+
+
+class EndpointStats:
+    """Latência (janela deslizante por tipo de chamada) e contadores de um endpoint"""
+    
+    def __init__(self, window: int):
+        self.window = window
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.hedges_won = 0
+    
+    def record(self, call: str, seconds: float, ok: bool) -> None:
+        if ok:
+            self.successes += 1
+            self._add_latency(call, seconds)
+        else:
+            self.failures += 1
+    
+    def record_cancelled(self, call: str, seconds: float) -> None:
+        """
+        Tempo até o cancelamento (ex.: perdeu o hedge) entra na janela de
+        latência: sem ele o quantil só veria as chamadas que venceram
+        """
+        self._add_latency(call, seconds)
+    
+    def _add_latency(self, call: str, seconds: float) -> None:
+        samples = self.latencies.get(call)
+        if samples is None:
+            samples = self.latencies[call] = deque(maxlen=self.window)
+        samples.append(seconds)
+    
+    def quantile(self, call: str, q: float) -> Optional[float]:
+        """Quantil da latência recente da chamada (None com poucas amostras)"""
+        samples = self.latencies.get(call)
+        if not samples or len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def snapshot(self) -> Dict:
+        total = self.successes + self.failures
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "error_rate": round(self.failures / total, 4) if total else 0.0,
+            "cancelled": self.cancelled,
+            "hedges_won": self.hedges_won,
+            "latency_p50": {call: self.quantile(call, 0.5) for call in self.latencies},
+            "latency_p95": {call: self.quantile(call, 0.95) for call in self.latencies},
+        }
+
+
+class LLMEndpoint:
+    """Endpoint OpenAI-compatível (URL, chave, modelo e peso na seleção)"""
+    
+    def __init__(self, name: str, base_url: str, api_key: str, model: str, weight: float = 1.0):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.weight = max(float(weight), 0.0)
+        self.stats = EndpointStats(settings.LLM_STATS_WINDOW)
+        self.breaker: Optional[CircuitBreaker] = None
+        if settings.AI_BREAKER_ENABLED:
+            self.breaker = CircuitBreaker(
+                name=f"llm:{name}",
+                window=settings.AI_BREAKER_WINDOW,
+                min_calls=settings.AI_BREAKER_MIN_CALLS,
+                failure_rate=settings.AI_BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.AI_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate=settings.AI_BREAKER_SLOW_CALL_RATE,
+                open_seconds=settings.AI_BREAKER_OPEN_SECONDS,
+                half_open_probes=settings.AI_BREAKER_HALF_OPEN_PROBES
+            )
+        
+        self._client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def client(self) -> "OpenAI":
+        if self._client is None:
+            self._create_clients()
+        return self._client
+    
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        if self._async_client is None:
+            self._create_clients()
+        return self._async_client
+    
+    def _create_clients(self) -> None:
+        """Cria os clientes (síncrono e assíncrono com pool keep-alive)"""
+        if not self.api_key:
+            raise AIServiceError(f"Endpoint '{self.name}' sem chave de API")
+        
+        with self._lock:
+            if self._async_client is not None:
+                return
+            
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI
+            
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=settings.AI_TIMEOUT,
+                max_retries=settings.AI_MAX_RETRIES
+            )
+            
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=settings.AI_TIMEOUT,
+                max_retries=settings.AI_MAX_RETRIES,
+                http_client=DefaultAsyncHttpxClient(
+                    timeout=settings.AI_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=settings.AI_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.AI_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=settings.AI_KEEPALIVE_EXPIRY
+                    )
+                )
+            )
+    
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+        if self._client is not None:
+            self._client.close()
+
+
+class LLMProvider:
+    """
+    Distribui chamadas de chat completion entre endpoints
+    
+    O endpoint primário é sorteado pelos pesos. Se ele não responder dentro
+    do atraso de hedge (quantil LLM_HEDGE_QUANTILE da sua latência recente
+    para o mesmo tipo de chamada), uma segunda requisição vai para outro
+    endpoint; a primeira resposta bem-sucedida vence e a mais lenta é
+    cancelada. Hedges são limitados a LLM_HEDGE_MAX_RATIO das requisições.
+    Falhas recorrem ao próximo endpoint (failover). Endpoints com o circuit
+    breaker aberto são ignorados; se todos estiverem abertos, a chamada falha
+    imediatamente com CircuitOpenError.
+    """
+    
+    def __init__(self, endpoints: List[LLMEndpoint]):
+        if not endpoints:
+            raise ValueError("Nenhum endpoint de LLM configurado")
+        
+        self.endpoints = endpoints
+        self._random = random.Random()
+        self._requests = 0
+        self._hedges = 0
+        
+        logger.info(f"LLMProvider com {len(endpoints)} endpoint(s): {', '.join(e.name for e in endpoints)}")
+    
+    @classmethod
+    def from_settings(cls) -> "LLMProvider":
+        """Cria os endpoints de settings.LLM_ENDPOINTS (ou de DEEPSEEK_* se vazio)"""
+        configs: List[Dict[str, Any]] = settings.LLM_ENDPOINTS or [{"name": "deepseek"}]
+        
+        endpoints = []
+        for index, config in enumerate(configs):
+            endpoints.append(LLMEndpoint(
+                name=config.get("name") or f"endpoint-{index}",
+                base_url=config.get("base_url") or settings.DEEPSEEK_BASE_URL,
+                api_key=config.get("api_key") or settings.DEEPSEEK_API_KEY,
+                model=config.get("model") or settings.AI_MODEL,
+                weight=config.get("weight", 1.0)
+            ))
+        return cls(endpoints)
+    
+    @property
+    def configured(self) -> bool:
+        """Há ao menos um endpoint com chave de API"""
+        return any(endpoint.api_key for endpoint in self.endpoints)
+    
+    @property
+    def available(self) -> bool:
+        """Há ao menos um endpoint com o circuito fechado ou em sondagem"""
+        return any(endpoint.breaker is None or endpoint.breaker.available() for endpoint in self.endpoints)
+    
+    def circuit_states(self) -> Dict[str, str]:
+        """Estado do circuit breaker de cada endpoint"""
+        return {
+            endpoint.name: endpoint.breaker.state if endpoint.breaker else "disabled"
+            for endpoint in self.endpoints
+        }
+    
+    def warm_up(self) -> None:
+        """Importa o SDK e cria os clientes antecipadamente"""
+        for endpoint in self.endpoints:
+            if endpoint.api_key:
+                endpoint._create_clients()
+    
+    async def create(self, call: str, **kwargs):
+        """
+        Executa chat completion com hedge e failover
+        
+        Args:
+            call: Tipo de chamada (classify, respond, combined...), usado nas estatísticas
+            **kwargs: Parâmetros de chat.completions.create (exceto model)
+        
+        Returns:
+            Resposta da primeira tentativa bem-sucedida
+        
+        Raises:
+            CircuitOpenError: Se todos os circuitos estiverem abertos
+            Exception: Erro da última tentativa se todos os endpoints falharem
+        """
+        self._requests += 1
+        order = self._order()
+        primary = order[0]
+        backups = iter(order[1:])
+        
+        pending: Dict[asyncio.Task, LLMEndpoint] = {
+            asyncio.create_task(self._attempt(primary, call, kwargs)): primary
+        }
+        hedge_delay = self._hedge_delay(primary, call)
+        hedged = False
+        last_error: Optional[BaseException] = None
+        
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # Primário lento: dispara o hedge (uma única vez, dentro do orçamento)
+                    hedge_delay = None
+                    backup = next(backups, None) if self._hedge_allowed() else None
+                    if backup is not None:
+                        hedged = True
+                        self._hedges += 1
+                        telemetry.inc("llm_hedges_total", call=call)
+                        pending[asyncio.create_task(self._attempt(backup, call, kwargs))] = backup
+                    continue
+                
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and endpoint is not primary:
+                            endpoint.stats.hedges_won += 1
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"Falha no endpoint {endpoint.name}: {last_error}")
+                
+                # Sem tentativa em andamento: failover para o próximo endpoint
+                if not pending:
+                    hedge_delay = None
+                    backup = next(backups, None)
+                    if backup is not None:
+                        telemetry.inc("llm_failovers_total", call=call)
+                        pending[asyncio.create_task(self._attempt(backup, call, kwargs))] = backup
+        
+        finally:
+            # Cancela a tentativa mais lenta (ou todas, se o chamador foi cancelado)
+            for task, endpoint in pending.items():
+                task.cancel()
+                endpoint.stats.cancelled += 1
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        raise last_error
+    
+    def create_sync(self, call: str, **kwargs):
+        """Versão síncrona de create (apenas failover, sem hedge)"""
+        self._requests += 1
+        last_error: Optional[BaseException] = None
+        
+        for endpoint in self._order():
+            if not self._acquire(endpoint):
+                last_error = CircuitOpenError(f"Circuito aberto: {endpoint.name}")
+                continue
+            
+            started = time.perf_counter()
+            try:
+                response = endpoint.client.chat.completions.create(model=endpoint.model, **kwargs)
+            except Exception as e:
+                self._record(endpoint, call, time.perf_counter() - started, ok=False)
+                logger.warning(f"Falha no endpoint {endpoint.name}: {e}")
+                last_error = e
+                continue
+            
+            self._record(endpoint, call, time.perf_counter() - started, ok=True)
+            return response
+        
+        raise last_error
+    
+    async def open_stream(self, call: str, **kwargs):
+        """
+        Abre um stream de chat completion, com failover enquanto nenhum
+        conteúdo foi entregue
+        
+        O resultado no endpoint (estatísticas e circuit breaker) é registrado
+        quando a iteração termina: erro ou travamento (timeout de leitura) no
+        meio do stream contam como falha.
+        
+        Returns:
+            Iterador assíncrono sobre os chunks do stream do SDK
+        """
+        self._requests += 1
+        last_error: Optional[BaseException] = None
+        
+        for endpoint in self._order():
+            if not self._acquire(endpoint):
+                last_error = CircuitOpenError(f"Circuito aberto: {endpoint.name}")
+                continue
+            
+            started = time.perf_counter()
+            try:
+                stream = await endpoint.async_client.chat.completions.create(
+                    model=endpoint.model, stream=True, **kwargs
+                )
+            except Exception as e:
+                self._record(endpoint, call, time.perf_counter() - started, ok=False)
+                logger.warning(f"Falha ao abrir stream no endpoint {endpoint.name}: {e}")
+                last_error = e
+                continue
+            
+            return self._recorded_stream(endpoint, call, stream, started)
+        
+        raise last_error
+    
+    async def _recorded_stream(self, endpoint: LLMEndpoint, call: str, stream, started: float):
+        """Repassa os chunks e registra o resultado do stream ao final"""
+        outcome = "cancelled"  # consumidor parou de iterar antes do fim
+        try:
+            async for chunk in stream:
+                yield chunk
+            outcome = "ok"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            outcome = "error"
+            logger.warning(f"Falha no meio do stream no endpoint {endpoint.name}: {e}")
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            if outcome == "cancelled":
+                self._record_cancelled(endpoint, call, seconds)
+                await stream.close()
+            else:
+                self._record(endpoint, call, seconds, ok=outcome == "ok")
+    
+    def stats(self) -> Dict:
+        """Estatísticas por endpoint e taxa de hedge"""
+        return {
+            "requests": self._requests,
+            "hedges": self._hedges,
+            "hedge_ratio": round(self._hedges / self._requests, 4) if self._requests else 0.0,
+            "endpoints": {
+                endpoint.name: dict(
+                    endpoint.stats.snapshot(),
+                    circuit=endpoint.breaker.snapshot() if endpoint.breaker else None
+                )
+                for endpoint in self.endpoints
+            }
+        }
+    
+    async def aclose(self) -> None:
+        for endpoint in self.endpoints:
+            await endpoint.aclose()
+    
+    async def _attempt(self, endpoint: LLMEndpoint, call: str, kwargs: Dict):
+        """Uma tentativa em um endpoint, registrando latência e erros"""
+        if not self._acquire(endpoint):
+            raise CircuitOpenError(f"Circuito aberto: {endpoint.name}")
+        
+        started = time.perf_counter()
+        try:
+            response = await endpoint.async_client.chat.completions.create(model=endpoint.model, **kwargs)
+        except asyncio.CancelledError:
+            self._record_cancelled(endpoint, call, time.perf_counter() - started)
+            raise
+        except Exception:
+            self._record(endpoint, call, time.perf_counter() - started, ok=False)
+            raise
+        
+        self._record(endpoint, call, time.perf_counter() - started, ok=True)
+        return response
+    
+    @staticmethod
+    def _acquire(endpoint: LLMEndpoint) -> bool:
+        """Reserva a chamada no circuit breaker do endpoint"""
+        return endpoint.breaker is None or endpoint.breaker.allow()
+    
+    def _record(self, endpoint: LLMEndpoint, call: str, seconds: float, ok: bool) -> None:
+        endpoint.stats.record(call, seconds, ok)
+        if endpoint.breaker is not None:
+            endpoint.breaker.record(seconds, ok)
+        telemetry.inc(
+            "llm_endpoint_requests_total",
+            endpoint=endpoint.name,
+            outcome="success" if ok else "error"
+        )
+    
+    def _record_cancelled(self, endpoint: LLMEndpoint, call: str, seconds: float) -> None:
+        """Chamada cancelada: latência e lentidão registradas, sem contar como erro"""
+        endpoint.stats.record_cancelled(call, seconds)
+        if endpoint.breaker is not None:
+            endpoint.breaker.record_cancelled(seconds)
+        telemetry.inc("llm_endpoint_requests_total", endpoint=endpoint.name, outcome="cancelled")
+    
+    def _order(self) -> List[LLMEndpoint]:
+        """
+        Ordem de tentativa: sorteio ponderado pelos pesos, sem reposição
+        
+        Raises:
+            AIServiceError: Se nenhum endpoint tiver chave de API
+            CircuitOpenError: Se todos os endpoints estiverem com o circuito aberto
+        """
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.api_key]
+        if not candidates:
+            raise AIServiceError("Nenhum endpoint de IA configurado")
+        candidates = [
+            endpoint for endpoint in candidates
+            if endpoint.breaker is None or endpoint.breaker.available()
+        ]
+        if not candidates:
+            raise CircuitOpenError("Circuito aberto em todos os endpoints de IA")
+        if len(candidates) == 1:
+            return candidates
+        
+        order = []
+        while candidates:
+            weights = [endpoint.weight for endpoint in candidates]
+            if not any(weights):
+                order.extend(candidates)
+                break
+            chosen = self._random.choices(candidates, weights=weights)[0]
+            order.append(chosen)
+            candidates.remove(chosen)
+        return order
+    
+    def _hedge_allowed(self) -> bool:
+        """Orçamento: limita o custo extra das requisições duplicadas"""
+        return self._hedges < settings.LLM_HEDGE_MAX_RATIO * self._requests
+    
+    def _hedge_delay(self, endpoint: LLMEndpoint, call: str) -> Optional[float]:
+        """Atraso até o hedge, ou None se o hedge não se aplica"""
+        if not settings.LLM_HEDGING_ENABLED or len(self.endpoints) < 2:
+            return None
+        
+        delay = endpoint.stats.quantile(call, settings.LLM_HEDGE_QUANTILE)
+        if delay is None:
+            delay = settings.LLM_HEDGE_DELAY
+        return max(delay, settings.LLM_HEDGE_MIN_DELAY)
@@ -0,0 +1,320 @@
+"""
+Classificador local treinado com o feedback dos usuários
+
+Modelo Naive Bayes multinomial sobre os tokens de TextProcessor.preprocess,
+com log-probabilidades pré-calculadas: a predição é apenas uma soma de
+consultas em dicionário. Usado como primeira camada antes da IA remota.
+
+O Naive Bayes cru satura em ~1.0 com emails de tamanho comum, então a
+confiança vem da margem média por token calibrada (Platt) em uma parte do
+feedback separada do treino. O texto é limitado a FEEDBACK_TEXT_MAX_CHARS
+no treino e na predição, como é guardado no feedback.
+
+Retreino:
+    python -m app.services.local_classifier
+"""
+
+import json
+import math
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.services.text_processor import TextProcessor
+
+CATEGORIES = ["Produtivo", "Improdutivo"]
+
+MODEL_VERSION = 2
+
+
+def _sigmoid(x: float) -> float:
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+class LocalClassifier:
+    """Classificador Naive Bayes leve com recarga automática do modelo"""
+    
+    def __init__(self, text_processor: Optional[TextProcessor] = None):
+        self.text_processor = text_processor or TextProcessor()
+        self.model_path = settings.LOCAL_MODEL_FILE
+        self.model: Optional[Dict] = None
+        self._model_mtime: Optional[float] = None
+        self._next_reload_check = 0.0
+        
+        self.load()
+        logger.info("LocalClassifier inicializado")
+    
+    @staticmethod
+    def label_from_feedback(row: Dict) -> Optional[str]:
+        """Extrai o rótulo verdadeiro de uma linha de feedback"""
+        if row.get("feedback_type") == "incorrect":
+            label = row.get("correction")
+        else:
+            label = row.get("predicted")
+        return label if label in CATEGORIES else None
+    
+    def train(self, rows: Iterable[Dict], workers: Optional[int] = None) -> Dict:
+        """
+        Treina o modelo a partir das linhas de feedback
+        
+        Args:
+            rows: Linhas com original_text, predicted, feedback_type e correction
+            workers: Processos para o pré-processamento (ver preprocess_many)
+        
+        Returns:
+            Estatísticas do treino
+        
+        Raises:
+            ValueError: Se não houver exemplos suficientes
+        """
+        labels = []
+        texts = []
+        for row in rows:
+            label = self.label_from_feedback(row)
+            text = row.get("original_text")
+            if label and isinstance(text, str) and text.strip():
+                labels.append(label)
+                texts.append(text[:settings.FEEDBACK_TEXT_MAX_CHARS])
+        
+        # Textos sem nenhum token útil ("ok", só stopwords) não entram no modelo
+        examples = [
+            (label, tokens)
+            for label, tokens in zip(labels, self.text_processor.preprocess_many(texts, workers=workers))
+            if tokens
+        ]
+        
+        doc_counts = Counter(label for label, _ in examples)
+        total_docs = sum(doc_counts.values())
+        if total_docs < settings.LOCAL_MODEL_MIN_SAMPLES or len(doc_counts) < len(CATEGORIES):
+            raise ValueError(
+                f"Exemplos insuficientes para treino ({dict(doc_counts)}); "
+                f"mínimo {settings.LOCAL_MODEL_MIN_SAMPLES} com as duas categorias"
+            )
+        
+        # Calibração: modelo treinado sem a parte separada, avaliado nela
+        step = round(1 / settings.LOCAL_MODEL_CALIBRATION_FRACTION) if settings.LOCAL_MODEL_CALIBRATION_FRACTION > 0 else 0
+        held_out = [example for index, example in enumerate(examples) if step and index % step == 0]
+        calibration = None
+        if len(held_out) >= settings.LOCAL_MODEL_MIN_CALIBRATION and len({label for label, _ in held_out}) == len(CATEGORIES):
+            partial = self._fit([example for index, example in enumerate(examples) if index % step != 0])
+            margins = [self._margin(partial, tokens) for _, tokens in held_out]
+            calibration = self._fit_platt(margins, [label == CATEGORIES[0] for label, _ in held_out])
+        else:
+            logger.warning("Feedback insuficiente para calibrar o modelo local: a IA não será dispensada")
+        
+        self.model = {
+            "version": MODEL_VERSION,
+            "trained_at": datetime.now().isoformat(),
+            "samples": dict(doc_counts),
+            **self._fit(examples),
+            "calibration": calibration
+        }
+        
+        stats = {
+            "samples": dict(doc_counts),
+            "vocab_size": self.model["vocab_size"],
+            "calibration_samples": len(held_out) if calibration else 0
+        }
+        logger.info(f"Modelo local treinado: {stats}")
+        return stats
+    
+    @staticmethod
+    def _fit(examples: List[Tuple[str, List[str]]]) -> Dict:
+        """Contagens e log-probabilidades do Naive Bayes para (rótulo, tokens)"""
+        doc_counts = Counter(label for label, _ in examples)
+        token_counts = {category: Counter() for category in CATEGORIES}
+        for label, tokens in examples:
+            token_counts[label].update(tokens)
+        total_docs = sum(doc_counts.values())
+        
+        vocabulary = set()
+        for counts in token_counts.values():
+            vocabulary.update(counts)
+        vocab_size = len(vocabulary) + 1
+        
+        # Suavização de Laplace com log-probabilidades pré-calculadas
+        log_prior = {}
+        log_likelihood = {}
+        log_unknown = {}
+        for category in CATEGORIES:
+            total_tokens = sum(token_counts[category].values())
+            denominator = math.log(total_tokens + vocab_size)
+            # Categoria ausente na parte de treino da calibração: prior mínimo
+            log_prior[category] = math.log(max(doc_counts[category], 0.5) / total_docs)
+            log_likelihood[category] = {
+                token: math.log(count + 1) - denominator
+                for token, count in token_counts[category].items()
+            }
+            log_unknown[category] = -denominator
+        
+        return {
+            "vocab_size": vocab_size,
+            "log_prior": log_prior,
+            "log_likelihood": log_likelihood,
+            "log_unknown": log_unknown
+        }
+    
+    @staticmethod
+    def _margin(model: Dict, tokens: List[str]) -> float:
+        """
+        Diferença média por token entre as log-probabilidades das categorias
+        
+        Positiva favorece CATEGORIES[0]; a média (e não a soma) mantém a
+        escala independente do tamanho do email.
+        """
+        if not tokens:
+            return 0.0
+        
+        scores = []
+        for category in CATEGORIES:
+            likelihood = model["log_likelihood"][category]
+            unknown = model["log_unknown"][category]
+            scores.append(model["log_prior"][category] + sum(
+                likelihood.get(token, unknown) for token in tokens
+            ))
+        return (scores[0] - scores[1]) / len(tokens)
+    
+    @staticmethod
+    def _fit_platt(margins: List[float], positives: List[bool], iterations: int = 100) -> Dict:
+        """
+        Ajusta P(CATEGORIES[0]) = 1 / (1 + exp(-(a * margem + b))) por Newton
+        
+        Usa os alvos suavizados de Platt para não superestimar a confiança
+        com poucos exemplos; a margem é limitada à faixa vista na calibração
+        (sem extrapolar para emails mais extremos que os avaliados).
+        """
+        n_pos = sum(positives)
+        n_neg = len(positives) - n_pos
+        targets = [
+            (n_pos + 1) / (n_pos + 2) if positive else 1 / (n_neg + 2)
+            for positive in positives
+        ]
+        
+        a, b = 1.0, 0.0
+        for _ in range(iterations):
+            g_a = g_b = h_aa = h_ab = h_bb = 0.0
+            for margin, target in zip(margins, targets):
+                p = _sigmoid(a * margin + b)
+                w = max(p * (1 - p), 1e-12)
+                g_a += (p - target) * margin
+                g_b += p - target
+                h_aa += w * margin * margin
+                h_ab += w * margin
+                h_bb += w
+            h_aa += 1e-6
+            h_bb += 1e-6
+            det = h_aa * h_bb - h_ab * h_ab
+            if det <= 0:
+                break
+            step_a = (h_bb * g_a - h_ab * g_b) / det
+            step_b = (h_aa * g_b - h_ab * g_a) / det
+            a, b = a - step_a, b - step_b
+            if abs(step_a) < 1e-9 and abs(step_b) < 1e-9:
+                break
+        
+        return {"a": a, "b": b, "min_margin": min(margins), "max_margin": max(margins)}
+    
+    def save(self) -> None:
+        """Persiste o modelo de forma atômica (arquivo temporário + rename)"""
+        if self.model is None:
+            raise ValueError("Nenhum modelo treinado para salvar")
+        
+        directory = os.path.dirname(self.model_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        temp_path = f"{self.model_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.model, f, ensure_ascii=False)
+        os.replace(temp_path, self.model_path)
+        
+        self._model_mtime = os.path.getmtime(self.model_path)
+        logger.info(f"Modelo local salvo em {self.model_path}")
+    
+    def load(self) -> bool:
+        """
+        Carrega o modelo do disco, se existir
+        
+        Returns:
+            True se um modelo válido foi carregado
+        """
+        try:
+            mtime = os.path.getmtime(self.model_path)
+            with open(self.model_path, encoding="utf-8") as f:
+                model = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Erro ao carregar modelo local: {e}")
+            return False
+        
+        if model.get("version") != MODEL_VERSION:
+            logger.warning("Versão do modelo local incompatível, ignorando")
+            return False
+        
+        self.model = model
+        self._model_mtime = mtime
+        logger.info(f"Modelo local carregado ({model.get('trained_at')})")
+        return True
+    
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Classifica o texto com o modelo local
+        
+        Args:
+            text: Conteúdo do email
+        
+        Returns:
+            Tupla (categoria, confiança calibrada) ou None se não houver
+            modelo calibrado
+        """
+        self._reload_if_changed()
+        
+        model = self.model
+        if model is None or not model.get("calibration"):
+            return None
+        
+        # Mesmo recorte do texto usado no treino (feedback guardado)
+        tokens = self.text_processor.preprocess_tokens(text[:settings.FEEDBACK_TEXT_MAX_CHARS])
+        if not tokens:
+            return None
+        
+        calibration = model["calibration"]
+        margin = min(max(self._margin(model, tokens), calibration["min_margin"]), calibration["max_margin"])
+        p = _sigmoid(calibration["a"] * margin + calibration["b"])
+        return (CATEGORIES[0], p) if p >= 0.5 else (CATEGORIES[1], 1.0 - p)
+    
+    def _reload_if_changed(self) -> None:
+        """Recarrega o modelo se o arquivo mudou (verificação limitada por intervalo)"""
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + settings.LOCAL_MODEL_RELOAD_INTERVAL
+        
+        try:
+            mtime = os.path.getmtime(self.model_path)
+        except OSError:
+            return
+        
+        if mtime != self._model_mtime:
+            self.load()
+
+
+def retrain() -> Dict:
+    """Treina o modelo com o feedback atual e salva no disco"""
+    from app.services.feedback_service import FeedbackService
+    
+    classifier = LocalClassifier()
+    stats = classifier.train(FeedbackService().iter_feedbacks(), workers=os.cpu_count())
+    classifier.save()
+    return stats
+
+
+if __name__ == "__main__":
+    print(json.dumps(retrain(), ensure_ascii=False))
@@ -0,0 +1,215 @@
+"""
+Extração de texto de PDF fora do event loop, em pool de processos reciclável
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.exceptions import FileValidationError
+from app.core.logging_config import logger
+from app.utils.pdf_worker import extract_pages, init_worker
+
+
+class PdfExtractor:
+    """
+    Executa pdfplumber em um pool de processos dedicado
+    
+    - Documentos grandes têm as páginas divididas entre os workers
+    - O pool é reciclado após PDF_WORKER_MAX_DOCS documentos ou quando um
+      worker ultrapassa PDF_WORKER_MAX_RSS_MB; o pool antigo termina as
+      tarefas já enviadas enquanto as novas vão para o pool novo
+    - Cada documento tem limite de PDF_EXTRACTION_TIMEOUT segundos; no
+      timeout só os workers das tarefas desse documento são encerrados
+    """
+    
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._documents = 0
+        self._started_queue = None
+        self._task_pids: Dict[str, int] = {}
+        self._running: Set[str] = set()
+        logger.info("PdfExtractor inicializado")
+    
+    async def extract(self, data: bytes, max_chars: Optional[int] = None) -> str:
+        """
+        Extrai o texto de um PDF em memória
+        
+        Args:
+            data: Conteúdo binário do PDF
+            max_chars: Orçamento de caracteres; com ele as páginas são lidas em
+                sequência, parando ao atingir o limite (sem paralelismo)
+        
+        Returns:
+            Texto extraído (uma quebra de linha por página com texto)
+        
+        Raises:
+            FileValidationError: Em caso de timeout ou PDF inválido
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.PDF_EXTRACTION_TIMEOUT
+        
+        # Segunda tentativa: o pool foi substituído por falha de outro documento
+        for attempt in range(2):
+            executor = self._get_executor()
+            tasks: List[str] = []
+            try:
+                text = await asyncio.wait_for(
+                    self._extract_parallel(executor, data, max_chars, tasks),
+                    timeout=max(0.0, deadline - loop.time())
+                )
+                break
+            except asyncio.TimeoutError:
+                logger.error("Tempo limite excedido na extração de PDF; encerrando seus workers")
+                self._recycle(executor)
+                self._kill_tasks(tasks)
+                raise FileValidationError("Tempo limite excedido ao processar PDF")
+            except BrokenProcessPool:
+                self._discard_tasks(tasks)
+                if attempt == 0 and executor is not self._executor:
+                    logger.warning("Pool de extração de PDF substituído; repetindo no pool novo")
+                    continue
+                # Worker morto (ex.: falta de memória): o próximo documento usa um pool novo
+                logger.error("Pool de extração de PDF corrompido; reciclando workers")
+                self._recycle(executor)
+                raise FileValidationError("Falha no worker de extração de PDF")
+            except Exception:
+                self._discard_tasks(tasks)
+                raise
+        
+        self._documents += 1
+        if self._documents >= settings.PDF_WORKER_MAX_DOCS:
+            self._recycle(executor)
+        self._collect_started()
+        
+        return text
+    
+    async def _extract_parallel(
+        self,
+        executor: ProcessPoolExecutor,
+        data: bytes,
+        max_chars: Optional[int],
+        tasks: List[str]
+    ) -> str:
+        chunk = max(1, settings.PDF_PAGES_PER_TASK)
+        
+        # Com orçamento, um único worker lê as páginas em ordem até o limite
+        if max_chars:
+            text, _, rss = await self._run(executor, tasks, data, 0, None, max_chars)
+            results: List[Tuple[str, int, float]] = [(text, 0, rss)]
+            page_count = 0
+        else:
+            # A primeira tarefa também informa o total de páginas
+            first_text, page_count, rss = await self._run(executor, tasks, data, 0, chunk)
+            results = [(first_text, page_count, rss)]
+        
+        if page_count > chunk:
+            results += await asyncio.gather(*[
+                self._run(executor, tasks, data, start, start + chunk)
+                for start in range(chunk, page_count, chunk)
+            ])
+        
+        if max(result[2] for result in results) > settings.PDF_WORKER_MAX_RSS_MB:
+            logger.info("Worker de PDF acima do limite de memória; reciclando pool")
+            self._recycle(executor)
+        
+        text = "".join(result[0] for result in results)
+        return text[:max_chars] if max_chars else text
+    
+    async def _run(
+        self,
+        executor: ProcessPoolExecutor,
+        tasks: List[str],
+        data: bytes,
+        start: int,
+        end: Optional[int],
+        max_chars: Optional[int] = None
+    ) -> Tuple[str, int, float]:
+        """Executa extract_pages no pool, registrando a tarefa até terminar"""
+        task_id = uuid.uuid4().hex
+        tasks.append(task_id)
+        self._running.add(task_id)
+        result = await asyncio.get_running_loop().run_in_executor(
+            executor, extract_pages, data, start, end, max_chars, task_id
+        )
+        tasks.remove(task_id)
+        self._running.discard(task_id)
+        return result
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            if self._started_queue is None:
+                self._started_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_WORKERS,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(self._started_queue,)
+            )
+            self._documents = 0
+        return self._executor
+    
+    def _collect_started(self) -> None:
+        """Lê os avisos (tarefa, pid) dos workers, mantendo só os das tarefas em andamento"""
+        if self._started_queue is None:
+            return
+        while True:
+            try:
+                task_id, pid = self._started_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._task_pids[task_id] = pid
+        self._task_pids = {
+            task_id: pid for task_id, pid in self._task_pids.items() if task_id in self._running
+        }
+    
+    def _kill_tasks(self, tasks: List[str]) -> None:
+        """
+        Encerra os workers que executam as tarefas (presas) de um documento
+        
+        Tarefas ainda na fila já foram canceladas pelo timeout. O pool antigo
+        fica quebrado; documentos de outras requisições que estavam nele são
+        repetidos no pool novo (ver extract).
+        """
+        self._collect_started()
+        for task_id in tasks:
+            pid = self._task_pids.pop(task_id, None)
+            if pid is not None:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+        self._discard_tasks(tasks)
+    
+    def _discard_tasks(self, tasks: List[str]) -> None:
+        self._running.difference_update(tasks)
+        for task_id in tasks:
+            self._task_pids.pop(task_id, None)
+    
+    def _recycle(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        """
+        Substitui o pool; tarefas já enviadas terminam no pool antigo
+        
+        Args:
+            executor: Pool a reciclar (ignorado se já tiver sido substituído)
+        """
+        if executor is not None and executor is not self._executor:
+            return
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=False, cancel_futures=False)
+    
+    def close(self) -> None:
+        """Encerra o pool de processos"""
+        self._recycle()
+        if self._started_queue is not None:
+            self._started_queue.close()
+            self._started_queue = None
@@ -0,0 +1,224 @@
+"""
+Orquestração do processamento de emails (cache + quase-duplicatas + IA)
+"""
+
+import asyncio
+from array import array
+from typing import AsyncIterator, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.ai_service import AIService
+from app.services.cache_service import ResultCache
+from app.services.similarity_index import SimilarityIndex
+from app.utils.concurrency import SingleFlight
+
+# Métodos cujos resultados podem ser reutilizados (fallbacks são recalculados)
+CACHEABLE_METHODS = ("deepseek", "local-model")
+
+
+class ProcessingService:
+    """Pipeline de classificação e resposta usado pelas rotas"""
+    
+    def __init__(
+        self,
+        ai_service: AIService,
+        cache: Optional[ResultCache] = None,
+        similarity_index: Optional[SimilarityIndex] = None
+    ):
+        self.ai_service = ai_service
+        self.cache = cache
+        self.similarity_index = similarity_index
+        
+        # Requisições simultâneas com o mesmo conteúdo compartilham uma execução
+        self.single_flight: Optional[SingleFlight[Dict]] = (
+            SingleFlight("analyze") if settings.COALESCE_ENABLED else None
+        )
+        logger.info("ProcessingService inicializado")
+    
+    async def analyze(self, content: str) -> Dict:
+        """
+        Classifica o email e gera a resposta, reutilizando resultados em cache
+        ou de emails quase idênticos
+        
+        Args:
+            content: Conteúdo do email
+        
+        Returns:
+            Dicionário com category, confidence, method e response
+        """
+        if self.single_flight is None:
+            result = await self._analyze(content)
+        else:
+            result = await self.single_flight.do(
+                ResultCache.normalize(content), lambda: self._analyze(content)
+            )
+        
+        telemetry.record_classification(result["method"])
+        return dict(result)
+    
+    def coalescing_stats(self) -> Optional[Dict]:
+        """Contadores do agrupamento de requisições idênticas (None se desativado)"""
+        return self.single_flight.stats() if self.single_flight is not None else None
+    
+    async def _analyze(self, content: str) -> Dict:
+        """Executa o pipeline de analyze (cache, quase-duplicatas e IA)"""
+        key, cached = await self._lookup_cache(content)
+        if cached is not None:
+            return cached
+        
+        signature, similar = await self._lookup_similar(content)
+        if similar is not None:
+            if similar["response"] is None:
+                similar["response"] = await self.ai_service.generate_response_async(similar["category"], content)
+            return similar
+        
+        with telemetry.timer("analyze"):
+            category, confidence, method, response_text, default_response = (
+                await self.ai_service.analyze_email_async(content)
+            )
+        
+        result = {
+            "category": category,
+            "confidence": confidence,
+            "method": method,
+            "response": response_text
+        }
+        
+        # Resposta padrão (falha na geração) não é reutilizada
+        if not default_response:
+            await self._store_cache(key, signature, result)
+        
+        return result
+    
+    async def analyze_stream(self, content: str) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Versão em streaming de analyze: emite a categoria assim que conhecida
+        e, em seguida, os trechos da resposta
+        
+        Eventos emitidos (nome, dados):
+            - ("category", {category, confidence, method})
+            - ("token", {text})
+            - ("replace", {response}): stream interrompido; substitui o texto parcial
+            - ("done", {category, confidence, method, response})
+        
+        Args:
+            content: Conteúdo do email
+        
+        Yields:
+            Tuplas (evento, dados)
+        """
+        key, cached = await self._lookup_cache(content)
+        if cached is not None:
+            telemetry.record_classification(cached["method"])
+            yield "category", {k: cached[k] for k in ("category", "confidence", "method")}
+            yield "token", {"text": cached["response"]}
+            yield "done", cached
+            return
+        
+        signature, similar = await self._lookup_similar(content)
+        if similar is not None:
+            category, confidence, method = similar["category"], similar["confidence"], similar["method"]
+        else:
+            category, confidence, method = await self.ai_service.classify_email_async(content)
+        telemetry.record_classification(method)
+        yield "category", {"category": category, "confidence": confidence, "method": method}
+        
+        if similar is not None and similar["response"] is not None:
+            yield "token", {"text": similar["response"]}
+            yield "done", similar
+            return
+        
+        parts = []
+        try:
+            async for delta in self.ai_service.stream_response_async(category, content):
+                parts.append(delta)
+                yield "token", {"text": delta}
+            response_text = "".join(parts).strip()
+            if not response_text:
+                raise ValueError("stream sem conteúdo")
+            complete = True
+        
+        except Exception as e:
+            logger.error(f"Stream de resposta interrompido: {e}")
+            response_text = self.ai_service._get_default_response(category)
+            complete = False
+            yield "replace", {"response": response_text}
+        
+        result = {
+            "category": category,
+            "confidence": confidence,
+            "method": method,
+            "response": response_text
+        }
+        
+        if complete:
+            await self._store_cache(key, signature, result)
+        
+        yield "done", result
+    
+    async def _lookup_cache(self, content: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Retorna (chave, resultado em cache) para o conteúdo"""
+        if self.cache is None:
+            return None, None
+        
+        with telemetry.timer("cache"):
+            key = self.cache.make_key(content)
+            cached = await self.cache.get(key)
+        if cached is None:
+            return key, None
+        
+        logger.info(f"Resultado obtido do cache ({cached['cache_tier']})")
+        return key, {
+            "category": cached["category"],
+            "confidence": cached["confidence"],
+            "method": f"cache:{cached['method']}",
+            "response": cached["response"]
+        }
+    
+    async def _lookup_similar(self, content: str) -> Tuple[Optional[array], Optional[Dict]]:
+        """
+        Retorna (assinatura, resultado de um email quase idêntico) para o conteúdo
+        
+        Com SIMILARITY_REUSE_RESPONSE desativado, o resultado vem com
+        response=None e a resposta deve ser gerada para o email atual.
+        """
+        if self.similarity_index is None:
+            return None, None
+        
+        with telemetry.timer("similarity"):
+            # Assinatura em thread (CPU); a consulta ao índice fica no loop
+            signature = await asyncio.to_thread(self.similarity_index.signature, content)
+            match = self.similarity_index.lookup(signature)
+        if match is None:
+            return signature, None
+        
+        similarity, stored = match
+        reuse_response = settings.SIMILARITY_REUSE_RESPONSE
+        
+        # Chamadas que o resultado original custou menos as que ainda serão feitas
+        original_calls = 1 if stored["method"] in ("deepseek-combined", "local-model") else 2
+        self.similarity_index.record_saved(max(0, original_calls - (0 if reuse_response else 1)))
+        
+        logger.info(f"Resultado reutilizado de email similar ({similarity:.2f})")
+        return signature, {
+            "category": stored["category"],
+            "confidence": stored["confidence"],
+            "method": f"similar:{stored['method']}",
+            "response": stored["response"] if reuse_response else None
+        }
+    
+    async def _store_cache(self, key: Optional[str], signature: Optional[array], result: Dict) -> None:
+        """
+        Armazena resultado da IA (fallbacks devem ser recalculados)
+        
+        Chamado apenas com respostas geradas/do banco: respostas padrão por
+        falha na geração não chegam aqui.
+        """
+        if not result["method"].startswith(CACHEABLE_METHODS):
+            return
+        
+        if key is not None:
+            await self.cache.set(key, result)
+        if self.similarity_index is not None:
+            await self.similarity_index.add(signature, result)
@@ -0,0 +1,189 @@
+"""
+Banco de respostas prontas por categoria e intenção
+
+Emails de categorias atendidas pelo banco (settings.REPLY_POOL_CATEGORIES,
+padrão Improdutivo) recebem uma resposta do banco em vez de uma geração
+pela IA. A intenção (aniversário, festas, agradecimento...) é escolhida por
+palavras-chave e as respostas de cada intenção são servidas em rodízio.
+Marcadores simples são preenchidos no envio ({saudacao}).
+
+Formato (settings.REPLY_POOL_SEED_FILE / settings.REPLY_POOL_FILE):
+
+    {
+        "intents": {
+            "festas": {
+                "category": "Improdutivo",
+                "keywords": ["natal*", "ano novo"],
+                "priority": 2,
+                "sample": "Feliz Natal a todos!",
+                "replies": ["{saudacao},\\n\\nAgradecemos pelos votos..."]
+            },
+            ...
+        }
+    }
+
+Uma intenção sem palavras-chave é a padrão da sua categoria. Em empate no
+número de palavras-chave encontradas vence a maior "priority" (padrão 0);
+empate também na prioridade usa a intenção padrão da categoria.
+
+Geração offline (amplia o banco com respostas da IA para cada "sample"):
+    python -m app.services.reply_pool --per-intent 5
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.rule_engine import fold_text, keyword_pattern
+
+
+class ReplyPool:
+    """Seleciona respostas prontas por intenção, em rodízio"""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Arquivo do banco (padrão: settings.REPLY_POOL_FILE, se existir,
+                ou o banco empacotado settings.REPLY_POOL_SEED_FILE)
+        """
+        self.path = path or (
+            settings.REPLY_POOL_FILE if os.path.exists(settings.REPLY_POOL_FILE)
+            else settings.REPLY_POOL_SEED_FILE
+        )
+        self.categories = set(settings.REPLY_POOL_CATEGORIES)
+        
+        with open(self.path, encoding="utf-8") as f:
+            self.intents: Dict[str, Dict] = json.load(f)["intents"]
+        
+        self._patterns: List[Tuple[str, str, int, "re.Pattern"]] = []
+        self._defaults: Dict[str, str] = {}
+        self._rotation: Dict[str, Iterator[str]] = {}
+        
+        for name, intent in self.intents.items():
+            if not intent["replies"]:
+                continue
+            self._rotation[name] = itertools.cycle(intent["replies"])
+            if intent["keywords"]:
+                pattern = "|".join(keyword_pattern(keyword) for keyword in intent["keywords"])
+                self._patterns.append((
+                    intent["category"],
+                    name,
+                    int(intent.get("priority", 0)),
+                    re.compile(rf"(?<!\w)(?:{pattern})(?!\w)")
+                ))
+            else:
+                self._defaults.setdefault(intent["category"], name)
+        
+        logger.info(f"ReplyPool inicializado ({len(self._rotation)} intenções, {self.path})")
+    
+    def covers(self, category: str) -> bool:
+        """Indica se a categoria é atendida pelo banco"""
+        return category in self.categories and (
+            category in self._defaults or any(item[0] == category for item in self._patterns)
+        )
+    
+    def detect_intent(self, category: str, text: str) -> Optional[str]:
+        """
+        Identifica a intenção do email dentro da categoria
+        
+        Returns:
+            Intenção com mais palavras-chave encontradas (empate: maior
+            prioridade) ou a padrão da categoria
+        """
+        folded = fold_text(text)
+        default = self._defaults.get(category)
+        best, best_rank, tied = default, (0, 0), False
+        for intent_category, name, priority, pattern in self._patterns:
+            if intent_category != category:
+                continue
+            hits = len(pattern.findall(folded))
+            if not hits:
+                continue
+            rank = (hits, priority)
+            if rank > best_rank:
+                best, best_rank, tied = name, rank, False
+            elif rank == best_rank:
+                tied = True
+        return default if tied else best
+    
+    def get(self, category: str, text: str) -> Optional[str]:
+        """
+        Retorna uma resposta pronta para o email
+        
+        Args:
+            category: Categoria do email
+            text: Conteúdo do email (usado para identificar a intenção)
+        
+        Returns:
+            Resposta ou None se a categoria não for atendida pelo banco
+        """
+        if not self.covers(category):
+            return None
+        
+        intent = self.detect_intent(category, text)
+        if intent is None:
+            return None
+        
+        telemetry.inc("reply_pool_total", intent=intent)
+        logger.info(f"Resposta obtida do banco de respostas ({intent})")
+        return self._render(next(self._rotation[intent]))
+    
+    @staticmethod
+    def _render(reply: str) -> str:
+        """Preenche os marcadores da resposta"""
+        hour = datetime.now().hour
+        greeting = "Bom dia" if 5 <= hour < 12 else "Boa tarde" if hour < 18 else "Boa noite"
+        return reply.replace("{saudacao}", greeting)
+
+
+async def generate(per_intent: int) -> Dict:
+    """
+    Amplia o banco com respostas geradas pela IA para o "sample" de cada intenção
+    
+    Args:
+        per_intent: Respostas geradas por intenção
+    
+    Returns:
+        Número de respostas por intenção no banco salvo
+    """
+    from app.services.ai_service import AIService
+    
+    pool = ReplyPool()
+    service = AIService()
+    if not service.provider.configured:
+        raise SystemExit("DEEPSEEK_API_KEY não configurada")
+    
+    try:
+        for intent in pool.intents.values():
+            default = service._get_default_response(intent["category"])
+            replies = await asyncio.gather(*(
+                service.generate_response_async(intent["category"], intent["sample"])
+                for _ in range(per_intent)
+            ))
+            for reply in replies:
+                if reply != default and reply not in intent["replies"]:
+                    intent["replies"].append(reply)
+    finally:
+        await service.aclose()
+    
+    directory = os.path.dirname(settings.REPLY_POOL_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(settings.REPLY_POOL_FILE, "w", encoding="utf-8") as f:
+        json.dump({"intents": pool.intents}, f, ensure_ascii=False, indent=4)
+    
+    return {name: len(intent["replies"]) for name, intent in pool.intents.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera respostas para o banco de respostas")
+    parser.add_argument("--per-intent", type=int, default=5, help="respostas geradas por intenção")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(generate(args.per_intent)), ensure_ascii=False))
@@ -0,0 +1,116 @@
+"""
+Motor de regras por palavras-chave (classificação de fallback)
+
+As palavras-chave são compiladas uma única vez em uma expressão regular
+com fronteiras de palavra, sobre texto sem acentos. Pesos e regras vêm de
+um arquivo JSON (settings.RULES_FILE):
+
+    {
+        "base_confidence": 0.6,
+        "default_category": "Produtivo",
+        "categories": {"Improdutivo": {"ano novo": 1.5, "promoc*": 1.5}, ...}
+    }
+
+Um "*" final casa qualquer sufixo (ex.: "promoc*" -> promoção, promoções).
+"""
+
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging_config import logger
+
+
+def fold_text(text: str) -> str:
+    """Converte para minúsculas e remove acentos (ex.: 'Promoção' -> 'promocao')"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return decomposed.encode("ascii", "ignore").decode("ascii")
+
+
+def keyword_pattern(keyword: str) -> str:
+    """Converte uma palavra-chave da configuração em padrão regex (sobre fold_text)"""
+    prefix = keyword.endswith("*")
+    words = fold_text(keyword.rstrip("*")).split()
+    pattern = r"\s+".join(re.escape(word) for word in words)
+    return pattern + r"\w*" if prefix else pattern
+
+
+class RuleEngine:
+    """Classificador baseado em palavras-chave ponderadas"""
+    
+    def __init__(self, rules_path: Optional[str] = None):
+        self.rules_path = rules_path or settings.RULES_FILE
+        
+        with open(self.rules_path, encoding="utf-8") as f:
+            rules = json.load(f)
+        
+        self.base_confidence = float(rules.get("base_confidence", 0.6))
+        self.default_category = rules.get("default_category", "Produtivo")
+        self.categories = list(rules["categories"])
+        
+        # Uma alternativa nomeada por palavra-chave: o grupo que casou indica a regra
+        self._rules: List[Tuple[str, float]] = []
+        alternatives = []
+        for category, keywords in rules["categories"].items():
+            for keyword, weight in keywords.items():
+                alternatives.append((keyword_pattern(keyword), len(self._rules)))
+                self._rules.append((category, float(weight)))
+        
+        # Alternativas mais longas primeiro ("ano novo" antes de "ano")
+        alternatives.sort(key=lambda item: len(item[0]), reverse=True)
+        self._pattern = re.compile(
+            r"(?<!\w)(?:"
+            + "|".join(f"(?P<k{index}>{pattern})" for pattern, index in alternatives)
+            + r")(?!\w)"
+        )
+        
+        logger.info(f"RuleEngine inicializado ({len(self._rules)} regras)")
+    
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Soma os pesos das palavras-chave encontradas (cada regra conta uma vez)
+        
+        Args:
+            text: Texto do email
+        
+        Returns:
+            Pontuação por categoria
+        """
+        matched = {int(match.lastgroup[1:]) for match in self._pattern.finditer(fold_text(text))}
+        
+        scores = dict.fromkeys(self.categories, 0.0)
+        for index in matched:
+            category, weight = self._rules[index]
+            scores[category] += weight
+        return scores
+    
+    def classify(self, text: str) -> Tuple[str, float, str]:
+        """
+        Classifica o texto pela maior pontuação (empate -> categoria padrão)
+        
+        Args:
+            text: Texto do email
+        
+        Returns:
+            Tupla (categoria, confiança, método)
+        """
+        scores = self.score(text)
+        best = max(scores, key=scores.get)
+        
+        if scores[best] <= 0 or list(scores.values()).count(scores[best]) > 1:
+            best = self.default_category
+        
+        return best, self.base_confidence, "rule-based"
+    
+    def classify_many(self, texts: Iterable[str]) -> List[Tuple[str, float, str]]:
+        """
+        Classifica vários textos de uma vez
+        
+        Args:
+            texts: Textos dos emails
+        
+        Returns:
+            Lista de tuplas (categoria, confiança, método), na mesma ordem
+        """
+        return [self.classify(text) for text in texts]
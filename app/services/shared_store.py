@@ -0,0 +1,130 @@
+"""
+Estado compartilhado entre processos (SQLite local em modo WAL)
+
+Com vários workers (gunicorn), cada processo tem sua própria memória. O que
+precisa ser visto por todos fica aqui: o estado da telemetria publicado por
+worker (somado nas rotas de métricas) e a situação/resultado dos jobs.
+
+Os workers de uma mesma implantação compartilham o identificador definido
+pelo master do gunicorn (INSTANCE_ENV, ver gunicorn.conf.py); linhas de
+implantações anteriores são descartadas na abertura.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.logging_config import logger
+
+INSTANCE_ENV = "EMAIL_ASSISTANT_INSTANCE"
+
+# Ordem das situações de um job (ver job_service): gravações fora de ordem
+# não fazem a situação regredir
+_JOB_STATUS_RANK = "CASE {} WHEN 'queued' THEN 0 WHEN 'running' THEN 1 ELSE 2 END"
+
+
+class SharedStore:
+    """Telemetria por worker e jobs em um banco SQLite compartilhado"""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SHARED_DB_FILE
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.instance_id = os.environ.get(INSTANCE_ENV) or self.worker_id
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS telemetry ("
+            "instance TEXT NOT NULL, worker TEXT NOT NULL, state TEXT NOT NULL, "
+            "updated_at REAL NOT NULL, PRIMARY KEY (instance, worker))"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM telemetry WHERE instance != ?", (self.instance_id,))
+        self._db.commit()
+        
+        logger.info(f"SharedStore inicializado ({self.path}, worker {self.worker_id})")
+    
+    def publish_telemetry(self, state: Dict) -> None:
+        """Grava o estado da telemetria deste worker (export_state)"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO telemetry (instance, worker, state, updated_at) VALUES (?, ?, ?, ?)",
+                (self.instance_id, self.worker_id, json.dumps(state), time.time())
+            )
+            self._db.commit()
+    
+    def telemetry_states(self) -> List[Dict]:
+        """
+        Estados de todos os workers da implantação atual
+        
+        Workers encerrados (ex.: reciclados) continuam somados para que os
+        contadores não regridam.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT state FROM telemetry WHERE instance = ?", (self.instance_id,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def live_workers(self, max_age: float) -> int:
+        """Workers que publicaram telemetria nos últimos max_age segundos"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM telemetry WHERE instance = ? AND updated_at >= ?",
+                (self.instance_id, time.time() - max_age)
+            ).fetchone()
+        return row[0]
+    
+    def save_job(self, job: Dict) -> None:
+        """
+        Grava a situação de um job (Job.to_dict)
+        
+        Jobs não concluídos expiram JOB_RESULT_TTL após a última gravação,
+        descartando os de workers encerrados abruptamente. Uma situação
+        anterior à gravada (ex.: queued após done) é ignorada.
+        """
+        expires_at = job["expires_at"] or time.time() + settings.JOB_RESULT_TTL
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, payload, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET status = excluded.status, "
+                "payload = excluded.payload, expires_at = excluded.expires_at "
+                f"WHERE {_JOB_STATUS_RANK.format('excluded.status')} >= {_JOB_STATUS_RANK.format('jobs.status')}",
+                (job["job_id"], job["status"], json.dumps(job, ensure_ascii=False), expires_at)
+            )
+            self._db.commit()
+    
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Situação de um job gravada por qualquer worker (None se inexistente/expirado)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM jobs WHERE id = ? AND expires_at > ?",
+                (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def purge_jobs(self) -> int:
+        """Remove jobs expirados; retorna quantos foram removidos"""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)
+            )
+            self._db.commit()
+        return cursor.rowcount
+    
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,324 @@
+"""
+Índice de quase-duplicatas (MinHash + LSH em bandas) para reutilizar
+resultados de emails gerados a partir do mesmo modelo
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+from app.services.ai_service import PROMPT_VERSION
+from app.services.text_processor import TextProcessor
+
+# Palavras por shingle (pares toleram melhor campos variáveis do modelo)
+SHINGLE_SIZE = 2
+
+# Emails com menos shingles não são indexados (o cache exato cobre textos curtos)
+MIN_SHINGLES = 8
+
+# Primo de Mersenne das permutações (a * h + b) mod P
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class SimilarityIndex:
+    """
+    Índice de emails já classificados consultado por similaridade de Jaccard
+    
+    Cada email vira um conjunto de shingles (pares de tokens de
+    TextProcessor.preprocess_tokens, com números trocados por "#") e uma
+    assinatura MinHash. A assinatura é dividida em bandas; emails que
+    compartilham alguma banda são candidatos e a similaridade estimada pela
+    assinatura decide o reaproveitamento.
+    """
+    
+    def __init__(self, text_processor: Optional[TextProcessor] = None):
+        """Inicializa o índice em memória e, se configurada, a camada SQLite"""
+        self.text_processor = text_processor or TextProcessor()
+        self.threshold = settings.SIMILARITY_THRESHOLD
+        self.max_entries = settings.SIMILARITY_MAX_ENTRIES
+        self.ttl = settings.SIMILARITY_TTL
+        self.bands = settings.SIMILARITY_BANDS
+        self.rows = max(1, settings.SIMILARITY_NUM_PERM // self.bands)
+        num_perm = self.bands * self.rows
+        
+        # Coeficientes fixos: assinaturas persistidas continuam comparáveis
+        seeds = [zlib.crc32(f"minhash-{i}".encode()) for i in range(2 * num_perm)]
+        self._perms = [(seeds[2 * i] | 1, seeds[2 * i + 1]) for i in range(num_perm)]
+        self._perm_arrays = None  # coeficientes em arrays numpy (criados sob demanda)
+        
+        # Parâmetros que invalidam resultados/assinaturas armazenados
+        self.namespace = "\x00".join([
+            settings.AI_MODEL, PROMPT_VERSION, settings.AI_MODE, str(SHINGLE_SIZE), str(num_perm)
+        ])
+        
+        self._entries: "OrderedDict[str, Tuple[float, array, Dict]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(self.bands)]
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self._loaded_until = 0.0
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "llm_requests_saved": 0}
+        
+        if settings.SIMILARITY_DB_FILE:
+            self._open_db(settings.SIMILARITY_DB_FILE)
+            self._load()
+        
+        logger.info(f"SimilarityIndex inicializado ({len(self._entries)} entradas)")
+    
+    def signature(self, text: str) -> Optional[array]:
+        """
+        Calcula a assinatura MinHash do email
+        
+        Vetorizado com numpy (a * h + b cabe em uint64 para a, h, b < 2^32,
+        então o resultado é idêntico ao cálculo com inteiros Python). Custa
+        alguns milissegundos em textos longos: chamar fora do event loop
+        (ver ProcessingService._lookup_similar).
+        
+        Args:
+            text: Conteúdo do email
+        
+        Returns:
+            Assinatura ou None se o texto for curto demais para comparação
+        """
+        tokens = [
+            "#" if any(char.isdigit() for char in token) else token
+            for token in self.text_processor.preprocess_tokens(text)
+        ]
+        shingles = {
+            " ".join(tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+        if len(shingles) < MIN_SHINGLES:
+            return None
+        
+        import numpy as np  # dependência do pandas; importado só quando usado
+        
+        if self._perm_arrays is None:
+            self._perm_arrays = (
+                np.array([a for a, _ in self._perms], dtype=np.uint64)[:, None],
+                np.array([b for _, b in self._perms], dtype=np.uint64)[:, None]
+            )
+        a, b = self._perm_arrays
+        
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        values = (a * hashes + b) % np.uint64(_MERSENNE_PRIME)
+        minimums = (values.min(axis=1) & np.uint64(_MAX_HASH)).astype(np.uint32)
+        
+        signature = array("I")
+        signature.frombytes(minimums.tobytes())
+        return signature
+    
+    def lookup(self, signature: Optional[array]) -> Optional[Tuple[float, Dict]]:
+        """
+        Busca o email indexado mais parecido acima do limiar
+        
+        Args:
+            signature: Assinatura gerada por signature()
+        
+        Returns:
+            Tupla (similaridade estimada, resultado armazenado) ou None
+        """
+        if signature is None:
+            return None
+        
+        self._stats["lookups"] += 1
+        now = time.time()
+        best: Optional[Tuple[float, str]] = None
+        
+        for key in self._candidates(signature):
+            expires_at, stored, _ = self._entries[key]
+            if expires_at <= now:
+                self._remove(key)
+                continue
+            similarity = sum(1 for x, y in zip(signature, stored) if x == y) / len(signature)
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, key)
+        
+        if best is None:
+            self._stats["misses"] += 1
+            return None
+        
+        similarity, key = best
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        telemetry.inc("similarity_hits_total")
+        return similarity, self._entries[key][2]
+    
+    def record_saved(self, requests: int = 1) -> None:
+        """Contabiliza chamadas ao LLM evitadas por um acerto"""
+        self._stats["llm_requests_saved"] += requests
+        telemetry.inc("similarity_llm_requests_saved_total", requests)
+    
+    async def add(self, signature: Optional[array], value: Dict) -> None:
+        """
+        Indexa o resultado de um email (e persiste, se houver camada em disco)
+        
+        Emails com a mesma assinatura ocupam uma única entrada.
+        
+        Args:
+            signature: Assinatura gerada por signature()
+            value: Resultado serializável em JSON
+        """
+        if signature is None:
+            return
+        
+        key = hashlib.sha1(signature.tobytes()).hexdigest()
+        expires_at = time.time() + self.ttl
+        self._insert(key, expires_at, signature, value)
+        self._stats["stores"] += 1
+        
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_set, key, expires_at, signature, value)
+            except Exception as e:
+                logger.error(f"Erro ao persistir índice de similaridade: {e}")
+    
+    async def refresh(self) -> int:
+        """
+        Carrega entradas gravadas por outros processos desde a última carga
+        
+        Executado periodicamente quando há vários workers; a leitura roda em
+        thread e a inserção no loop, sem concorrer com lookup().
+        
+        Returns:
+            Número de entradas carregadas
+        """
+        if self._db is None:
+            return 0
+        rows = await asyncio.to_thread(self._fetch, self._loaded_until)
+        self._apply(rows)
+        return len(rows)
+    
+    def stats(self) -> Dict:
+        """Retorna contadores de acertos e chamadas evitadas"""
+        lookups = self._stats["lookups"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "persistent": self._db is not None
+        }
+    
+    def close(self) -> None:
+        """Fecha conexão com a camada em disco"""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+    
+    def _band_keys(self, signature: array) -> List[bytes]:
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+    
+    def _candidates(self, signature: array) -> Set[str]:
+        candidates: Set[str] = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+        return candidates
+    
+    def _insert(self, key: str, expires_at: float, signature: array, value: Dict) -> None:
+        """Insere na memória respeitando o limite LRU"""
+        if key in self._entries:
+            self._remove(key)
+        
+        self._entries[key] = (expires_at, signature, value)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+    
+    def _remove(self, key: str) -> None:
+        _, signature, _ = self._entries.pop(key)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            keys = bucket.get(band_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band_key]
+    
+    def _open_db(self, path: str) -> None:
+        """Abre (ou cria) o banco SQLite do índice persistente"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, signature BLOB NOT NULL, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        except Exception as e:
+            logger.error(f"Índice de similaridade persistente indisponível ({path}): {e}")
+            self._db = None
+    
+    def _load(self) -> None:
+        """Carrega as entradas mais recentes válidas para o namespace atual"""
+        if self._db is None:
+            return
+        self._apply(self._fetch(0.0))
+    
+    def _fetch(self, since: float) -> List[Tuple]:
+        """Lê entradas válidas que expiram depois de `since` (mais recentes primeiro)"""
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT key, signature, value, expires_at FROM entries "
+                "WHERE namespace = ? AND expires_at > ? ORDER BY expires_at DESC LIMIT ?",
+                (self.namespace, max(since, time.time()), self.max_entries)
+            ).fetchall()
+    
+    def _apply(self, rows: List[Tuple]) -> None:
+        for key, blob, value, expires_at in reversed(rows):
+            if key in self._entries:
+                continue  # já indexada (inclusive as gravadas por este processo)
+            signature = array("I")
+            signature.frombytes(blob)
+            self._insert(key, expires_at, signature, json.loads(value))
+        if rows:
+            self._loaded_until = max(self._loaded_until, rows[0][3])
+    
+    def _db_set(self, key: str, expires_at: float, signature: array, value: Dict) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, namespace, signature, value, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, self.namespace, signature.tobytes(), json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            
+            # Limpeza periódica: expiradas, de outros namespaces e além do limite
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._db.execute(
+                    "DELETE FROM entries WHERE expires_at <= ? OR namespace != ?",
+                    (time.time(), self.namespace)
+                )
+                self._db.execute(
+                    "DELETE FROM entries WHERE key NOT IN "
+                    "(SELECT key FROM entries ORDER BY expires_at DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            
+            self._db.commit()
@@ -3,25 +3,66 @@ Processamento de texto com NLP
 """
 
 import re
-import nltk
-from typing import List
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Sequence
 from app.core.config import settings
 from app.core.logging_config import logger
 
-# Download de recursos NLTK (apenas uma vez)
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+# Mantém letras (incluindo acentuadas), números e espaços
+_NON_WORD_RE = re.compile(r"[^a-z0-9\u00e0-\u00fa\s]")
 
-from nltk.corpus import stopwords
+# Stopwords do processo worker (definidas pelo initializer do pool)
+_WORKER_STOP_WORDS: FrozenSet[str] = frozenset()
+
+
+@lru_cache()
+def load_stop_words() -> FrozenSet[str]:
+    """
+    Carrega as stopwords em português sem acesso à rede
+    
+    Usa a lista empacotada em settings.STOPWORDS_FILE e, se ausente,
+    o corpus do NLTK já instalado localmente (sem download).
+    """
+    try:
+        with open(settings.STOPWORDS_FILE, encoding="utf-8") as f:
+            return frozenset(line.strip() for line in f if line.strip())
+    except OSError as e:
+        logger.warning(f"Lista de stopwords indisponível ({e}), tentando NLTK local")
+    
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('portuguese'))
+    except Exception as e:
+        logger.error(f"Stopwords indisponíveis: {e}")
+        return frozenset()
+
+
+def _tokenize(text: str, stop_words: FrozenSet[str]) -> List[str]:
+    """Normaliza (NFC + lowercase), remove caracteres especiais e stopwords"""
+    if not isinstance(text, str):
+        return []
+    
+    text = _NON_WORD_RE.sub("", unicodedata.normalize("NFC", text).lower())
+    return [word for word in text.split() if len(word) > 2 and word not in stop_words]
+
+
+def _init_worker(stop_words: FrozenSet[str]) -> None:
+    global _WORKER_STOP_WORDS
+    _WORKER_STOP_WORDS = stop_words
+
+
+def _tokenize_chunk(texts: List[str]) -> List[List[str]]:
+    return [_tokenize(text, _WORKER_STOP_WORDS) for text in texts]
 
 
 class TextProcessor:
     """Processador de texto com NLP"""
     
     def __init__(self):
-        self.stop_words = set(stopwords.words('portuguese'))
+        self.stop_words = load_stop_words()
         logger.info("TextProcessor inicializado")
     
     def preprocess(self, text: str) -> str:
@@ -35,19 +76,7 @@ class TextProcessor:
             Texto processado
         """
         try:
-            # Lowercase
-            text = text.lower()
-            
-            # Remove caracteres especiais (mantém letras, números e espaços)
-            text = re.sub(r"[^a-zá-úà-ù0-9\s]", "", text)
-            
-            # Remove stopwords
-            tokens = [
-                word for word in text.split() 
-                if word not in self.stop_words and len(word) > 2
-            ]
-            
-            processed = " ".join(tokens)
+            processed = " ".join(_tokenize(text, self.stop_words))
             logger.debug(f"Texto processado: {len(processed)} caracteres")
             
             return processed
@@ -56,6 +85,56 @@ class TextProcessor:
             logger.error(f"Erro no pré-processamento: {e}")
             return text  # Retorna texto original em caso de erro
     
+    def preprocess_tokens(self, text: str) -> List[str]:
+        """
+        Pré-processa texto e retorna os tokens (sem juntar em string)
+        
+        Args:
+            text: Texto bruto
+        
+        Returns:
+            Lista de tokens
+        """
+        return _tokenize(text, self.stop_words)
+    
+    def preprocess_many(
+        self,
+        texts: Sequence[str],
+        workers: Optional[int] = None,
+        chunk_size: int = 5000
+    ) -> List[List[str]]:
+        """
+        Pré-processa um lote de textos
+        
+        Args:
+            texts: Textos brutos
+            workers: Processos paralelos (padrão: settings.TEXT_PROCESS_WORKERS;
+                0/1 processa no processo atual)
+            chunk_size: Textos por tarefa enviada a cada processo
+        
+        Returns:
+            Lista de listas de tokens, na mesma ordem dos textos
+        """
+        workers = settings.TEXT_PROCESS_WORKERS if workers is None else workers
+        
+        if workers <= 1 or len(texts) <= chunk_size:
+            stop_words = self.stop_words
+            return [_tokenize(text, stop_words) for text in texts]
+        
+        chunks = [list(texts[i:i + chunk_size]) for i in range(0, len(texts), chunk_size)]
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.stop_words,)
+        ) as executor:
+            results = []
+            for tokens in executor.map(_tokenize_chunk, chunks):
+                results.extend(tokens)
+        
+        logger.debug(f"Lote pré-processado: {len(results)} textos em {len(chunks)} partes")
+        return results
+    
     def extract_keywords(self, text: str, top_n: int = 10) -> List[str]:
         """
         Extrai palavras-chave mais frequentes
@@ -67,13 +146,31 @@ class TextProcessor:
         Returns:
             Lista de palavras-chave
         """
-        from collections import Counter
-        
         words = text.split()
         word_freq = Counter(words)
         
         return [word for word, _ in word_freq.most_common(top_n)]
     
+    def extract_keywords_many(
+        self,
+        token_lists: Iterable[List[str]],
+        top_n: int = 10
+    ) -> List[List[str]]:
+        """
+        Extrai palavras-chave de vários textos já tokenizados
+        
+        Args:
+            token_lists: Saída de preprocess_many
+            top_n: Número de palavras por texto
+        
+        Returns:
+            Lista de listas de palavras-chave
+        """
+        return [
+            [word for word, _ in Counter(tokens).most_common(top_n)]
+            for tokens in token_lists
+        ]
+    
     def truncate(self, text: str, max_length: int = 1000) -> str:
         """
         Trunca texto mantendo palavras completas
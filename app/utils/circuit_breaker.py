@@ -0,0 +1,183 @@
+"""
+Circuit breaker para chamadas a serviços externos
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from app.core.logging_config import logger
+from app.core.telemetry import telemetry
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com janela deslizante de chamadas
+    
+    - closed: chamadas liberadas; abre quando, com ao menos min_calls na
+      janela, a taxa de falhas ou de chamadas lentas atinge o limite
+    - open: chamadas recusadas imediatamente por open_seconds
+    - half_open: libera até half_open_probes chamadas de sondagem; fecha se
+      todas tiverem sucesso e reabre na primeira falha
+    
+    Uso:
+        if not breaker.allow():
+            ...  # fallback imediato
+        try:
+            ...chamada...
+        except Exception:
+            breaker.record(duration, ok=False)
+        else:
+            breaker.record(duration, ok=True)
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 2
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (falhou, lenta)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Estado atual (open passa a half_open quando o tempo de espera expira)"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+    
+    def available(self) -> bool:
+        """Indica se uma chamada seria liberada agora (sem reservar sondagem)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return state == CLOSED or (
+                state == HALF_OPEN and self._probes_in_flight < self.half_open_probes
+            )
+    
+    def allow(self) -> bool:
+        """Reserva a passagem de uma chamada; False = circuito aberto"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            return False
+    
+    def record(self, duration: float, ok: bool) -> None:
+        """Registra o resultado de uma chamada liberada por allow()"""
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not ok or slow:
+                    self._transition(OPEN)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._transition(CLOSED)
+                return
+            
+            if self._state == OPEN:
+                return  # chamada iniciada antes da abertura
+            
+            self._calls.append((not ok, slow))
+            if len(self._calls) >= self.min_calls and self._should_open():
+                self._transition(OPEN)
+    
+    def release(self) -> None:
+        """Libera uma chamada cancelada sem registrar resultado"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+    
+    def record_cancelled(self, duration: float) -> None:
+        """
+        Registra uma chamada cancelada (ex.: perdeu o hedge) como não-falha
+        
+        Conta como lenta se já passava de slow_call_seconds; uma sondagem
+        cancelada rápida só libera a vaga, sem contar como sucesso.
+        """
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._transition(OPEN)
+                return
+            
+            if self._state == OPEN:
+                return
+            
+            self._calls.append((False, slow))
+            if len(self._calls) >= self.min_calls and self._should_open():
+                self._transition(OPEN)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            calls = len(self._calls)
+            failures = sum(1 for failed, _ in self._calls if failed)
+            slow = sum(1 for _, is_slow in self._calls if is_slow)
+            retry_in: Optional[float] = None
+            if state == OPEN:
+                retry_in = round(self._opened_at + self.open_seconds - time.monotonic(), 2)
+        
+        return {
+            "state": state,
+            "window_calls": calls,
+            "failure_rate": round(failures / calls, 4) if calls else 0.0,
+            "slow_call_rate": round(slow / calls, 4) if calls else 0.0,
+            "retry_in_seconds": retry_in
+        }
+    
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+    
+    def _should_open(self) -> bool:
+        calls = len(self._calls)
+        failures = sum(1 for failed, _ in self._calls if failed)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+        return failures / calls >= self.failure_rate or slow / calls >= self.slow_call_rate
+    
+    def _transition(self, state: str) -> None:
+        """Muda de estado (chamado com o lock adquirido)"""
+        if state == self._state:
+            return
+        
+        previous, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state in (OPEN, HALF_OPEN):
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        if state == CLOSED:
+            self._calls.clear()
+        
+        telemetry.inc("circuit_transitions_total", breaker=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit breaker '{self.name}': {previous} -> {state}")
@@ -0,0 +1,238 @@
+"""
+Utilitários de concorrência assíncrona
+"""
+
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+from app.core.telemetry import telemetry
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+async def bounded_map_unordered(
+    items: AsyncIterable[T],
+    func: Callable[[T], Awaitable[R]],
+    limit: int
+) -> AsyncIterator[R]:
+    """
+    Aplica `func` aos itens com no máximo `limit` execuções simultâneas,
+    entregando os resultados na ordem em que terminam
+    
+    O limite cobre também resultados ainda não consumidos, de modo que um
+    consumidor lento desacelera a leitura dos itens e a memória fica estável.
+    
+    Args:
+        items: Fonte assíncrona de itens (consumida sob demanda)
+        func: Corrotina aplicada a cada item
+        limit: Máximo de itens em processamento ou aguardando consumo
+    
+    Yields:
+        Resultados de `func` (exceções de `func` são propagadas)
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    results: asyncio.Queue = asyncio.Queue()
+    pending = set()
+    
+    async def run(item: T) -> None:
+        try:
+            results.put_nowait((True, await func(item)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            results.put_nowait((False, e))
+    
+    async def feed() -> None:
+        try:
+            async for item in items:
+                await semaphore.acquire()
+                task = asyncio.create_task(run(item))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            
+            while pending:
+                await asyncio.wait(set(pending))
+        finally:
+            results.put_nowait(_DONE)
+    
+    feeder = asyncio.create_task(feed())
+    
+    try:
+        while True:
+            entry = await results.get()
+            if entry is _DONE:
+                break
+            
+            semaphore.release()
+            ok, value = entry
+            if not ok:
+                raise value
+            yield value
+        
+        # Propaga erros da fonte de itens
+        await feeder
+    
+    finally:
+        feeder.cancel()
+        for task in list(pending):
+            task.cancel()
+
+
+class SingleFlight(Generic[R]):
+    """
+    Agrupa chamadas simultâneas com a mesma chave em uma única execução
+    
+    A primeira chamada (líder) inicia a execução em uma tarefa própria; as
+    seguintes (seguidoras) aguardam o mesmo resultado ou exceção. Cancelar
+    qualquer chamador (ex.: cliente desconectado) apenas o desliga da
+    execução, que só é cancelada quando não resta nenhum chamador aguardando.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, list]] = {}
+        self._stats = {"requests": 0, "executions": 0, "coalesced": 0, "cancelled": 0}
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[R]]) -> R:
+        """
+        Executa func ou aguarda a execução em andamento com a mesma chave
+        
+        Args:
+            key: Chave de agrupamento (ex.: conteúdo normalizado)
+            func: Corrotina executada apenas pelo líder
+        
+        Returns:
+            Resultado compartilhado entre os chamadores
+        """
+        self._stats["requests"] += 1
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.create_task(func())
+            call = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self._stats["executions"] += 1
+            telemetry.inc("singleflight_requests_total", group=self.name, role="leader")
+        else:
+            self._stats["coalesced"] += 1
+            telemetry.inc("singleflight_requests_total", group=self.name, role="follower")
+        
+        task, waiters = call
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                task.cancel()
+                self._forget(key, task)
+                self._stats["cancelled"] += 1
+    
+    def stats(self) -> Dict:
+        """Retorna contadores e a proporção de chamadas agrupadas"""
+        requests = self._stats["requests"]
+        return {
+            **self._stats,
+            "in_flight": len(self._calls),
+            "dedupe_ratio": round(self._stats["coalesced"] / requests, 4) if requests else None
+        }
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Agrupa itens enviados em sequência rápida e os processa em lote
+    
+    Um lote é despachado ao atingir max_items ou max_wait segundos após o
+    primeiro item pendente. O handler recebe os itens e devolve um resultado
+    por item (na mesma ordem); uma exceção do handler é entregue a todos os
+    itens do lote.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[T]], Awaitable[List[R]]],
+        max_items: int,
+        max_wait: float
+    ):
+        self.name = name
+        self.handler = handler
+        self.max_items = max(1, max_items)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._stats = {"items": 0, "batches": 0, "max_batch": 0}
+    
+    async def submit(self, item: T) -> R:
+        """
+        Inclui o item no próximo lote e aguarda o seu resultado
+        
+        Args:
+            item: Item a processar
+        
+        Returns:
+            Resultado do handler para o item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def stats(self) -> Dict:
+        """Retorna contadores e o tamanho médio dos lotes"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch": round(self._stats["items"] / batches, 2) if batches else None
+        }
+    
+    def _flush(self) -> None:
+        """Despacha os itens pendentes (itens já cancelados são descartados)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        
+        self._stats["items"] += len(batch)
+        self._stats["batches"] += 1
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        telemetry.inc("microbatch_items_total", len(batch), group=self.name)
+        telemetry.inc("microbatch_batches_total", group=self.name)
+        
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        
+        for _, future in batch[len(results):]:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Lote '{self.name}' sem resultado para o item"))
@@ -0,0 +1,74 @@
+"""
+Funções executadas nos processos de extração de PDF
+
+Mantidas fora de app.services para que os workers (start method "spawn")
+importem apenas o necessário.
+"""
+
+import io
+import os
+from typing import Optional, Tuple
+
+# Fila (do processo principal) que recebe (tarefa, pid) no início de cada
+# tarefa, para que apenas o worker de um documento preso seja encerrado
+_started_queue = None
+
+
+def init_worker(started_queue) -> None:
+    """Inicializador dos processos do pool"""
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _current_rss_mb() -> float:
+    """Memória residente do processo atual em MB (0 se indisponível)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return 0.0
+
+
+def extract_pages(
+    data: bytes,
+    start: int,
+    end: Optional[int],
+    max_chars: Optional[int] = None,
+    task_id: Optional[str] = None
+) -> Tuple[str, int, float]:
+    """
+    Extrai o texto das páginas [start, end) a partir do PDF em memória
+    
+    Executado nos processos do pool. Com max_chars, para de ler páginas
+    assim que o texto acumulado atinge o limite. task_id é informado ao
+    processo principal junto com o pid deste worker.
+    
+    Returns:
+        Tupla (texto, total de páginas do documento, RSS do worker em MB)
+    """
+    if task_id is not None and _started_queue is not None:
+        _started_queue.put((task_id, os.getpid()))
+    
+    import pdfplumber
+    
+    parts = []
+    length = 0
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = len(pdf.pages)
+        for page in pdf.pages[start:end]:
+            page_text = page.extract_text()
+            page.flush_cache()
+            if page_text:
+                parts.append(page_text)
+                length += len(page_text) + 1
+                if max_chars and length >= max_chars:
+                    break
+    
+    text = "".join(f"{part}\n" for part in parts)
+    return text, page_count, _current_rss_mb()
@@ -0,0 +1,3 @@
+"""
+Benchmarks e testes de carga (executar com python -m benchmarks.<módulo>)
+"""
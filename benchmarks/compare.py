@@ -0,0 +1,87 @@
+"""
+Compara um resultado de benchmark com a baseline
+
+Aponta regressões de throughput (queda) e de latência de cauda (aumento do
+p99) acima das tolerâncias. Sai com código 1 se houver regressão.
+
+Uso:
+    python -m benchmarks.compare benchmarks/baselines/load.json benchmarks/results/load-<data>.json
+    python -m benchmarks.compare base.json atual.json --max-throughput-drop 0.05 --max-p99-increase 0.10
+"""
+
+import argparse
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.results import load_results
+
+
+def compare(
+    baseline: Dict,
+    current: Dict,
+    max_throughput_drop: float,
+    max_p99_increase: float
+) -> Tuple[List[str], List[str]]:
+    """
+    Compara os cenários presentes nos dois resultados
+    
+    Returns:
+        Tupla (linhas do relatório, regressões encontradas)
+    """
+    lines = [f"{'cenário':<40} {'ops/s base':>11} {'atual':>11} {'Δ':>8} {'p99 base':>10} {'atual':>10} {'Δ':>8}"]
+    regressions = []
+    
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            lines.append(f"{name:<40} (ausente no resultado atual)")
+            continue
+        
+        throughput_delta = _relative(result["throughput"], base["throughput"])
+        p99_delta = _relative(result["p99"], base["p99"])
+        lines.append(
+            f"{name:<40} {base['throughput']:>11.1f} {result['throughput']:>11.1f} {throughput_delta:>+8.1%} "
+            f"{base['p99'] * 1000:>8.2f}ms {result['p99'] * 1000:>8.2f}ms {p99_delta:>+8.1%}"
+        )
+        
+        if throughput_delta < -max_throughput_drop:
+            regressions.append(f"{name}: throughput caiu {-throughput_delta:.1%}")
+        if p99_delta > max_p99_increase:
+            regressions.append(f"{name}: p99 aumentou {p99_delta:.1%}")
+        if result["error_rate"] > base["error_rate"]:
+            regressions.append(f"{name}: taxa de erro {base['error_rate']:.2%} → {result['error_rate']:.2%}")
+    
+    return lines, regressions
+
+
+def _relative(value: float, reference: float) -> float:
+    return (value - reference) / reference if reference else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.10, help="queda tolerada (fração)")
+    parser.add_argument("--max-p99-increase", type=float, default=0.20, help="aumento tolerado do p99 (fração)")
+    args = parser.parse_args()
+    
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    
+    if baseline.get("meta", {}).get("cpu_count") != current.get("meta", {}).get("cpu_count"):
+        print("Aviso: resultados obtidos em máquinas diferentes (cpu_count)")
+    
+    lines, regressions = compare(baseline, current, args.max_throughput_drop, args.max_p99_increase)
+    print("\n".join(lines))
+    
+    if regressions:
+        print("\nRegressões:")
+        print("\n".join(f"- {regression}" for regression in regressions))
+        sys.exit(1)
+    
+    print("\nSem regressões")
+
+
+if __name__ == "__main__":
+    main()
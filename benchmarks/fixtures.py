@@ -0,0 +1,90 @@
+"""
+Dados sintéticos para os benchmarks (emails e PDFs gerados em memória)
+"""
+
+import random
+from typing import List
+
+PRODUTIVO_SAMPLES = [
+    "Olá, preciso de suporte urgente: não consigo acessar minha conta desde ontem.",
+    "Poderiam informar o status da requisição 4821? Aguardo atualização do caso.",
+    "Solicito o envio do extrato e do comprovante da transação realizada em março.",
+    "Estou com dúvida sobre o processo de cadastro no sistema, podem me ajudar?",
+    "O relatório mensal apresenta erro no fechamento; favor verificar com urgência.",
+]
+
+IMPRODUTIVO_SAMPLES = [
+    "Feliz natal a toda a equipe! Muito sucesso no próximo ano.",
+    "Obrigado pela atenção de sempre, vocês são ótimos.",
+    "Parabéns pelo aniversário da empresa, grande abraço a todos.",
+    "Aproveite a promoção imperdível: descontos de até 70% só hoje!",
+]
+
+
+def sample_emails(count: int, unique: bool = True, seed: int = 0) -> List[str]:
+    """
+    Gera emails variados
+    
+    Args:
+        count: Quantidade de emails
+        unique: Acrescenta um identificador para evitar acertos de cache
+        seed: Semente para reprodutibilidade
+    """
+    rng = random.Random(seed)
+    pool = PRODUTIVO_SAMPLES + IMPRODUTIVO_SAMPLES
+    emails = []
+    for index in range(count):
+        text = rng.choice(pool)
+        if unique:
+            text = f"{text} (ref. {seed}-{index})"
+        emails.append(text)
+    return emails
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Gera um PDF mínimo (fonte Helvetica, uma linha por \\n) com as páginas dadas"""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # preenchido após criar as páginas
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    
+    for index, text in enumerate(pages):
+        page_id = 4 + 2 * index
+        kids.append(f"{page_id} 0 R")
+        lines = " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*"
+            for line in text.split("\n")
+        )
+        stream = f"BT /F1 11 Tf 50 780 Td 14 TL {lines} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def sample_pdf(page_count: int) -> bytes:
+    """PDF com page_count páginas de texto de email"""
+    pages = [
+        f"Pagina {index + 1}: solicito atualizacao do caso e o relatorio da transacao.\n"
+        + "linha de texto do documento anexado ao email. " * 4
+        for index in range(page_count)
+    ]
+    return make_pdf(pages)
@@ -0,0 +1,226 @@
+"""
+Teste de carga: /process e /feedback com concorrência crescente
+
+Cada nível de concorrência executa um laço fechado (N clientes enviando
+requisições em sequência) e registra throughput, p50/p95/p99 e taxa de erro.
+
+Por padrão a aplicação roda no mesmo processo (httpx.ASGITransport) e um
+stub da API é iniciado automaticamente, tornando o resultado reproduzível:
+
+    python -m benchmarks.load_test --concurrency 1,10,50,100 --requests 200
+
+Contra um servidor já em execução (apontado para o stub ou para a API real):
+
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --no-stub
+
+Para gravar uma baseline e comparar depois:
+
+    python -m benchmarks.load_test --output benchmarks/baselines/load.json
+    python -m benchmarks.compare benchmarks/baselines/load.json benchmarks/results/load-<data>.json
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from benchmarks.fixtures import sample_emails
+from benchmarks.results import print_table, save_results, summarize
+
+SCENARIOS = ("process", "feedback")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(latency: float, jitter: float, error_rate: float, seed: int) -> "tuple[subprocess.Popen, str]":
+    """Inicia o stub em um subprocesso e aguarda ele aceitar conexões"""
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stub_server",
+        "--port", str(port),
+        "--latency", str(latency),
+        "--jitter", str(jitter),
+        "--error-rate", str(error_rate),
+        "--seed", str(seed)
+    ])
+    
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    
+    process.terminate()
+    raise RuntimeError("Stub não iniciou a tempo")
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str], timeout: float) -> AsyncIterator:
+    """Cliente HTTP para o servidor em url ou para a aplicação no mesmo processo"""
+    import httpx
+    
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+    
+    # Importado só agora: as settings são lidas das variáveis de ambiente
+    from app.main import app
+    
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            yield client
+
+
+def isolate_data_dir() -> str:
+    """Direciona feedback, cache e modelo local para um diretório temporário"""
+    data_dir = tempfile.mkdtemp(prefix="bench-")
+    for name, filename in (
+        ("FEEDBACK_FILE", "feedback.csv"),
+        ("FEEDBACK_DB_FILE", "feedback.db"),
+        ("CACHE_DB_FILE", "cache.db"),
+        ("LOCAL_MODEL_FILE", "local_model.json")
+    ):
+        os.environ.setdefault(name, os.path.join(data_dir, filename))
+    return data_dir
+
+
+def _process_request(client, index: int, texts: List[str]):
+    return client.post("/process", data={"text": texts[index % len(texts)]})
+
+
+def _feedback_request(client, index: int, texts: List[str]):
+    return client.post("/feedback", data={
+        "original_text": texts[index % len(texts)],
+        "predicted": "Produtivo",
+        "feedback_type": "correct" if index % 5 else "incorrect",
+        "correction": "Improdutivo"
+    })
+
+
+REQUESTS: Dict[str, Callable] = {
+    "process": _process_request,
+    "feedback": _feedback_request,
+}
+
+
+async def run_level(client, scenario: str, concurrency: int, total: int, texts: List[str]) -> Dict:
+    """Executa total requisições com concurrency clientes em laço fechado"""
+    make_request = REQUESTS[scenario]
+    latencies: List[float] = []
+    methods: Counter = Counter()
+    errors = 0
+    next_index = 0
+    
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, index, texts)
+                ok = response.status_code < 400
+                if ok and scenario == "process":
+                    methods[response.json().get("method", "?")] += 1
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    
+    return summarize(latencies, elapsed, errors, concurrency=concurrency, methods=dict(methods))
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    results: Dict[str, Dict] = {}
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    
+    async with open_client(args.url, args.timeout) as client:
+        for scenario in scenarios:
+            for level in levels:
+                # Textos novos por nível para não medir acertos de cache
+                texts = sample_emails(args.requests, unique=not args.allow_cache, seed=level)
+                total = max(args.requests, level)
+                
+                if args.warmup:
+                    await run_level(client, scenario, min(level, args.warmup), args.warmup, texts[:1])
+                
+                name = f"{scenario}@{level}"
+                results[name] = await run_level(client, scenario, level, total, texts)
+                print(f"{name}: {results[name]['throughput']:.1f} req/s, p99 {results[name]['p99'] * 1000:.1f} ms")
+    
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--concurrency", default="1,10,50,100", help="níveis separados por vírgula")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por nível")
+    parser.add_argument("--warmup", type=int, default=5, help="requisições de aquecimento por nível")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--allow-cache", action="store_true", help="repetir textos (mede acertos de cache)")
+    parser.add_argument("--url", help="servidor alvo (padrão: aplicação no mesmo processo)")
+    parser.add_argument("--no-stub", action="store_true", help="não iniciar o stub da API")
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--stub-jitter", type=float, default=0.05)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="arquivo JSON de saída (ex.: benchmarks/baselines/load.json)")
+    parser.add_argument("--verbose", action="store_true", help="manter logs INFO da aplicação")
+    args = parser.parse_args()
+    
+    stub = None
+    if not args.no_stub:
+        stub, stub_url = start_stub(args.stub_latency, args.stub_jitter, args.stub_error_rate, args.seed)
+        os.environ["DEEPSEEK_BASE_URL"] = stub_url
+        os.environ.setdefault("DEEPSEEK_API_KEY", "stub")
+        if args.url:
+            print(f"Stub em {stub_url}: configure o servidor alvo com DEEPSEEK_BASE_URL={stub_url}")
+    
+    # As variáveis de ambiente precisam estar definidas antes de importar app.*
+    if not args.url:
+        isolate_data_dir()
+    
+    if not args.verbose:
+        from app.core.logging_config import logger
+        logger.setLevel(logging.WARNING)
+    
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+    
+    print_table(results)
+    params = {k: v for k, v in vars(args).items() if k != "output"}
+    print(f"Resultados gravados em {save_results('load', results, args.output, params)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Micro-benchmarks dos componentes locais (sem rede)
+
+Mede TextProcessor (preprocess e preprocess_many), a classificação de
+fallback por regras (AIService._classify_fallback), o classificador local,
+o índice de quase-duplicatas e a extração de PDF (completa e com orçamento
+de caracteres).
+
+Uso:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only text,rules --output benchmarks/baselines/micro.json
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.fixtures import IMPRODUTIVO_SAMPLES, sample_emails, sample_pdf
+from benchmarks.results import print_table, save_results, summarize
+
+GROUPS = ("text", "rules", "local", "similarity", "pdf")
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 3, **extra) -> Dict:
+    """Executa func repeat vezes e resume a latência de cada execução"""
+    for _ in range(warmup):
+        func()
+    
+    gc.collect()
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        op_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started, **extra)
+
+
+async def measure_async(func: Callable[[], "asyncio.Future"], repeat: int, warmup: int = 2, **extra) -> Dict:
+    """Versão assíncrona de measure (operações sequenciais)"""
+    for _ in range(warmup):
+        await func()
+    
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        op_started = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started, **extra)
+
+
+def bench_text(repeat: int) -> Dict[str, Dict]:
+    from app.services.text_processor import TextProcessor
+    
+    processor = TextProcessor()
+    emails = sample_emails(1000)
+    email = emails[0] * 20
+    
+    return {
+        "text.preprocess": measure(lambda: processor.preprocess(email), repeat),
+        "text.preprocess_many[1000]": measure(
+            lambda: processor.preprocess_many(emails, workers=0), max(3, repeat // 100), items=len(emails)
+        ),
+    }
+
+
+def bench_rules(repeat: int) -> Dict[str, Dict]:
+    from app.services.ai_service import AIService
+    
+    service = AIService()
+    emails = sample_emails(100)
+    long_email = " ".join(emails)
+    state = {"index": 0}
+    
+    def classify_next():
+        state["index"] = (state["index"] + 1) % len(emails)
+        service._classify_fallback(emails[state["index"]])
+    
+    return {
+        "rules.classify_fallback": measure(classify_next, repeat),
+        "rules.classify_fallback[long]": measure(lambda: service._classify_fallback(long_email), repeat),
+    }
+
+
+def bench_local(repeat: int) -> Dict[str, Dict]:
+    from app.services.local_classifier import LocalClassifier
+    
+    classifier = LocalClassifier()
+    # Arquivo inexistente: predict usa só o modelo treinado em memória
+    classifier.model_path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "local_model.json")
+    emails = sample_emails(400, seed=1)
+    rows = [
+        {"original_text": text, "predicted": "Produtivo", "feedback_type": "correct", "correction": None}
+        for text in emails
+    ]
+    # Rótulos sintéticos coerentes com as amostras
+    for row in rows:
+        if row["original_text"].startswith(tuple(IMPRODUTIVO_SAMPLES)):
+            row["predicted"] = "Improdutivo"
+    
+    classifier.train(rows, workers=0)
+    
+    return {
+        "local.train[400]": measure(lambda: classifier.train(rows, workers=0), max(3, repeat // 100)),
+        "local.predict": measure(lambda: classifier.predict(emails[0]), repeat),
+    }
+
+
+def bench_similarity(repeat: int) -> Dict[str, Dict]:
+    from app.core.config import settings
+    from app.services.similarity_index import SimilarityIndex
+    
+    settings.SIMILARITY_DB_FILE = ""
+    index = SimilarityIndex()
+    emails = sample_emails(1000, seed=2)
+    result = {"category": "Produtivo", "confidence": 0.85, "method": "deepseek", "response": "ok"}
+    
+    async def fill() -> None:
+        for text in emails:
+            await index.add(index.signature(text), result)
+    
+    asyncio.run(fill())
+    signature = index.signature(emails[0])
+    
+    return {
+        "similarity.signature": measure(lambda: index.signature(emails[0]), repeat),
+        f"similarity.lookup[{index.stats()['entries']} entradas]": measure(lambda: index.lookup(signature), repeat),
+    }
+
+
+def bench_pdf(repeat: int) -> Dict[str, Dict]:
+    from app.services.pdf_extractor import PdfExtractor
+    
+    small = sample_pdf(1)
+    large = sample_pdf(60)
+    repeat = max(3, repeat // 100)
+    
+    async def run() -> Dict[str, Dict]:
+        extractor = PdfExtractor()
+        try:
+            return {
+                "pdf.extract[1 página]": await measure_async(lambda: extractor.extract(small), repeat),
+                "pdf.extract[60 páginas]": await measure_async(lambda: extractor.extract(large), repeat),
+                "pdf.extract[60 páginas, orçamento 8000]": await measure_async(
+                    lambda: extractor.extract(large, max_chars=8000), repeat
+                ),
+            }
+        finally:
+            extractor.close()
+    
+    return asyncio.run(run())
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict[str, Dict]]] = {
+    "text": bench_text,
+    "rules": bench_rules,
+    "local": bench_local,
+    "similarity": bench_similarity,
+    "pdf": bench_pdf,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"grupos separados por vírgula ({', '.join(GROUPS)})")
+    parser.add_argument("--repeat", type=int, default=1000, help="repetições das operações rápidas")
+    parser.add_argument("--output", help="arquivo JSON de saída (ex.: benchmarks/baselines/micro.json)")
+    parser.add_argument("--verbose", action="store_true", help="manter logs INFO da aplicação")
+    args = parser.parse_args()
+    
+    if not args.verbose:
+        from app.core.logging_config import logger
+        logger.setLevel(logging.WARNING)
+    
+    results: Dict[str, Dict] = {}
+    for group in args.only.split(","):
+        results.update(BENCHMARKS[group.strip()](args.repeat))
+    
+    print_table(results)
+    params = {"only": args.only, "repeat": args.repeat}
+    print(f"Resultados gravados em {save_results('micro', results, args.output, params)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Estatísticas e persistência dos resultados de benchmark (JSON)
+
+Formato do arquivo:
+    {
+        "kind": "load" | "micro",
+        "meta": {...ambiente...},
+        "results": {"<cenário>": {"throughput": ..., "p50": ..., "p95": ..., "p99": ..., ...}}
+    }
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil com interpolação linear (valores já ordenados)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0, **extra) -> Dict:
+    """
+    Resume uma série de latências (segundos)
+    
+    Args:
+        latencies: Duração de cada operação
+        elapsed: Tempo total de parede da série
+        errors: Operações que falharam
+    """
+    values = sorted(latencies)
+    total = len(values)
+    return {
+        "operations": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean": round(sum(values) / total, 6) if total else 0.0,
+        "p50": round(percentile(values, 0.50), 6),
+        "p95": round(percentile(values, 0.95), 6),
+        "p99": round(percentile(values, 0.99), 6),
+        "max": round(values[-1], 6) if values else 0.0,
+        **extra
+    }
+
+
+def environment() -> Dict:
+    """Metadados do ambiente para comparar baselines equivalentes"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def save_results(kind: str, results: Dict, output: Optional[str] = None, params: Optional[Dict] = None) -> str:
+    """
+    Grava os resultados em JSON
+    
+    Args:
+        kind: "load" ou "micro"
+        results: Resultados por cenário
+        output: Caminho do arquivo (padrão: benchmarks/results/<kind>-<timestamp>.json)
+        params: Parâmetros usados na execução
+    
+    Returns:
+        Caminho do arquivo gravado
+    """
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{kind}-{stamp}.json")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    
+    payload = {"kind": kind, "meta": environment(), "params": params or {}, "results": results}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(results: Dict) -> None:
+    """Imprime os resultados em formato tabular"""
+    print(f"{'cenário':<44} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>7}")
+    for name, result in results.items():
+        print(
+            f"{name:<44} {result['throughput']:>10.1f} {result['p50'] * 1000:>9.2f} "
+            f"{result['p95'] * 1000:>9.2f} {result['p99'] * 1000:>9.2f} {result['error_rate']:>7.2%}"
+        )
@@ -0,0 +1,174 @@
+"""
+Servidor local compatível com a API de chat completions (OpenAI/DeepSeek)
+
+Simula latência, jitter e taxa de erros configuráveis para testes de carga
+sem depender da API real. Aponte a aplicação para ele com:
+
+    DEEPSEEK_API_KEY=stub DEEPSEEK_BASE_URL=http://127.0.0.1:9999 uvicorn app.main:app
+
+Uso:
+    python -m benchmarks.stub_server --port 9999 --latency 0.2 --jitter 0.05 --error-rate 0.01
+
+As opções também podem vir de variáveis de ambiente (STUB_LATENCY,
+STUB_JITTER, STUB_ERROR_RATE, STUB_SEED).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Palavras que levam o stub a responder "Improdutivo"
+IMPRODUTIVO_HINTS = re.compile(r"natal|feliz|parab[eé]ns|obrigad|promo[cç]", re.IGNORECASE)
+
+REPLY_TEXT = "Prezado(a), agradecemos o contato. Recebemos sua mensagem e retornaremos em breve. Atenciosamente."
+
+
+@dataclass
+class StubConfig:
+    """Parâmetros de simulação do stub"""
+    latency: float = float(os.getenv("STUB_LATENCY", "0.2"))
+    jitter: float = float(os.getenv("STUB_JITTER", "0.0"))
+    error_rate: float = float(os.getenv("STUB_ERROR_RATE", "0.0"))
+    seed: int = int(os.getenv("STUB_SEED", "0"))
+    stats: Dict[str, int] = field(default_factory=lambda: {"calls": 0, "errors": 0})
+
+
+config = StubConfig()
+_random = random.Random(config.seed)
+
+app = FastAPI(title="Stub chat completions")
+
+
+def _delay() -> float:
+    """Latência simulada: base + jitter uniforme (nunca negativa)"""
+    return max(0.0, config.latency + _random.uniform(-config.jitter, config.jitter))
+
+
+def _classify(text: str) -> str:
+    return "Improdutivo" if IMPRODUTIVO_HINTS.search(text) else "Produtivo"
+
+
+def _completion_content(body: Dict) -> str:
+    """Gera o conteúdo coerente com o tipo de chamada recebida"""
+    messages = body.get("messages", [])
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+    email = user.split("EMAIL", 1)[-1]
+    
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"category": _classify(email), "confidence": 0.9, "response": REPLY_TEXT})
+    
+    # Classificação em lote: "EMAIL 1", "EMAIL 2"...
+    numbered = re.split(r"EMAIL (\d+):", user)
+    if len(numbered) > 2:
+        pairs = zip(numbered[1::2], numbered[2::2])
+        return "\n".join(f"{index}: {_classify(text)}" for index, text in pairs)
+    
+    if "APENAS" in system:
+        return _classify(email)
+    
+    return REPLY_TEXT
+
+
+def _usage(body: Dict, content: str) -> Dict[str, int]:
+    """Contagem aproximada de tokens (~4 caracteres por token)"""
+    prompt = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+    completion = max(1, len(content) // 4)
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+@app.get("/stats")
+async def stats():
+    """Contadores de chamadas e erros injetados"""
+    return config.stats
+
+
+@app.post("/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    config.stats["calls"] += 1
+    
+    await asyncio.sleep(_delay())
+    
+    if config.error_rate and _random.random() < config.error_rate:
+        config.stats["errors"] += 1
+        status = _random.choice((429, 500, 503))
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": "erro simulado", "type": "stub_error", "code": status}}
+        )
+    
+    content = _completion_content(body)
+    created = int(time.time())
+    model = body.get("model", "stub")
+    
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        
+        async def events():
+            words = content.split(" ")
+            for index, word in enumerate(words):
+                delta = word if index == len(words) - 1 else word + " "
+                chunk = {
+                    "id": "stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(config.latency / 20)
+            
+            if include_usage:
+                chunk = {
+                    "id": "stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [], "usage": _usage(body, content)
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+        
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    return JSONResponse({
+        "id": "stub",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": _usage(body, content)
+    })
+
+
+def main() -> None:
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--latency", type=float, default=config.latency, help="latência base (s)")
+    parser.add_argument("--jitter", type=float, default=config.jitter, help="variação uniforme ± (s)")
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="fração de respostas 429/5xx")
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args()
+    
+    config.latency = args.latency
+    config.jitter = args.jitter
+    config.error_rate = args.error_rate
+    _random.seed(args.seed)
+    
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
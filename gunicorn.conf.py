@@ -0,0 +1,46 @@
+"""
+Configuração do gunicorn (vários workers uvicorn)
+
+Uso: gunicorn -c gunicorn.conf.py app.main:app
+
+Os valores (WEB_*) vêm de variáveis de ambiente ou do .env. Este arquivo
+não importa a aplicação: o master do gunicorn não deve criar logger,
+conexões ou threads que os workers herdariam no fork.
+"""
+
+import multiprocessing
+import os
+import uuid
+from dotenv import dotenv_values
+
+# Mesmo nome de app.services.shared_store.INSTANCE_ENV
+INSTANCE_ENV = "EMAIL_ASSISTANT_INSTANCE"
+
+_env = {**dotenv_values(".env"), **os.environ}
+
+
+def _setting(name: str, default: int) -> int:
+    return int(_env.get(name) or default)
+
+
+bind = _env.get("BIND") or "0.0.0.0:8000"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = _setting("WEB_WORKERS", 0) or multiprocessing.cpu_count()
+
+# Reciclagem gradual: cada worker sai após ~WEB_MAX_REQUESTS requisições
+# (o jitter evita que todos reiniciem juntos)
+max_requests = _setting("WEB_MAX_REQUESTS", 10000)
+max_requests_jitter = _setting("WEB_MAX_REQUESTS_JITTER", 1000)
+graceful_timeout = _setting("WEB_GRACEFUL_TIMEOUT", 30)
+timeout = _setting("WEB_TIMEOUT", 120)
+
+
+def on_starting(server):
+    """Variáveis herdadas por todos os workers"""
+    # Identificador da implantação (SharedStore)
+    os.environ[INSTANCE_ENV] = uuid.uuid4().hex
+    # Número de workers (settings.WEB_CONCURRENCY: um arquivo de log por worker)
+    os.environ["WEB_CONCURRENCY"] = str(server.cfg.workers)
+    # Telemetria e jobs compartilhados só fazem sentido com vários workers
+    if server.cfg.workers > 1 and not _env.get("SHARED_DB_FILE"):
+        os.environ["SHARED_DB_FILE"] = "data/shared.db"
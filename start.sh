@@ -1,5 +1,11 @@
 #!/bin/bash
 APP_DIR="app"
 
+# Vários workers (WEB_WORKERS > 1): gunicorn com workers uvicorn
+# (ver gunicorn.conf.py); padrão: processo único com Uvicorn
+if [ "${WEB_WORKERS:-1}" -gt 1 ] 2> /dev/null && command -v gunicorn > /dev/null; then
+    exec gunicorn -c gunicorn.conf.py app.main:app
+fi
+
 # Roda o Uvicorn
 uvicorn app.main:app
@@ -168,19 +168,18 @@ async function processEmail() {
     showLoading(true);
 
     try {
-        const response = await fetch('/process', {
+        const response = await fetch('/process/stream', {
             method: 'POST',
             body: formData
         });
 
-        const data = await response.json();
-
         if (!response.ok) {
+            const data = await response.json();
             throw new Error(data.error || 'Erro ao processar email');
         }
 
-        // Exibir resultados
-        displayResults(data.category, data.response, data.content_preview || '');
+        // Ler eventos SSE à medida que chegam
+        await readEventStream(response, handleStreamEvent);
         
         showToast('Email processado com sucesso!', 'success');
         
@@ -192,6 +191,65 @@ async function processEmail() {
     }
 }
 
+// ===========================
+// STREAMING (SERVER-SENT EVENTS)
+// ===========================
+
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Eventos são separados por linha em branco
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+
+            if (data) onEvent(eventName, JSON.parse(data));
+        }
+    }
+}
+
+function handleStreamEvent(eventName, data) {
+    const responseText = document.getElementById('responseText');
+
+    switch (eventName) {
+        case 'category':
+            // Exibe a categoria imediatamente e libera a tela
+            displayResults(data.category, '', data.content_preview || '');
+            showLoading(false);
+            break;
+        case 'token':
+            currentResponse += data.text;
+            responseText.textContent = currentResponse;
+            break;
+        case 'replace':
+            currentResponse = data.response;
+            responseText.textContent = currentResponse;
+            break;
+        case 'done':
+            currentResponse = data.response;
+            responseText.textContent = currentResponse;
+            break;
+        case 'error':
+            throw new Error(data.error || 'Erro ao processar email');
+    }
+}
+
 // ===========================
 // EXIBIR RESULTADOS
 // ===========================
@@ -0,0 +1,125 @@
+import time
+
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(
+        window=10,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_seconds=1.0,
+        slow_call_rate=0.5,
+        open_seconds=0.05,
+        half_open_probes=2
+    )
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record(0.01, ok=False)
+    assert breaker.state == OPEN
+
+
+def wait_half_open(breaker: CircuitBreaker) -> None:
+    time.sleep(breaker.open_seconds + 0.01)
+    assert breaker.state == HALF_OPEN
+
+
+def test_opens_on_failure_rate_and_rejects_calls():
+    breaker = make_breaker()
+    breaker.record(0.01, ok=True)
+    breaker.record(0.01, ok=False)
+    breaker.record(0.01, ok=True)
+    assert breaker.state == CLOSED
+    
+    breaker.record(0.01, ok=False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_opens_on_slow_call_rate():
+    breaker = make_breaker()
+    for duration in (2.0, 0.1, 2.0, 0.1):
+        breaker.record(duration, ok=True)
+    assert breaker.state == OPEN
+
+
+def test_half_open_limits_probes_and_closes_after_successes():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert not breaker.available()
+    
+    breaker.record(0.01, ok=True)
+    assert breaker.state == HALF_OPEN
+    breaker.record(0.01, ok=True)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker()
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    
+    assert breaker.allow()
+    breaker.record(0.01, ok=False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_release_frees_probe_slot_without_closing():
+    breaker = make_breaker(half_open_probes=1)
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_cancelled_calls_count_as_slow_but_not_failed():
+    breaker = make_breaker()
+    breaker.record_cancelled(2.0)
+    breaker.record_cancelled(2.0)
+    breaker.record(0.01, ok=True)
+    snapshot = breaker.snapshot()
+    assert snapshot["failure_rate"] == 0.0
+    assert snapshot["slow_call_rate"] > 0
+    
+    breaker.record_cancelled(0.01)
+    assert breaker.state == OPEN
+
+
+def test_cancelled_probe_frees_slot_and_reopens_only_if_slow():
+    breaker = make_breaker(half_open_probes=1)
+    open_breaker(breaker)
+    wait_half_open(breaker)
+    
+    assert breaker.allow()
+    breaker.record_cancelled(0.01)
+    assert breaker.state == HALF_OPEN
+    
+    assert breaker.allow()
+    breaker.record_cancelled(2.0)
+    assert breaker.state == OPEN
+
+
+def test_late_results_while_open_are_ignored():
+    breaker = make_breaker(open_seconds=60)
+    open_breaker(breaker)
+    
+    breaker.record(0.01, ok=True)
+    breaker.record_cancelled(2.0)
+    assert breaker.state == OPEN
@@ -0,0 +1,259 @@
+import asyncio
+
+import pytest
+
+from app.utils.concurrency import MicroBatcher, SingleFlight, bounded_map_unordered
+
+
+async def _items(values, fail_at=None):
+    for index, value in enumerate(values):
+        if index == fail_at:
+            raise ValueError("fonte")
+        yield value
+
+
+# SingleFlight
+
+def test_singleflight_shares_one_execution():
+    async def main():
+        flight = SingleFlight("test")
+        calls = 0
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "ok"
+        
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return results, calls, flight.stats()
+    
+    results, calls, stats = asyncio.run(main())
+    assert results == ["ok"] * 5
+    assert calls == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_singleflight_cancelled_leader_keeps_execution_for_followers():
+    async def main():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+        
+        async def work():
+            await release.wait()
+            return "ok"
+        
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, flight.stats()
+    
+    result, stats = asyncio.run(main())
+    assert result == "ok"
+    assert stats["cancelled"] == 0
+
+
+def test_singleflight_cancels_execution_without_waiters():
+    async def main():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+        
+        async def stuck():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        callers = [asyncio.create_task(flight.do("k", stuck)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        
+        # Chave liberada: a próxima chamada é uma nova execução
+        async def fresh():
+            return "novo"
+        
+        return await flight.do("k", fresh), flight.stats()
+    
+    result, stats = asyncio.run(main())
+    assert result == "novo"
+    assert stats["cancelled"] == 1
+    assert stats["executions"] == 2
+
+
+def test_singleflight_propagates_failure_to_all_and_forgets_key():
+    async def main():
+        flight = SingleFlight("test")
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("falhou")
+        
+        results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+        return results, flight.stats()
+    
+    results, stats = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["executions"] == 1
+    assert stats["in_flight"] == 0
+
+
+# MicroBatcher
+
+def test_microbatcher_groups_items_and_keeps_order():
+    async def main():
+        batches = []
+        
+        async def handler(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+        
+        batcher = MicroBatcher("test", handler, max_items=3, max_wait=0.01)
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+        return results, batches
+    
+    results, batches = asyncio.run(main())
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2], [3, 4]]
+
+
+def test_microbatcher_handler_error_reaches_every_item():
+    async def main():
+        async def handler(items):
+            raise RuntimeError("lote")
+        
+        batcher = MicroBatcher("test", handler, max_items=10, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+    
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["lote"] * 3
+
+
+def test_microbatcher_drops_cancelled_items_before_dispatch():
+    async def main():
+        batches = []
+        
+        async def handler(items):
+            batches.append(list(items))
+            return list(items)
+        
+        batcher = MicroBatcher("test", handler, max_items=10, max_wait=0.02)
+        cancelled = asyncio.create_task(batcher.submit("a"))
+        kept = asyncio.create_task(batcher.submit("b"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept, batches
+    
+    result, batches = asyncio.run(main())
+    assert result == "b"
+    assert batches == [["b"]]
+
+
+def test_microbatcher_missing_results_fail_only_those_items():
+    async def main():
+        async def handler(items):
+            return items[:1]
+        
+        batcher = MicroBatcher("test", handler, max_items=2, max_wait=0.01)
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+    
+    first, second = asyncio.run(main())
+    assert first == "a"
+    assert isinstance(second, RuntimeError)
+
+
+# bounded_map_unordered
+
+def test_bounded_map_respects_limit():
+    async def main():
+        running = peak = 0
+        
+        async def work(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001 * (item % 3))
+            running -= 1
+            return item
+        
+        results = [result async for result in bounded_map_unordered(_items(range(20)), work, 4)]
+        return results, peak
+    
+    results, peak = asyncio.run(main())
+    assert sorted(results) == list(range(20))
+    assert peak <= 4
+
+
+def test_bounded_map_failure_cancels_pending_work():
+    async def main():
+        cancelled = 0
+        
+        async def work(item):
+            nonlocal cancelled
+            if item == 0:
+                raise RuntimeError("item")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+        
+        with pytest.raises(RuntimeError, match="item"):
+            async for _ in bounded_map_unordered(_items(range(4)), work, 4):
+                pass
+        await asyncio.sleep(0)
+        return cancelled
+    
+    assert asyncio.run(main()) == 3
+
+
+def test_bounded_map_propagates_source_error():
+    async def main():
+        async def work(item):
+            return item
+        
+        results = []
+        with pytest.raises(ValueError, match="fonte"):
+            async for result in bounded_map_unordered(_items(range(5), fail_at=2), work, 2):
+                results.append(result)
+        return results
+    
+    # Itens lidos antes do erro podem não ser entregues; nenhum item posterior é
+    assert set(asyncio.run(main())) <= {0, 1}
+
+
+def test_bounded_map_early_close_cancels_pending_work():
+    async def main():
+        cancelled = 0
+        
+        async def work(item):
+            nonlocal cancelled
+            if item == 0:
+                return item
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+        
+        results = bounded_map_unordered(_items(range(3)), work, 3)
+        first = await results.__anext__()
+        await results.aclose()
+        await asyncio.sleep(0)
+        return first, cancelled
+    
+    assert asyncio.run(main()) == (0, 2)
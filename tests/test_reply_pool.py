@@ -0,0 +1,35 @@
+from app.core.config import settings
+from app.services.reply_pool import ReplyPool
+
+
+def make_pool() -> ReplyPool:
+    return ReplyPool(settings.REPLY_POOL_SEED_FILE)
+
+
+def test_gratis_is_not_a_thank_you():
+    pool = make_pool()
+    
+    assert pool.detect_intent("Improdutivo", "Frete grátis para você!") == "promocao"
+    assert pool.detect_intent("Improdutivo", "Sou muito grato pelo atendimento") == "agradecimento"
+    assert pool.detect_intent("Improdutivo", "Gratificação de fim de ano") == "generico"
+
+
+def test_tie_uses_priority():
+    pool = make_pool()
+    
+    assert pool.detect_intent("Improdutivo", "Feliz natal a todos! Parabéns pelo ano") == "festas"
+
+
+def test_tie_with_same_priority_uses_category_default(tmp_path):
+    path = tmp_path / "pool.json"
+    path.write_text("""{
+        "intents": {
+            "a": {"category": "Improdutivo", "keywords": ["alfa"], "sample": "", "replies": ["A"]},
+            "b": {"category": "Improdutivo", "keywords": ["beta"], "sample": "", "replies": ["B"]},
+            "padrao": {"category": "Improdutivo", "keywords": [], "sample": "", "replies": ["P"]}
+        }
+    }""", encoding="utf-8")
+    pool = ReplyPool(str(path))
+    
+    assert pool.detect_intent("Improdutivo", "alfa beta") == "padrao"
+    assert pool.detect_intent("Improdutivo", "alfa beta alfa") == "a"